@@ -14,6 +14,23 @@ from telegram.ext import (
 
 from src.dialogue.dialogue_manager import DialogueManager
 from src.config import settings, setup_logging_globally
+from src.browser.driver_pool import get_all_stats as get_driver_pool_stats, shutdown_all_pools
+from src.browser.driver_resolver import get_resolver_stats
+from src.browser.resource_filter import get_filter_stats
+from src.tools.single_flight import get_single_flight_stats
+from src.tools.page_cache import get_page_cache_stats
+from src.tools.search_cache import get_search_cache_stats
+from src.browser.playwright_pool import shutdown_playwright_pool
+from src.browser.scheduler import get_browser_scheduler
+from src.browser.supervisor import get_supervisor_stats, run_supervisor
+from src.tools.http_session import close_http_session
+from src.tools.key_rate_service import get_key_rate_service
+from src.tools.sez_registry import get_sez_registry
+from src.tools.news_digest import get_news_digest_service
+from src.tools.industry_cache import run_nightly_precompute
+from src.web_news_analyzer import refresh_industry_analysis
+from src.job_queue import Job, get_job_queue
+from src.startup import is_ready, warm_up
 
 # --- Настройки и инициализация ---
 setup_logging_globally()
@@ -33,9 +50,7 @@ def escape_markdown(text: str) -> str:
     return re.sub(f'([{re.escape(escape_chars)}])', r'\\\1', text)
 
 
-async def send_long_message(
-    update: Update, context: ContextTypes.DEFAULT_TYPE, text: str
-):
+async def send_long_message(bot, chat_id: int, text: str):
     """
     Отправляет длинное сообщение, безопасно разрезая его и экранируя Markdown.
     """
@@ -47,11 +62,14 @@ async def send_long_message(
     
     if len(safe_text) <= MAX_LENGTH:
         try:
-            await update.message.reply_text(safe_text, parse_mode=constants.ParseMode.MARKDOWN_V2)
+            await bot.send_message(chat_id=chat_id, text=safe_text, parse_mode=constants.ParseMode.MARKDOWN_V2)
         except BadRequest as e:
             logger.error(f"Ошибка отправки короткого сообщения: {e}. Текст: {safe_text[:200]}")
             # Отправляем без форматирования как запасной вариант
-            await update.message.reply_text("Возникла ошибка при форматировании ответа. Отправляю текст без разметки:\n\n" + text)
+            await bot.send_message(
+                chat_id=chat_id,
+                text="Возникла ошибка при форматировании ответа. Отправляю текст без разметки:\n\n" + text,
+            )
         return
 
     parts = []
@@ -81,8 +99,8 @@ async def send_long_message(
     logger.info(f"Сообщение разделено на {len(parts)} частей.")
     for i, part in enumerate(parts):
         try:
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
+            await bot.send_message(
+                chat_id=chat_id,
                 text=part,
                 parse_mode=constants.ParseMode.MARKDOWN_V2,
             )
@@ -92,8 +110,8 @@ async def send_long_message(
         except BadRequest as e:
             logger.error(f"Ошибка отправки части {i+1}/{len(parts)}: {e}. Текст части: {part[:200]}")
             # Отправляем проблемную часть без форматирования
-            await context.bot.send_message(
-                chat_id=update.effective_chat.id,
+            await bot.send_message(
+                chat_id=chat_id,
                 text="Проблема с форматированием этой части. Отправляю как есть:\n\n" + text[sum(len(p) for p in parts[:i]):][:len(part)]
             )
 
@@ -118,9 +136,22 @@ async def handle_text_message(
 
     inn_match = re.search(r"(\b\d{10}\b|\b\d{12}\b)", user_text)
     if inn_match:
-        await update.message.reply_text(
-            "🔎 Начинаю комплексный анализ... Это может занять несколько минут, пожалуйста, ожидайте."
+        # Комплексный анализ идет несколько минут - ставим его в очередь и сразу отвечаем.
+        # Статусное сообщение отправляем до постановки в очередь: после submit его правит
+        # только обработчик задачи, и позиция не перезапишет "анализ начат"
+        job_queue = get_job_queue()
+        job = job_queue.create(user_id, update.effective_chat.id, user_text)
+        status_text = (
+            f"🔎 Анализ поставлен в очередь (задача #{job.id}, позиция: {job_queue.position(job)}). "
+            "Здесь будет отображаться ход выполнения, отчет придет отдельным сообщением."
         )
+        if not is_ready():
+            # Прогрев не уложился в бюджет и доделывается в фоне
+            status_text += "\nБот еще прогревается, первый анализ может занять больше времени."
+        status_message = await update.message.reply_text(status_text)
+        job.status_message_id = status_message.message_id
+        job_queue.submit(job)
+        return
 
     await context.bot.send_chat_action(
         chat_id=update.effective_chat.id, action=constants.ChatAction.TYPING
@@ -129,13 +160,115 @@ async def handle_text_message(
     response_text = await dialogue_manager.handle_message(user_id, user_text)
 
     logger.info(f"Отправка ответа пользователю {user_id}: '{response_text[:120]}...'")
-    await send_long_message(update, context, response_text)
+    await send_long_message(context.bot, update.effective_chat.id, response_text)
+
+
+async def update_job_status(bot, job: Job, text: str) -> None:
+    """Правит статусное сообщение задачи (или отправляет новое, если его нет)."""
+    try:
+        if job.status_message_id:
+            await bot.edit_message_text(chat_id=job.chat_id, message_id=job.status_message_id, text=text)
+        else:
+            message = await bot.send_message(chat_id=job.chat_id, text=text)
+            get_job_queue().set_status_message(job.id, message.message_id)
+    except BadRequest as e:
+        # Например, "message is not modified" или сообщение удалено пользователем
+        logger.warning(f"Не удалось обновить статус задачи {job.id}: {e}")
+
+
+async def run_analysis_job(bot, job: Job) -> None:
+    """Выполняет задачу из очереди: ход анализа - в статусном сообщении, разделы отчета - отдельными."""
+
+    async def report_progress(stage: str) -> None:
+        await update_job_status(bot, job, f"⏳ Задача #{job.id}: {stage}...")
+
+    await report_progress("анализ начат")
+    try:
+        response_text = await dialogue_manager.handle_message(
+            job.user_id,
+            job.text,
+            progress=report_progress,
+            # Разделы отчета приходят по мере готовности, в конце - итоговое сообщение
+            on_section=lambda section: send_long_message(bot, job.chat_id, section),
+        )
+    except Exception:
+        await update_job_status(bot, job, f"❌ Задача #{job.id} завершилась с ошибкой. Попробуйте еще раз позже.")
+        raise
+
+    await update_job_status(bot, job, f"✅ Задача #{job.id} выполнена.")
+    logger.info(f"Отправка отчета по задаче {job.id} пользователю {job.user_id}: '{response_text[:120]}...'")
+    await send_long_message(bot, job.chat_id, response_text)
+
+
+async def on_startup(application: Application) -> None:
+    """Прогревает браузеры, GigaChat и справочники до начала опроса Telegram."""
+    await warm_up(dialogue_manager.giga_nlu)
+    # Фоновый надзор за памятью браузеров и осиротевшими процессами
+    application.bot_data["supervisor_task"] = asyncio.create_task(run_supervisor())
+    # Плановое обновление истории ключевой ставки
+    application.bot_data["key_rate_task"] = asyncio.create_task(
+        get_key_rate_service().run_refresher()
+    )
+    # Индекс реестра СЭЗ перестраивается в фоне, только когда меняется PDF
+    application.bot_data["sez_registry_task"] = asyncio.create_task(
+        get_sez_registry().run_refresher()
+    )
+    # Новости отрасли собираются в фоне, анализ ИНН читает готовый снимок
+    application.bot_data["news_digest_task"] = asyncio.create_task(
+        get_news_digest_service().run_refresher()
+    )
+    # Очередь анализов ИНН (в том числе задачи, не завершенные до перезапуска)
+    application.bot_data["job_queue_task"] = asyncio.create_task(
+        get_job_queue().run(lambda job: run_analysis_job(application.bot, job))
+    )
+    # Ночной пересчет отраслевой аналитики для самых частых ОКВЭД
+    application.bot_data["industry_precompute_task"] = asyncio.create_task(
+        run_nightly_precompute(
+            lambda key, okved_description: refresh_industry_analysis(
+                key, okved_description, dialogue_manager.giga_nlu
+            )
+        )
+    )
+
+
+async def on_shutdown(application: Application) -> None:
+    """Закрывает общие браузеры и HTTP-сессию при остановке бота."""
+    tasks = []
+    for task_name in ("supervisor_task", "key_rate_task", "sez_registry_task", "news_digest_task",
+                      "industry_precompute_task", "job_queue_task"):
+        task = application.bot_data.get(task_name)
+        if task:
+            task.cancel()
+            tasks.append(task)
+    # Ждем завершения: очередь анализов успевает сохранить задачи до закрытия браузеров и сессии
+    await asyncio.gather(*tasks, return_exceptions=True)
+    # Пулы еще открыты - видно и накопленные счетчики, и текущую загрузку
+    logger.info(f"Статистика очереди браузерных слотов по сайтам: {get_browser_scheduler().get_stats()}")
+    logger.info(f"Статистика пулов Selenium: {get_driver_pool_stats()}")
+    logger.info(f"Статистика надзора за браузерами: {get_supervisor_stats()}")
+    await shutdown_playwright_pool()
+    await asyncio.to_thread(shutdown_all_pools)
+    await close_http_session()
+    logger.info(f"Статистика поиска ChromeDriver: {get_resolver_stats()}")
+    logger.info(
+        f"Статистика фильтра ресурсов (экономия трафика - оценка по среднему размеру ресурса): "
+        f"{get_filter_stats()}"
+    )
+    logger.info(f"Статистика объединения одинаковых запросов: {get_single_flight_stats()}")
+    logger.info(f"Статистика кэша страниц: {get_page_cache_stats()}")
+    logger.info(f"Статистика кэша поиска: {get_search_cache_stats()}")
 
 
 def run_bot() -> None:
     """Запускает бота."""
     logger.info("Запуск Telegram-бота...")
-    application = Application.builder().token(settings.TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(settings.TELEGRAM_BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
     
     # Добавляем обработчик ошибок
     # application.add_error_handler(error_handler) # Вы можете создать свою функцию error_handler
@@ -6,6 +6,7 @@ import asyncio
 import json
 import time
 import os
+import sys
 
 # --- НОВЫЕ ИМПОРТЫ ДЛЯ SELENIUM ---
 from selenium import webdriver
@@ -13,8 +14,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
+
+# Корень проекта в sys.path, чтобы модуль можно было запускать напрямую
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.browser.driver_pool import get_pool
+from src.browser.readiness import ContentLengthConverged, Readiness
+from src.tools.page_cache import fetch_text
+from src.tools.single_flight import coalesce
 
 
 # --- 1. НАСТРОЙКИ ---
@@ -32,14 +39,8 @@ HEADERS = {
 
 
 # --- НОВАЯ ФУНКЦИЯ ДЛЯ ПОЛУЧЕНИЯ HTML ЧЕРЕЗ SELENIUM ---
-def get_html_with_selenium(url: str, wait_for_selector: str) -> str | None:
-    """
-    УНИВЕРСАЛЬНАЯ ФУНКЦИЯ: Загружает страницу и "умно" ждет появления
-    конкретного элемента, указанного в wait_for_selector.
-    """
-    logging.info(f"Загрузка страницы {url} с помощью Selenium...")
-    logging.info(f"Будем ждать появления элемента: '{wait_for_selector}'")
-
+def _build_chrome_options() -> webdriver.ChromeOptions:
+    """Настройки Chrome для новостных сайтов (маскируемся под обычный браузер)."""
     options = webdriver.ChromeOptions()
 
     options.add_argument(f"user-agent={HEADERS['User-Agent']}")
@@ -48,49 +49,73 @@ def get_html_with_selenium(url: str, wait_for_selector: str) -> str | None:
     )
     options.add_experimental_option("useAutomationExtension", False)
 
-    # Пока оставляем закомментированным для отладки
-    # options.add_argument("--headless=new")
+    # Дайджест собирается в фоне (src/tools/news_digest.py), окно браузера не нужно
+    options.add_argument("--headless=new")
 
+    # Не ждем загрузки картинок и прочего: готовность страницы проверяем сами
+    options.page_load_strategy = "eager"
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
+    return options
 
-    driver = None
-    try:
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-        )
 
-        driver.get(url)
+def _hide_webdriver_flag(driver) -> None:
+    driver.execute_script(
+        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    )
 
-        # "УМНОЕ" ОЖИДАНИЕ (до 30 секунд)
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_selector))
-        )
 
-        # Дополнительная пауза для полной "отрисовки"
-        time.sleep(2)
+def _get_driver_pool():
+    return get_pool(
+        "agroinvestor",
+        _build_chrome_options,
+        on_create=_hide_webdriver_flag,
+        site=BASE_URL,
+    )
 
-        logging.info("Ключевой элемент найден. Ожидание завершено, получаем HTML-код.")
-        return driver.page_source
+
+def get_html_with_selenium(
+    url: str, wait_for_selector: str, readiness: Readiness | None = None
+) -> str | None:
+    """
+    УНИВЕРСАЛЬНАЯ ФУНКЦИЯ: Загружает страницу и "умно" ждет появления
+    конкретного элемента, указанного в wait_for_selector.
+    После появления элемента ждем, пока его содержимое перестанет меняться
+    (или условие readiness, если оно передано).
+    """
+    logging.info(f"Загрузка страницы {url} с помощью Selenium...")
+    logging.info(f"Будем ждать появления элемента: '{wait_for_selector}'")
+
+    try:
+        with _get_driver_pool().checkout() as driver:
+            driver.get(url)
+
+            # "УМНОЕ" ОЖИДАНИЕ (до 30 секунд)
+            try:
+                WebDriverWait(driver, 30).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_selector))
+                )
+            except TimeoutException:
+                filename = f"debug_timeout_{url.split('/')[-2]}.html"
+                with open(filename, "w", encoding="utf-8") as f:
+                    f.write(driver.page_source)
+                logging.info(f"HTML-код проблемной страницы сохранен в '{filename}'")
+                raise
+
+            # Ждем, пока содержимое элемента "дорисуется", вместо фиксированной паузы
+            (readiness or ContentLengthConverged(wait_for_selector, cap_ms=2000)).wait_selenium(driver)
+
+            logging.info("Ключевой элемент найден. Ожидание завершено, получаем HTML-код.")
+            return driver.page_source
 
     except TimeoutException:
         logging.error(f"Тайм-аут: не удалось дождаться элемента '{wait_for_selector}'.")
-        if driver:
-            filename = f"debug_timeout_{url.split('/')[-2]}.html"
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-            logging.info(f"HTML-код проблемной страницы сохранен в '{filename}'")
         return None
     except Exception as e:
         logging.error(f"Непредвиденная ошибка при работе Selenium: {e}", exc_info=True)
         return None
-    finally:
-        if driver:
-            driver.quit()
 
 
 def find_latest_digest_url() -> str | None:
@@ -216,19 +241,18 @@ async def fetch_full_article_text(session, url: str) -> str:
 
     try:
         logging.info(f"Загружаю полный текст статьи: {url}")
-        async with session.get(url, headers=HEADERS, timeout=30) as response:
-            response.raise_for_status()
-            html = await response.text()
-            soup = BeautifulSoup(html, "lxml")
+        # Статья читается из дискового кэша страниц, если уже загружалась
+        html = await fetch_text(session, url, headers=HEADERS, timeout=30)
+        soup = BeautifulSoup(html, "lxml")
 
-            article_body = soup.find("div", class_="article__body")
-            if not article_body:
-                logging.warning(f"Не найден 'article__body' на странице статьи {url}")
-                return "Контейнер с текстом статьи не найден."
+        article_body = soup.find("div", class_="article__body")
+        if not article_body:
+            logging.warning(f"Не найден 'article__body' на странице статьи {url}")
+            return "Контейнер с текстом статьи не найден."
 
-            paragraphs = article_body.find_all("p")
-            full_text = " ".join([p.get_text(strip=True) for p in paragraphs])
-            return full_text
+        paragraphs = article_body.find_all("p")
+        full_text = " ".join([p.get_text(strip=True) for p in paragraphs])
+        return full_text
 
     except Exception as e:
         logging.error(f"Ошибка при загрузке статьи {url}: {e}")
@@ -238,6 +262,7 @@ async def fetch_full_article_text(session, url: str) -> str:
 # --- 3. ГЛАВНАЯ ФУНКЦИЯ-ОРКЕСТРАТОР ---
 
 
+@coalesce("agro_news")
 async def get_latest_agro_news() -> dict:
     """
     Основная функция, которая запускает и координирует весь процесс парсинга.
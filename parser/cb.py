@@ -4,12 +4,16 @@ import requests
 import logging
 import re
 from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
 from requests.exceptions import RequestException
 
 # --- Настройки ---
 CBR_KEY_RATE_URL = "https://www.cbr.ru/hd_base/keyrate/"
 TABLE_HEADERS = ["Дата", "Ставка"]
+# Ставка введена 17.09.2013 - с этой даты начинается полная история
+KEY_RATE_HISTORY_START = "17.09.2013"
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+}
 
 # --- Настройка логирования ---
 logging.basicConfig(
@@ -52,15 +56,33 @@ def parse_rate_from_table(table):
     return None, None
 
 
-def validate_data(date_str, rate_str):
-    date_pattern = re.compile(r"^\d{2}\.\d{2}\.\d{4}$")
-    rate_pattern = re.compile(r"^\d{1,2},\d{2}$")
-    if (
+def parse_rate_series(table):
+    """Все строки таблицы: [(дата, ставка), ...] в порядке страницы (от новых к старым)."""
+    series = []
+    for row in table.find_all("tr"):
+        columns = row.find_all("td")
+        if len(columns) >= 2:
+            series.append((columns[0].text.strip(), columns[1].text.strip()))
+    if not series:
+        logging.error("Не удалось найти строки с ячейками данных (<td>) в таблице.")
+    return series
+
+
+DATE_PATTERN = re.compile(r"^\d{2}\.\d{2}\.\d{4}$")
+RATE_PATTERN = re.compile(r"^\d{1,2},\d{2}$")
+
+
+def _is_valid_row(date_str, rate_str):
+    return bool(
         date_str
         and rate_str
-        and date_pattern.match(date_str)
-        and rate_pattern.match(rate_str)
-    ):
+        and DATE_PATTERN.match(date_str)
+        and RATE_PATTERN.match(rate_str)
+    )
+
+
+def validate_data(date_str, rate_str):
+    if _is_valid_row(date_str, rate_str):
         logging.info("Данные прошли валидацию. Формат корректный.")
         return True
     logging.warning(
@@ -69,47 +91,55 @@ def validate_data(date_str, rate_str):
     return False
 
 
-def get_cbr_key_rate():
+def fetch_key_rate_series(date_from=None, date_to=None):
     """
-    Основная функция для получения актуальной ключевой ставки.
-    Теперь возвращает (ставка, дата) или (None, None) в случае ошибки.
+    Загружает таблицу ключевой ставки за период (даты в формате ДД.ММ.ГГГГ).
+    Без периода сайт отдает последние дни. Возвращает [(дата, ставка), ...]
+    от новых к старым; строки с некорректным форматом отбрасываются.
+    Пустой список - ошибка загрузки или разбора.
     """
+    params = None
+    if date_from:
+        params = {"UniDbQuery.Posted": "True", "UniDbQuery.From": date_from}
+        if date_to:
+            params["UniDbQuery.To"] = date_to
     try:
-        ua = UserAgent()
-        headers = {"User-Agent": ua.random}
-        logging.info(
-            f"Отправка запроса на {CBR_KEY_RATE_URL} с User-Agent: {headers['User-Agent']}"
-        )
-        response = requests.get(CBR_KEY_RATE_URL, headers=headers, timeout=10)
+        logging.info(f"Отправка запроса на {CBR_KEY_RATE_URL} (период: {date_from or 'последние дни'} - {date_to or 'сегодня'})")
+        response = requests.get(CBR_KEY_RATE_URL, params=params, headers=REQUEST_HEADERS, timeout=10)
         response.raise_for_status()
 
-        logging.info("Страница успешно загружена. Начинаю парсинг HTML.")
-        soup = BeautifulSoup(response.content, "html.parser")
-
+        soup = BeautifulSoup(response.content, "lxml")
         key_rate_table = find_key_rate_table(soup)
         if not key_rate_table:
-            return None, None
-
-        date, rate = parse_rate_from_table(key_rate_table)
-        if not date or not rate:
-            return None, None
+            return []
 
-        if not validate_data(date, rate):
-            # Даже если валидация не пройдена, мы все равно вернем данные,
-            # но предупредим в логах.
+        rows = parse_rate_series(key_rate_table)
+        series = [(date_str, rate_str) for date_str, rate_str in rows if _is_valid_row(date_str, rate_str)]
+        if len(series) < len(rows):
             logging.warning(
-                "Формат данных может быть некорректным, но мы их возвращаем."
+                f"Отброшено {len(rows) - len(series)} строк с некорректным форматом. Возможно, формат данных на сайте изменился."
             )
-
-        # ГЛАВНОЕ ИЗМЕНЕНИЕ: Возвращаем результат для использования в других скриптах
-        return rate, date
+        logging.info(f"Получено {len(series)} значений ключевой ставки.")
+        return series
 
     except RequestException as e:
         logging.error(f"Ошибка сети или HTTP-запроса: {e}")
-        return None, None
+        return []
     except Exception as e:
         logging.error(f"Произошла непредвиденная ошибка: {e}", exc_info=True)
+        return []
+
+
+def get_cbr_key_rate():
+    """
+    Актуальная ключевая ставка прямо с сайта ЦБ: (ставка, дата) или (None, None).
+    Бот берет ставку из src/tools/key_rate_service.py, который хранит историю в памяти.
+    """
+    series = fetch_key_rate_series()
+    if not series:
         return None, None
+    date, rate = series[0]
+    return rate, date
 
 
 # Этот блок теперь используется только для прямой проверки скрипта.
@@ -1,64 +1,176 @@
+import asyncio
 import logging
-from selenium import webdriver
+import os
+import sys
+import time
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.chrome.options import Options
+
+# Корень проекта в sys.path, чтобы модуль можно было запускать напрямую
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.browser.driver_pool import get_headless_pool
+from src.browser.scheduler import get_browser_scheduler
+from src.config import settings
+from src.tools.http_session import close_http_session, get_http_session
 
 # --- Настройка ---
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
+EGRUL_URL = "https://egrul.nalog.ru/"
 # --- Конец настройки ---
 
 
-def check_inn_on_nalog_ru_selenium(inn: str) -> bool | None:
+class EgrulLookupError(Exception):
+    """Поиск через HTTP не дал однозначного ответа (капча, ошибка, тайм-аут)."""
+
+
+def _build_record(row: dict | None, inn: str, source: str) -> dict:
+    """Приводит строку ответа ФНС к единому виду для досье."""
+    if not row:
+        return {
+            "found": False, "status": "not_found", "inn": inn, "name": None,
+            "short_name": None, "ogrn": None, "registration_date": None,
+            "termination_date": None, "source": source,
+        }
+    return {
+        "found": True,
+        # Поле "e" заполнено, если деятельность прекращена
+        "status": "liquidated" if row.get("e") else "active",
+        "inn": row.get("i", inn),
+        "name": row.get("n"),
+        "short_name": row.get("c"),
+        "ogrn": row.get("o"),
+        "registration_date": row.get("r"),
+        "termination_date": row.get("e"),
+        "source": source,
+    }
+
+
+async def _fetch_egrul_record_http(inn: str) -> dict:
     """
-    Проверяет ИНН на сайте ФНС по принципу "Если не успех, значит неудача".
+    Тот же поток, что у формы на egrul.nalog.ru: запрос токена поиска,
+    затем опрос /search-result/{токен}, пока результат не будет готов.
+    """
+    session = get_http_session()
+    async with session.post(
+        EGRUL_URL,
+        data={"vyp3CaptchaToken": "", "page": "", "query": inn, "region": "", "PreventChromeAutocomplete": ""},
+        headers={"Referer": EGRUL_URL + "index.html", "X-Requested-With": "XMLHttpRequest"},
+    ) as response:
+        response.raise_for_status()
+        payload = await response.json(content_type=None)
+
+    if payload.get("captchaRequired"):
+        raise EgrulLookupError("ФНС запросила капчу.")
+    token = payload.get("t")
+    if not token:
+        raise EgrulLookupError(f"В ответе нет токена поиска: {str(payload)[:200]}")
+
+    deadline = time.monotonic() + settings.EGRUL_POLL_TIMEOUT
+    delay = 0.2
+    while True:
+        stamp = int(time.time() * 1000)
+        async with session.get(
+            f"{EGRUL_URL}search-result/{token}", params={"r": stamp, "_": stamp}
+        ) as response:
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+
+        if result.get("status") != "wait":
+            break
+        if time.monotonic() + delay > deadline:
+            raise EgrulLookupError("ФНС не вернула результат поиска вовремя.")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+    rows = result.get("rows")
+    if rows is None:
+        raise EgrulLookupError(f"Неожиданный ответ поиска: {str(result)[:200]}")
+    # Только строка с искомым ИНН: чужая запись хуже, чем "не найдено"
+    row = next((r for r in rows if r.get("i") == inn), None)
+    return _build_record(row, inn, source="http")
+
+
+async def get_egrul_record_async(inn: str) -> dict | None:
+    """
+    Ищет ИНН в ЕГРЮЛ/ЕГРИП. Возвращает словарь со статусом, наименованием и ОГРН,
+    или None, если проверку выполнить не удалось. Браузер запускается только
+    если HTTP-поиск не сработал; в этом случае известен лишь факт наличия.
     """
     if not inn.isdigit():
         logging.error("ИНН должен состоять только из цифр.")
         return None
 
-    # --- НАСТРОЙКА "БЕЗГОЛОВОГО" РЕЖИМА ---
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
+    try:
+        record = await _fetch_egrul_record_http(inn)
+        logging.info(f"ЕГРЮЛ (HTTP): ИНН {inn} -> {record['status']}.")
+        return record
+    except Exception as e:
+        logging.warning(f"ЕГРЮЛ: HTTP-поиск не сработал ({e}), переключаюсь на Selenium.")
+
+    async with get_browser_scheduler().slot("egrul.nalog.ru", owner=inn):
+        found = await asyncio.to_thread(_check_inn_selenium, inn)
+    if found is None:
+        return None
+    record = _build_record(None, inn, source="selenium")
+    if found:
+        record.update({"found": True, "status": "active"})
+    return record
+
+
+def check_inn_on_nalog_ru_selenium(inn: str) -> bool | None:
+    """
+    Проверяет ИНН на сайте ФНС. Сигнатура сохранена для синхронных вызовов,
+    внутри - HTTP-поиск с запасным вариантом через браузер.
+    """
+    async def _run() -> dict | None:
+        try:
+            return await get_egrul_record_async(inn)
+        finally:
+            await close_http_session()
+
+    record = asyncio.run(_run())
+    return record["found"] if record else None
 
-    driver = webdriver.Chrome(options=chrome_options)
-    logging.info("Запускаю Chrome в 'безголовом' (фоновом) режиме.")
 
+def _check_inn_selenium(inn: str) -> bool | None:
+    """
+    Проверяет ИНН на сайте ФНС по принципу "Если не успех, значит неудача".
+    """
     try:
-        driver.get("https://egrul.nalog.ru/index.html")
-        logging.info("Успешно открыл страницу в фоне.")
-
-        # --- ШАГ 1: Вводим ИНН ---
-        search_box = WebDriverWait(driver, 10).until(
-            EC.visibility_of_element_located((By.ID, "query"))
-        )
-        search_box.send_keys(inn)
-        logging.info(f"Ввел ИНН '{inn}' в поле поиска.")
-
-        # --- ШАГ 2: Нажимаем кнопку "Найти" ---
-        submit_button = driver.find_element(By.XPATH, "//button[@type='submit']")
-        submit_button.click()
-        logging.info("Нажал на кнопку 'Найти'.")
-
-        # --- ШАГ 3: Ждем ТОЛЬКО УСПЕХА ---
-        logging.info(
-            "Жду появления признака УСПЕХА (<a class='op-excerpt'>) в течение 10 секунд..."
-        )
-        wait = WebDriverWait(driver, 10)
-
-        # Пытаемся дождаться ТОЛЬКО элемента, который означает успех
-        wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "op-excerpt")))
-
-        # Если мы дошли до этой строки, значит, элемент успеха найден
-        logging.info("РЕЗУЛЬТАТ: Успех! Найден элемент с результатами.")
-        return True
+        # Берем "теплый" безголовый браузер из общего пула
+        with get_headless_pool().checkout() as driver:
+            driver.get("https://egrul.nalog.ru/index.html")
+            logging.info("Успешно открыл страницу в фоне.")
+
+            # --- ШАГ 1: Вводим ИНН ---
+            search_box = WebDriverWait(driver, 10).until(
+                EC.visibility_of_element_located((By.ID, "query"))
+            )
+            search_box.send_keys(inn)
+            logging.info(f"Ввел ИНН '{inn}' в поле поиска.")
+
+            # --- ШАГ 2: Нажимаем кнопку "Найти" ---
+            submit_button = driver.find_element(By.XPATH, "//button[@type='submit']")
+            submit_button.click()
+            logging.info("Нажал на кнопку 'Найти'.")
+
+            # --- ШАГ 3: Ждем ТОЛЬКО УСПЕХА ---
+            logging.info(
+                "Жду появления признака УСПЕХА (<a class='op-excerpt'>) в течение 10 секунд..."
+            )
+            wait = WebDriverWait(driver, 10)
+
+            # Пытаемся дождаться ТОЛЬКО элемента, который означает успех
+            wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "op-excerpt")))
+
+            # Если мы дошли до этой строки, значит, элемент успеха найден
+            logging.info("РЕЗУЛЬТАТ: Успех! Найден элемент с результатами.")
+            return True
 
     except TimeoutException:
         # Если за 10 секунд элемент успеха не появился, это и есть наш случай "не найдено"
@@ -67,12 +179,6 @@ def check_inn_on_nalog_ru_selenium(inn: str) -> bool | None:
     except Exception as e:
         logging.error(f"Произошла непредвиденная критическая ошибка: {e}")
         return None
-    finally:
-        # --- ФИНАЛЬНЫЙ ШАГ: Обязательно закрываем браузер ---
-        logging.info("Закрываю фоновый браузер.")
-        if driver:
-            driver.quit()
-
 
 if __name__ == "__main__":
     try:
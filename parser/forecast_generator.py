@@ -1,57 +1,53 @@
-import json
 import os
+import sys
+
+# Корень проекта в sys.path, чтобы модуль можно было запускать напрямую
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.data_index import get_index, load_json
 
 # --- ШАГ 1: ЗАГРУЗКА ДАННЫХ ИЗ ФАЙЛОВ ---
+# Справочники читаются через общий кэш src/data_index.py (тот же объект, что у program/mskh.py)
 
+OKVED_CATEGORIES = load_json("msh_okveds.json")
+PRICE_FORECAST_DATA = load_json("price_forecasts.json")
+
+
+# --- ШАГ 2: ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ ---
 
-def load_data_from_json(file_path: str) -> list | dict:
-    """Универсальная функция для загрузки JSON-файла."""
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"КРИТИЧЕСКАЯ ОШИБКА: Файл '{file_path}' не найден.")
-        return None
-    except json.JSONDecodeError:
-        print(
-            f"КРИТИЧЕСКАЯ ОШИБКА: Не удалось прочитать файл '{file_path}'. Проверьте его содержимое."
-        )
-        return None
 
+def _build_okved_index() -> dict:
+    # При совпадении кода в нескольких категориях побеждает первая, как при прежнем переборе
+    index = {}
+    for item in OKVED_CATEGORIES or []:
+        for code in item.get("codes", []):
+            index.setdefault(code, item["category"])
+    return index
 
-# --- ИЗМЕНЕНИЕ: Указываем правильные пути к файлам относительно скрипта ---
-# Скрипт находится в 'parser', данные - в 'data'. Путь '../data/' означает "подняться на уровень выше и зайти в папку data".
-base_dir = os.path.dirname(
-    os.path.abspath(__file__)
-)  # Папка, где лежит скрипт (parser)
-okved_file_path = os.path.join(base_dir, "..", "data", "msh_okveds.json")
-forecast_file_path = os.path.join(base_dir, "..", "data", "price_forecasts.json")
 
-OKVED_CATEGORIES = load_data_from_json(okved_file_path)
-PRICE_FORECAST_DATA = load_data_from_json(forecast_file_path)
+def _build_forecast_index() -> dict:
+    index = {}
+    for item in PRICE_FORECAST_DATA or []:
+        index.setdefault(item["подотрасль"], item)
+    return index
 
 
-# --- ШАГ 2: ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ (остаются без изменений) ---
+def build_indexes() -> dict:
+    """Строит индексы поиска заранее (вызывается при прогреве бота)."""
+    return {
+        "okved_categories": len(get_index("forecast_okved", _build_okved_index)),
+        "price_forecasts": len(get_index("forecast_category", _build_forecast_index)),
+    }
 
 
 def find_category_by_okved(okved_code: str) -> str | None:
     """Находит название категории по коду ОКВЭД."""
-    if not OKVED_CATEGORIES:
-        return None
-    for item in OKVED_CATEGORIES:
-        if okved_code in item.get("codes", []):
-            return item["category"]
-    return None
+    return get_index("forecast_okved", _build_okved_index).get(okved_code)
 
 
 def get_forecast_for_category(category_name: str) -> dict | None:
     """Находит прогнозы для указанной категории."""
-    if not PRICE_FORECAST_DATA:
-        return None
-    for item in PRICE_FORECAST_DATA:
-        if item["подотрасль"] == category_name:
-            return item
-    return None
+    return get_index("forecast_category", _build_forecast_index).get(category_name)
 
 
 def calculate_percentage_change(current_price: float, previous_price: float) -> str:
@@ -7,17 +7,21 @@ import logging
 import re
 from datetime import datetime
 import os
-import time
 from urllib.parse import urljoin
 import asyncio
+import sys
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Корень проекта в sys.path, чтобы модуль можно было запускать напрямую
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.browser.driver_pool import get_headless_pool
+from src.browser.readiness import DomStable
 
 # УДАЛИТЬ или закомментировать эти строки
 # from selenium.webdriver.chrome.service import Service as ChromeService
@@ -74,25 +78,16 @@ def get_company_page_url(inn: str) -> str | None:
 
 def get_full_page_html_with_selenium(url: str) -> str | None:
     logging.info("ПАРСЕР: Загрузка страницы с помощью Selenium...")
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("log-level=3")
-    options.add_experimental_option("excludeSwitches", ["enable-logging"])
-
-    driver = None
     try:
-        # Используем кэшированный драйвер, чтобы не скачивать каждый раз
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "main.flex-shrink-0"))
-        )
-        time.sleep(1)  # Небольшая пауза для полной прогрузки
-        logging.info("ПАРСЕР: Страница успешно загружена, HTML получен.")
-        return driver.page_source
+        # Берем "теплый" браузер из пула вместо запуска нового Chrome
+        with get_headless_pool().checkout() as driver:
+            driver.get(url)
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "main.flex-shrink-0"))
+            )
+            DomStable(quiet_ms=300, cap_ms=1500).wait_selenium(driver)  # Ждем, пока страница "успокоится"
+            logging.info("ПАРСЕР: Страница успешно загружена, HTML получен.")
+            return driver.page_source
     except TimeoutException:
         logging.error(
             "ПАРСЕР: Не удалось дождаться загрузки ключевых элементов на странице."
@@ -101,9 +96,6 @@ def get_full_page_html_with_selenium(url: str) -> str | None:
     except Exception as e:
         logging.error(f"ПАРСЕР: Непредвиденная ошибка при работе Selenium: {e}")
         return None
-    finally:
-        if driver:
-            driver.quit()
 
 
 # --- 3. ФУНКЦИИ-ПАРСЕРЫ ---
@@ -1,9 +1,10 @@
 import asyncio
+import hashlib
 import logging
 import sys
 import os
+import time
 from typing import Dict, List
-from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 from langchain_core.messages import SystemMessage, HumanMessage
 import re
@@ -16,6 +17,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # Предполагается, что ваш класс GigaChatNLU находится в src/nlu/
 # Если это не так, скорректируйте путь
 from src.nlu.gigachat_client import GigaChatNLU
+from src.browser.playwright_pool import get_playwright_pool, shutdown_playwright_pool
+from src.browser.readiness import ContentLengthConverged
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+from src.tools.http_session import get_http_session
 
 # Настройка логирования
 logging.basicConfig(
@@ -23,37 +29,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Документ КонсультантПлюс готов, когда его текст перестал дорисовываться
+DOCUMENT_READINESS = ContentLengthConverged("body", quiet_ms=400, cap_ms=2000)
+
 # URL-адреса для парсинга
 URLS = [
     "https://www.consultant.ru/document/cons_doc_LAW_52144/08b3ecbcdc9a360ad1dc314150a6328886703356/",  # URL с данными о численности
     "https://www.consultant.ru/document/cons_doc_LAW_196415/#dst100005",  # URL с данными о доходах
 ]
 
+# Извлеченные критерии хранятся вместе с хэшами исходных страниц:
+# браузер нужен, только если страница изменилась, GigaChat - только если изменился текст
+_criteria_store = JsonFileCache("fz_209")
+_CRITERIA_KEY = "criteria"
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _clean_text(html_content: str) -> str:
+    soup = BeautifulSoup(html_content, "lxml")
+    for element in soup(
+        ["script", "style", "header", "footer", "nav", "aside", "form", "button"]
+    ):
+        element.decompose()
+    return soup.body.get_text(separator="\n", strip=True) if soup.body else ""
+
+
+async def _get_page_fingerprint(url: str) -> str | None:
+    """Хэш текста страницы, полученной простым HTTP-запросом (без браузера)."""
+    try:
+        async with get_http_session().get(url) as response:
+            response.raise_for_status()
+            html_content = await response.text()
+    except Exception as e:
+        logger.warning(f"Не удалось проверить страницу {url} по HTTP: {e}")
+        return None
+    return _hash(_clean_text(html_content))
+
 
 async def _get_interactive_text_from_url(url: str) -> str:
     """Извлекает и очищает текстовое содержимое со страницы."""
     logger.info(f"Начало извлечения текста с: {url}")
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36"
-            )
-            page = await context.new_page()
+        async with get_playwright_pool().page(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36"
+        ) as page:
             await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-            await page.wait_for_timeout(
-                2000
-            )  # Даем время на прогрузку динамического контента
+            # Ждем, пока текст документа перестанет дорисовываться
+            await DOCUMENT_READINESS.wait_playwright(page)
             html_content = await page.content()
-            await context.close()
-
-        soup = BeautifulSoup(html_content, "lxml")
-        for element in soup(
-            ["script", "style", "header", "footer", "nav", "aside", "form", "button"]
-        ):
-            element.decompose()
 
-        text = soup.body.get_text(separator="\n", strip=True) if soup.body else ""
+        text = _clean_text(html_content)
         logger.info(f"Извлечен текст с {url}, длина: {len(text)} символов")
         return text
     except Exception as e:
@@ -61,23 +89,69 @@ async def _get_interactive_text_from_url(url: str) -> str:
         return ""
 
 
+async def _get_page_text(url: str, stored_page: dict | None) -> dict:
+    """Текст страницы: прежний, если страница не изменилась, иначе - заново из браузера."""
+    fingerprint = await _get_page_fingerprint(url)
+    if (
+        stored_page
+        and stored_page.get("text")
+        and fingerprint
+        and stored_page.get("page_hash") == fingerprint
+    ):
+        logger.info(f"Страница {url} не изменилась, браузер не нужен.")
+        return stored_page
+    return {"page_hash": fingerprint, "text": await _get_interactive_text_from_url(url)}
+
+
 async def extract_comparison_data(
-    gigachat_instance: GigaChatNLU, urls: List[str]
+    gigachat_instance: GigaChatNLU, urls: List[str], force_refresh: bool = False
 ) -> Dict[str, Dict[str, str]]:
-    """Извлекает текст с нескольких URL, объединяет его и анализирует с помощью GigaChat."""
-    full_text = ""
-    # Асинхронно получаем текст с каждого URL
-    tasks = [_get_interactive_text_from_url(url) for url in urls]
-    texts = await asyncio.gather(*tasks)
-
-    for text in texts:
-        if text:
-            full_text += text + "\n\n"
-
-    if not full_text:
-        logger.error("Не удалось получить текст ни с одной из страниц.")
-        return {}
+    """
+    Критерии МСП (staff_count / revenue) из нормативных документов.
+    Пока не прошел settings.FZ209_CHECK_INTERVAL, критерии отдаются из хранилища.
+    Затем страницы перепроверяются: браузер запускается только для изменившихся,
+    GigaChat вызывается, только если изменился итоговый текст.
+    """
+    stored = _criteria_store.load(_CRITERIA_KEY) or {}
+    fresh = time.time() - stored.get("checked_at", 0) < settings.FZ209_CHECK_INTERVAL
+    if stored.get("criteria") and stored.get("urls") == urls and fresh and not force_refresh:
+        return stored["criteria"]
+
+    stored_pages = stored.get("pages", {}) if stored.get("urls") == urls else {}
+    pages = await asyncio.gather(*(_get_page_text(url, stored_pages.get(url)) for url in urls))
+
+    missing = [url for url, page in zip(urls, pages) if not page["text"]]
+    if missing:
+        # По неполному тексту критерии не извлекаем: прежние лучше, чем половина документа.
+        # Пустой текст не сохраняем, иначе браузер больше не запустится до изменения страницы.
+        logger.error(f"Не удалось получить текст страниц: {missing}. Использую сохраненные критерии.")
+        if stored.get("urls") == urls:
+            good_pages = {url: page for url, page in zip(urls, pages) if page["text"]}
+            _criteria_store.save(_CRITERIA_KEY, {**stored, "pages": {**stored_pages, **good_pages}})
+        return stored.get("criteria", {})
+
+    full_text = "".join(page["text"] + "\n\n" for page in pages)
+
+    text_hash = _hash(full_text)
+    if stored.get("criteria") and stored.get("text_hash") == text_hash:
+        logger.info("Текст документов не изменился, повторный анализ GigaChat не нужен.")
+        criteria = stored["criteria"]
+    else:
+        criteria = await _extract_criteria(gigachat_instance, full_text)
+        if not criteria:
+            return stored.get("criteria", {})
+
+    _criteria_store.save(_CRITERIA_KEY, {
+        "criteria": criteria,
+        "urls": urls,
+        "pages": dict(zip(urls, pages)),
+        "text_hash": text_hash,
+        "checked_at": time.time(),
+    })
+    return criteria
+
 
+async def _extract_criteria(gigachat_instance: GigaChatNLU, full_text: str) -> Dict[str, Dict[str, str]]:
     logger.info("Передача объединенного текста в GigaChat для анализа.")
     system_prompt = (
         "Ты — внимательный ассистент по анализу нормативных документов. Твоя задача — извлечь из текста критерии для "
@@ -97,8 +171,7 @@ async def extract_comparison_data(
     try:
         client = gigachat_instance._get_client("extraction")
         logger.info("Вызов GigaChat для обработки текста.")
-        response = await asyncio.to_thread(
-            client.invoke,
+        response = await client.ainvoke(
             [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)],
         )
         response_content = response.content.strip()
@@ -127,6 +200,7 @@ async def main():
     gigachat = GigaChatNLU()
     # Передаем список URL в функцию
     comparison_data = await extract_comparison_data(gigachat, URLS)
+    await shutdown_playwright_pool()
 
     if comparison_data:
         print("\nДанные для сравнения (обработаны GigaChat):")
@@ -1,18 +1,50 @@
 # Файл: parsers/msp_check.py (ФИНАЛЬНАЯ ИСПРАВЛЕННАЯ ВЕРСИЯ)
 
+import asyncio
 import logging
-import time
 import os
-from selenium import webdriver
+import sys
+import threading
+import requests
+from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Корень проекта в sys.path, чтобы модуль можно было запускать напрямую
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.browser.driver_pool import get_headless_pool
+from src.browser.scheduler import get_browser_scheduler
+
 # --- Настройки ---
 RMSP_URL = "https://rmsp.nalog.ru/"
+RMSP_SEARCH_PATH = "search-proc.json"
+HTTP_TIMEOUT = 5  # сек. на запрос к реестру без браузера
 DEBUG_DIR = "debug_logs"
 
+# Коды категорий реестра (как в RSMP_CATEGORY на странице rmsp.nalog.ru)
+RSMP_CATEGORIES = {
+    "0": "не является субъектом мсп",
+    "1": "микропредприятие",
+    "2": "малое предприятие",
+    "3": "среднее предприятие",
+}
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "X-Requested-With": "XMLHttpRequest",
+    "Referer": RMSP_URL,
+}
+
+# Одна сессия на модуль: соединение с rmsp.nalog.ru переиспользуется
+_session = requests.Session()
+_session.headers.update(HEADERS)
+
+_stats_lock = threading.Lock()
+_stats = {"http_found": 0, "http_not_found": 0, "selenium_fallbacks": 0}
+
 # --- Настройка логирования ---
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -32,70 +64,181 @@ def save_debug_html(page_source, inn):
         logging.error(f"Не удалось сохранить отладочный файл: {e}")
 
 
-def get_msp_category(inn_to_check: str) -> str | None:
+class MspLookupError(Exception):
+    """Ответ реестра не удалось однозначно разобрать без браузера."""
+
+
+def _count(metric: str) -> None:
+    with _stats_lock:
+        _stats[metric] += 1
+
+
+def get_msp_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def parse_msp_search_json(payload: dict, inn: str) -> str | None:
     """
-    Проверяет ИНН в реестре МСП и ВОЗВРАЩАЕТ категорию субъекта или None.
+    Разбирает JSON-ответ search-proc.json.
+    Возвращает категорию, None (ИНН не найден) или бросает MspLookupError.
+    """
+    if not isinstance(payload, dict) or "data" not in payload:
+        raise MspLookupError(f"Неожиданный JSON-ответ реестра: {str(payload)[:200]}")
+    rows = payload.get("data") or []
+    if not rows:
+        return None
+    row = next((r for r in rows if str(r.get("inn", "")) == inn), None)
+    if row is None:
+        # Строки другого ИНН не подставляем - это была бы чужая категория
+        return None
+    category = row.get("category")
+    if category is None:
+        raise MspLookupError("В ответе реестра нет поля category.")
+    return RSMP_CATEGORIES.get(str(category), str(category).strip().lower())
+
+
+def parse_msp_result_html(html: str, inn: str) -> str | None:
+    """
+    Разбирает HTML страницы результатов (в т.ч. сохраненные debug_msp_*.html).
+    Возвращает категорию, None (ИНН не найден) или бросает MspLookupError.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    rows = soup.select("tbody#tblResultData tr")
+    if rows:
+        row_inns = [row.select_one(".result-inn span") for row in rows]
+        if not any(row_inns):
+            raise MspLookupError("В строках результата нет ИНН.")
+        row = next((r for r, i in zip(rows, row_inns) if i and i.get_text(strip=True) == inn), None)
+        if row is None:
+            # Строки другого ИНН не подставляем - это была бы чужая категория
+            return None
+        columns = row.find_all("td", recursive=False)
+        if len(columns) < 2:
+            raise MspLookupError("В строке результата нет колонки с категорией.")
+        return columns[1].get_text(strip=True).lower()
+
+    no_result = soup.find(id="pnlNoResult")
+    if no_result is not None and "display: none" not in no_result.get("style", ""):
+        return None
+    raise MspLookupError("На странице нет ни результата, ни сообщения 'не найдено'.")
+
+
+def get_msp_category_http(
+    inn_to_check: str, base_url: str = RMSP_URL, timeout: float = HTTP_TIMEOUT
+) -> str | None:
     """
+    Быстрый путь без браузера: тот же запрос, что отправляет форма поиска
+    на rmsp.nalog.ru. Бросает MspLookupError или requests.RequestException,
+    если ответ не удалось получить или разобрать.
+    """
+    response = _session.post(
+        base_url.rstrip("/") + "/" + RMSP_SEARCH_PATH,
+        data={"mode": "quick", "query": inn_to_check, "page": 1, "pageSize": 10},
+        timeout=timeout,
+    )
+    response.raise_for_status()
+
+    if "json" in response.headers.get("Content-Type", ""):
+        return parse_msp_search_json(response.json(), inn_to_check)
+    return parse_msp_result_html(response.text, inn_to_check)
+
+
+def _valid_inn(inn_to_check: str) -> bool:
     if not inn_to_check or not inn_to_check.isdigit():
         logging.error("ОШИБКА ВВОДА: ИНН должен состоять только из цифр.")
+        return False
+    return True
+
+
+def _lookup_http(inn_to_check: str) -> tuple[bool, str | None]:
+    """(True, категория или None), если реестр ответил по HTTP; (False, None) - нужен браузер."""
+    try:
+        category = get_msp_category_http(inn_to_check)
+        _count("http_found" if category else "http_not_found")
+        logging.info(f"Реестр МСП (HTTP): ИНН {inn_to_check} -> {category or 'не найден'}.")
+        return True, category
+    except (MspLookupError, requests.RequestException, ValueError) as e:
+        _count("selenium_fallbacks")
+        logging.warning(
+            f"Реестр МСП: HTTP-запрос не сработал ({e}), переключаюсь на Selenium."
+        )
+        return False, None
+
+
+def get_msp_category(inn_to_check: str) -> str | None:
+    """
+    Проверяет ИНН в реестре МСП и ВОЗВРАЩАЕТ категорию субъекта или None.
+    Сначала пробует HTTP-запрос, браузер запускается только если он не сработал.
+    """
+    if not _valid_inn(inn_to_check):
+        return None
+    answered, category = _lookup_http(inn_to_check)
+    if answered:
+        return category
+    return _get_msp_category_selenium(inn_to_check)
+
+
+async def get_msp_category_async(inn_to_check: str) -> str | None:
+    """
+    То же для бота. HTTP-запрос не занимает браузерный слот: слот планировщика
+    (rmsp.nalog.ru) берется только на время отката на Selenium.
+    """
+    if not _valid_inn(inn_to_check):
         return None
+    answered, category = await asyncio.to_thread(_lookup_http, inn_to_check)
+    if answered:
+        return category
+    async with get_browser_scheduler().slot("rmsp.nalog.ru", owner=inn_to_check):
+        return await asyncio.to_thread(_get_msp_category_selenium, inn_to_check)
 
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--log-level=3")
 
-    driver = None
+def _get_msp_category_selenium(inn_to_check: str) -> str | None:
+    """Запасной путь: поиск через форму на сайте в браузере."""
     try:
-        driver = webdriver.Chrome(options=options)
-        logging.info(f"Проверяю ИНН {inn_to_check} в реестре МСП...")
-        driver.get(RMSP_URL)
-
-        query_input = driver.find_element(By.ID, "query")
-        query_input.send_keys(inn_to_check)
-        find_button = driver.find_element(By.XPATH, "//button[text()='Найти']")
-        find_button.click()
-
-        try:
-            element = WebDriverWait(driver, 10).until(
-                EC.any_of(
-                    EC.presence_of_element_located(
-                        (By.XPATH, "//tbody[@id='tblResultData']/tr")
-                    ),
-                    EC.visibility_of_element_located((By.ID, "pnlNoResult")),
+        with get_headless_pool().checkout() as driver:
+            logging.info(f"Проверяю ИНН {inn_to_check} в реестре МСП...")
+            driver.get(RMSP_URL)
+
+            query_input = driver.find_element(By.ID, "query")
+            query_input.send_keys(inn_to_check)
+            find_button = driver.find_element(By.XPATH, "//button[text()='Найти']")
+            find_button.click()
+
+            try:
+                element = WebDriverWait(driver, 10).until(
+                    EC.any_of(
+                        EC.presence_of_element_located(
+                            (By.XPATH, "//tbody[@id='tblResultData']/tr")
+                        ),
+                        EC.visibility_of_element_located((By.ID, "pnlNoResult")),
+                    )
                 )
-            )
-            save_debug_html(driver.page_source, inn_to_check)
+                page_source = driver.page_source
+                save_debug_html(page_source, inn_to_check)
 
-            if element.tag_name == "tr":
-                logging.info(f"ИНН {inn_to_check} найден в реестре МСП.")
-                tbody = element.find_element(By.XPATH, "./parent::tbody")
-                columns = tbody.find_elements(By.TAG_NAME, "td")
-
-                # Извлекаем категорию и приводим к нижнему регистру для унификации
+                # Тот же разбор, что и для HTTP: категория берется из строки с нашим ИНН
                 category_text = (
-                    columns[1].text.strip().lower()
-                )  # "Микропредприятие" -> "микропредприятие"
-
-                # Возвращаем результат
+                    parse_msp_result_html(page_source, inn_to_check)
+                    if element.tag_name == "tr"
+                    else None
+                )
+                if category_text:
+                    logging.info(f"ИНН {inn_to_check} найден в реестре МСП.")
+                else:
+                    logging.warning(f"ИНН {inn_to_check} не найден в реестре МСП.")
                 return category_text
-            else:
-                logging.warning(f"ИНН {inn_to_check} не найден в реестре МСП.")
-                return None
 
-        except TimeoutException:
-            logging.error("Время ожидания ответа от rmsp.nalog.ru вышло.")
-            save_debug_html(driver.page_source, inn_to_check)
-            return None
+            except TimeoutException:
+                logging.error("Время ожидания ответа от rmsp.nalog.ru вышло.")
+                save_debug_html(driver.page_source, inn_to_check)
+                return None
 
     except Exception as e:
         logging.error(
             f"Критическая ошибка при работе с реестром МСП: {e}", exc_info=True
         )
         return None
-    finally:
-        if driver:
-            driver.quit()
 
 
 # Блок для самостоятельной проверки скрипта
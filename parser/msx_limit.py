@@ -4,13 +4,18 @@ import sys
 import requests
 import traceback
 import json
-from selenium import webdriver
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pdfplumber
 
+# Корень проекта в sys.path, чтобы модуль можно было запускать напрямую
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.browser.driver_pool import get_headless_pool
+
 # Подавляем только предупреждения о небезопасном SSL-соединении
 try:
     from urllib3.exceptions import InsecureRequestWarning
@@ -20,48 +25,71 @@ except ImportError:
     pass
 
 
-def get_subsidy_limits() -> dict | None:
-    """
-    Загружает с сайта Минсельхоза РФ PDF, извлекает данные
-    и возвращает их в виде структурированного словаря.
-    """
-    BASE_URL = "https://mcx.gov.ru/activity/state-support/measures/preferential-credit/info-plan-lgotnogo-kreditovaniya-tekushchiy-ostatok-subsidii-perechen-odobrennykh-zayavok-maksimalnyy-raz/"
-    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
-
-    pdf_url = None
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    # ... (остальные опции без изменений) ...
-    driver = webdriver.Chrome(options=chrome_options)
+BASE_URL = "https://mcx.gov.ru/activity/state-support/measures/preferential-credit/info-plan-lgotnogo-kreditovaniya-tekushchiy-ostatok-subsidii-perechen-odobrennykh-zayavok-maksimalnyy-raz/"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
+LINK_TEXT = "Остаток субсидий по состоянию на"
+
+
+def find_pdf_url_http() -> str | None:
+    """Ищет ссылку на PDF в HTML страницы без браузера (None - не нашли)."""
+    try:
+        response = requests.get(BASE_URL, timeout=20, headers={"User-Agent": USER_AGENT}, verify=False)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Не удалось загрузить страницу МСХ по HTTP: {e}", file=sys.stderr)
+        return None
+    soup = BeautifulSoup(response.text, "lxml")
+    for link in soup.find_all("a", href=True):
+        if LINK_TEXT in link.get_text():
+            return urljoin(BASE_URL, link["href"])
+    return None
+
+
+def find_pdf_url_selenium() -> str | None:
+    """Ищет ссылку на PDF в браузере (если ссылка появляется только после JS)."""
     try:
-        # Этап 1: Получение ссылки (без изменений)
-        driver.get(BASE_URL)
-        link_xpath = "//a[contains(text(), 'Остаток субсидий по состоянию на')]"
-        pdf_link_element = WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.XPATH, link_xpath)))
-        pdf_url = pdf_link_element.get_attribute("href")
+        # Браузер берем из общего пула
+        with get_headless_pool().checkout() as driver:
+            driver.get(BASE_URL)
+            link_xpath = f"//a[contains(text(), '{LINK_TEXT}')]"
+            pdf_link_element = WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.XPATH, link_xpath)))
+            return pdf_link_element.get_attribute("href")
     except Exception as e:
         print(f"Критическая ошибка на этапе работы браузера: {e}", file=sys.stderr)
         return None
-    finally:
-        if driver: driver.quit()
 
-    if not pdf_url: return None
 
-    # Этап 2: Скачивание PDF (без изменений)
+def download_pdf(pdf_url: str, etag: str | None = None, last_modified: str | None = None) -> dict | None:
+    """
+    Скачивает PDF. С etag/last_modified запрос условный: если файл не менялся,
+    сервер отвечает 304 и тело не передается ("content" будет None).
+    Возвращает {"content", "etag", "last_modified"} или None при ошибке.
+    """
+    headers = {"User-Agent": USER_AGENT, "Referer": BASE_URL}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
     try:
-        headers = {"User-Agent": USER_AGENT, "Referer": BASE_URL}
         response = requests.get(pdf_url, timeout=60, headers=headers, verify=False)
+        if response.status_code == 304:
+            return {"content": None, "etag": etag, "last_modified": last_modified}
         response.raise_for_status()
-        pdf_file_in_memory = io.BytesIO(response.content)
     except requests.exceptions.RequestException as e:
         print(f"Критическая ошибка скачивания: {e}", file=sys.stderr)
         return None
+    return {
+        "content": response.content,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
 
-    # Этап 3: Извлечение данных (без изменений в логике, только в выводе)
+def parse_limits_pdf(content: bytes) -> dict | None:
+    """Извлекает из PDF лимиты: {регион: {направление: остаток}}."""
     try:
         limits_data = {}
-        with pdfplumber.open(pdf_file_in_memory) as pdf:
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
             master_headers = []
             for page in pdf.pages:
                 table = page.extract_table()
@@ -87,14 +115,27 @@ def get_subsidy_limits() -> dict | None:
                                 limit_value = float(row[i].replace(" ", "").replace(",", "."))
                                 limits_data[region_name][activity_name] = limit_value
                             except (ValueError, TypeError): pass
-        
-        # <<< ГЛАВНОЕ ИЗМЕНЕНИЕ: ВОЗВРАЩАЕМ СЛОВАРЬ >>>
         return limits_data
 
     except Exception as e:
         print(f"Критическая ошибка при обработке PDF: {e}", file=sys.stderr)
         return None
 
+
+def get_subsidy_limits() -> dict | None:
+    """
+    Загружает с сайта Минсельхоза РФ PDF, извлекает данные
+    и возвращает их в виде структурированного словаря.
+    Бот получает лимиты через src/tools/msh_limits_tool.py (кэш с проверкой изменений).
+    """
+    pdf_url = find_pdf_url_http() or find_pdf_url_selenium()
+    if not pdf_url: return None
+
+    downloaded = download_pdf(pdf_url)
+    if not downloaded: return None
+
+    return parse_limits_pdf(downloaded["content"])
+
 # <<< БЛОК ДЛЯ ТЕСТИРОВАНИЯ ТЕПЕРЬ ИСПОЛЬЗУЕТ JSON >>>
 if __name__ == "__main__":
     print("Запускаю парсер лимитов МСХ...")
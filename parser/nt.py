@@ -21,73 +21,125 @@ try:
 except ImportError:
     pass
 
-def get_sez_inns() -> set | None:
+BASE_URL = "https://xn--g1at0b.xn--p1aee.xn--p1ai/sez_credit/?"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+HEADERS = {"User-Agent": USER_AGENT}
+INN_COLUMN = 7
+INN_PATTERN = re.compile(r"^\d{10}$|^\d{12}$")
+log_prefix = "[Парсер СЭЗ]"
+
+
+def find_sez_pdf_url() -> str | None:
+    """Этап 1: ссылка на PDF с единым реестром участников СЭЗ."""
+    logger.info(f"{log_prefix} Этап 1: Загрузка HTML страницы для поиска ссылки...")
+    start_time = time.time()
+    try:
+        response_main = requests.get(BASE_URL, headers=HEADERS, timeout=30, verify=False)
+        response_main.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"{log_prefix} Произошла ошибка сети: {e}")
+        return None
+    logger.info(f"{log_prefix} HTML страница загружена за {time.time() - start_time:.2f} сек.")
+
+    soup = BeautifulSoup(response_main.text, 'html.parser')
+    pdf_link_element = soup.find('a', string=re.compile(r'Публикация единого реестра'))
+    if not pdf_link_element:
+        logger.error(f"{log_prefix} Ошибка: Не удалось найти ссылку на PDF на странице.")
+        return None
+
+    pdf_url = urljoin(BASE_URL, pdf_link_element.get("href"))
+    logger.info(f"{log_prefix} Найдена ссылка на PDF: {pdf_url}")
+    return pdf_url
+
+
+def download_sez_pdf(pdf_url: str, etag: str | None = None, last_modified: str | None = None) -> dict | None:
     """
-    Скачивает PDF с реестром СЭЗ без Selenium и возвращает множество (set) ИНН.
+    Этап 2: скачивание PDF. С etag/last_modified запрос условный: при ответе 304
+    тело не передается ("content" будет None).
+    Возвращает {"content", "etag", "last_modified"} или None при ошибке.
     """
-    log_prefix = "[Парсер СЭЗ]"
-    total_start_time = time.time()
-    
-    BASE_URL = "https://xn--g1at0b.xn--p1aee.xn--p1ai/sez_credit/?"
-    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
-    headers = {"User-Agent": USER_AGENT}
-    
+    logger.info(f"{log_prefix} Этап 2: Скачивание PDF-файла...")
+    start_time = time.time()
+    download_headers = HEADERS.copy()
+    download_headers['Referer'] = BASE_URL
+    if etag:
+        download_headers['If-None-Match'] = etag
+    if last_modified:
+        download_headers['If-Modified-Since'] = last_modified
     try:
-        # --- Этап 1: Получение ссылки на PDF ---
-        logger.info(f"{log_prefix} Этап 1: Загрузка HTML страницы для поиска ссылки...")
-        start_time = time.time()
-        session = requests.Session()
-        session.headers.update(headers)
-        response_main = session.get(BASE_URL, timeout=30, verify=False)
-        response_main.raise_for_status()
-        logger.info(f"{log_prefix} HTML страница загружена за {time.time() - start_time:.2f} сек.")
-
-        soup = BeautifulSoup(response_main.text, 'html.parser')
-        pdf_link_element = soup.find('a', string=re.compile(r'Публикация единого реестра'))
-        if not pdf_link_element:
-            logger.error(f"{log_prefix} Ошибка: Не удалось найти ссылку на PDF на странице.")
-            return None
-
-        pdf_url = urljoin(BASE_URL, pdf_link_element.get("href"))
-        logger.info(f"{log_prefix} Найдена ссылка на PDF: {pdf_url}")
-        
-        # --- Этап 2: Скачивание файла ---
-        logger.info(f"{log_prefix} Этап 2: Скачивание PDF-файла...")
-        start_time = time.time()
-        download_headers = headers.copy()
-        download_headers['Referer'] = BASE_URL
-        response_pdf = session.get(pdf_url, headers=download_headers, timeout=180, verify=False)
+        response_pdf = requests.get(pdf_url, headers=download_headers, timeout=180, verify=False)
+        if response_pdf.status_code == 304:
+            logger.info(f"{log_prefix} PDF не изменился с прошлой загрузки (304).")
+            return {"content": None, "etag": etag, "last_modified": last_modified}
         response_pdf.raise_for_status()
-        pdf_file_in_memory = io.BytesIO(response_pdf.content)
-        logger.info(f"{log_prefix} PDF-файл ({len(response_pdf.content) // 1024} КБ) скачан за {time.time() - start_time:.2f} сек.")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"{log_prefix} Произошла ошибка сети: {e}")
+        return None
+    logger.info(f"{log_prefix} PDF-файл ({len(response_pdf.content) // 1024} КБ) скачан за {time.time() - start_time:.2f} сек.")
+    return {
+        "content": response_pdf.content,
+        "etag": response_pdf.headers.get("ETag"),
+        "last_modified": response_pdf.headers.get("Last-Modified"),
+    }
 
-        # --- Этап 3: Извлечение ИНН ---
-        logger.info(f"{log_prefix} Этап 3: Извлечение ИНН из PDF...")
-        start_time = time.time()
-        all_inns = set()
-        inn_pattern = re.compile(r"^\d{10}$|^\d{12}$")
 
-        with pdfplumber.open(pdf_file_in_memory) as pdf:
+def _clean_cell(value) -> str:
+    return " ".join(str(value).split()) if value else ""
+
+
+def parse_sez_registry(content: bytes) -> dict | None:
+    """
+    Этап 3: разбор PDF. Возвращает {ИНН: {заголовок столбца: значение}} -
+    строку реестра для каждого участника СЭЗ.
+    """
+    logger.info(f"{log_prefix} Этап 3: Извлечение ИНН из PDF...")
+    start_time = time.time()
+    registry = {}
+    column_names = []
+    try:
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
             for page in pdf.pages:
                 tables = page.extract_tables()
                 for table in tables:
                     for row in table:
-                        if len(row) > 7 and row[7]: 
-                            cleaned_inn = "".join(filter(str.isdigit, str(row[7])))
-                            if inn_pattern.match(cleaned_inn):
-                                all_inns.add(cleaned_inn)
-        
-        logger.info(f"{log_prefix} PDF проанализирован за {time.time() - start_time:.2f} сек. Найдено {len(all_inns)} уникальных ИНН.")
-        
-        logger.info(f"{log_prefix} Общее время работы парсера: {time.time() - total_start_time:.2f} сек.")
-        return all_inns
+                        if len(row) <= INN_COLUMN:
+                            continue
+                        cleaned_inn = "".join(filter(str.isdigit, str(row[INN_COLUMN] or "")))
+                        if not INN_PATTERN.match(cleaned_inn):
+                            # Строка заголовка таблицы: запоминаем названия столбцов
+                            if "ИНН" in _clean_cell(row[INN_COLUMN]):
+                                column_names = [_clean_cell(cell) for cell in row]
+                            continue
+                        registry[cleaned_inn] = {
+                            (column_names[i] if i < len(column_names) and column_names[i] else f"col_{i}"): _clean_cell(cell)
+                            for i, cell in enumerate(row)
+                            if i != INN_COLUMN and cell
+                        }
+    except Exception as e:
+        logger.error(f"{log_prefix} Произошла непредвиденная ошибка при разборе PDF: {e}", exc_info=True)
+        return None
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"{log_prefix} Произошла ошибка сети: {e}")
+    logger.info(f"{log_prefix} PDF проанализирован за {time.time() - start_time:.2f} сек. Найдено {len(registry)} уникальных ИНН.")
+    return registry
+
+
+def get_sez_inns() -> set | None:
+    """
+    Скачивает PDF с реестром СЭЗ без Selenium и возвращает множество (set) ИНН.
+    Бот пользуется индексом src/tools/sez_registry.py, который хранится на диске.
+    """
+    total_start_time = time.time()
+    pdf_url = find_sez_pdf_url()
+    if not pdf_url:
         return None
-    except Exception as e:
-        logger.error(f"{log_prefix} Произошла непредвиденная ошибка: {e}", exc_info=True)
+    downloaded = download_sez_pdf(pdf_url)
+    if not downloaded:
+        return None
+    registry = parse_sez_registry(downloaded["content"])
+    if registry is None:
         return None
+    logger.info(f"{log_prefix} Общее время работы парсера: {time.time() - total_start_time:.2f} сек.")
+    return set(registry)
 
 # Блок для прямого запуска и теста
 if __name__ == "__main__":
@@ -3,6 +3,7 @@ import asyncio
 import json
 import time
 import os
+import sys
 from urllib.parse import urljoin
 
 # --- ИМПОРТЫ ДЛЯ SELENIUM ---
@@ -11,10 +12,16 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 
+# Корень проекта в sys.path, чтобы модуль можно было запускать напрямую
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.browser.driver_pool import get_pool
+from src.browser.readiness import ContentLengthConverged, Readiness
+from src.tools.page_cache import cached_render
+from src.tools.single_flight import coalesce
+
 # --- 1. НАСТРОЙКИ ---
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -33,14 +40,8 @@ NEWS_LIMIT = 3
 # --- 2. УНИВЕРСАЛЬНАЯ ФУНКЦИЯ ЗАГРУЗКИ ---
 
 
-def get_html_with_selenium(url: str, wait_for_selector: str) -> str | None:
-    """
-    УНИВЕРСАЛЬНАЯ ФУНКЦИЯ: Загружает страницу и "умно" ждет появления
-    конкретного элемента, указанного в wait_for_selector.
-    """
-    logging.info(f"Загрузка страницы {url} с помощью Selenium...")
-    logging.info(f"Будем ждать появления элемента: '{wait_for_selector}'")
-
+def _build_chrome_options() -> webdriver.ChromeOptions:
+    """Настройки Chrome для новостных сайтов (маскируемся под обычный браузер)."""
     options = webdriver.ChromeOptions()
     options.add_argument(f"user-agent={HEADERS['User-Agent']}")
     options.add_experimental_option(
@@ -51,43 +52,69 @@ def get_html_with_selenium(url: str, wait_for_selector: str) -> str | None:
     # Режим без UI (headless) - можно включить после отладки
     options.add_argument("--headless=new")
 
+    # Не ждем загрузки картинок и прочего: готовность страницы проверяем сами
+    options.page_load_strategy = "eager"
     options.add_argument("--window-size=1920,1080")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
+    return options
+
+
+def _hide_webdriver_flag(driver) -> None:
+    driver.execute_script(
+        "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    )
+
+
+def _get_driver_pool():
+    return get_pool(
+        "ria",
+        _build_chrome_options,
+        on_create=_hide_webdriver_flag,
+        site=RIA_SEARCH_URL,
+    )
+
+
+def get_html_with_selenium(
+    url: str, wait_for_selector: str, readiness: Readiness | None = None
+) -> str | None:
+    """
+    УНИВЕРСАЛЬНАЯ ФУНКЦИЯ: Загружает страницу и "умно" ждет появления
+    конкретного элемента, указанного в wait_for_selector.
+    После появления элемента ждем, пока его содержимое перестанет меняться
+    (или условие readiness, если оно передано).
+    """
+    logging.info(f"Загрузка страницы {url} с помощью Selenium...")
+    logging.info(f"Будем ждать появления элемента: '{wait_for_selector}'")
 
-    driver = None
     try:
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.execute_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-        )
+        with _get_driver_pool().checkout() as driver:
+            driver.get(url)
 
-        driver.get(url)
+            try:
+                WebDriverWait(driver, 30).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_selector))
+                )
+            except TimeoutException:
+                filename = f"debug_timeout_ria_{url.split('/')[-1]}.html"
+                with open(filename, "w", encoding="utf-8") as f:
+                    f.write(driver.page_source)
+                logging.info(f"HTML-код проблемной страницы сохранен в '{filename}'")
+                raise
 
-        WebDriverWait(driver, 30).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_selector))
-        )
-        time.sleep(2)  # Страховочная пауза
+            # Вместо страховочной паузы ждем, пока содержимое перестанет меняться
+            (readiness or ContentLengthConverged(wait_for_selector, cap_ms=2000)).wait_selenium(driver)
 
-        logging.info("Ключевой элемент найден. Получаем HTML-код.")
-        return driver.page_source
+            logging.info("Ключевой элемент найден. Получаем HTML-код.")
+            return driver.page_source
 
     except TimeoutException:
         logging.error(f"Тайм-аут: не удалось дождаться элемента '{wait_for_selector}'.")
-        if driver:
-            filename = f"debug_timeout_ria_{url.split('/')[-1]}.html"
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-            logging.info(f"HTML-код проблемной страницы сохранен в '{filename}'")
         return None
     except Exception as e:
         logging.error(f"Непредвиденная ошибка при работе Selenium: {e}", exc_info=True)
         return None
-    finally:
-        if driver:
-            driver.quit()
 
 
 # --- 3. ФУНКЦИИ-ПАРСЕРЫ ДЛЯ РИА НОВОСТИ ---
@@ -151,7 +178,8 @@ def fetch_ria_article_text(url: str) -> str:
 
     # Ждем появления главного контейнера статьи
     wait_selector = "div.layout-article__main"
-    html_content = get_html_with_selenium(url, wait_selector)
+    # Браузер нужен, только если статьи еще нет в дисковом кэше страниц
+    html_content = cached_render(url, lambda: get_html_with_selenium(url, wait_selector))
 
     if not html_content:
         return "Не удалось загрузить страницу статьи."
@@ -203,6 +231,7 @@ def fetch_ria_article_text(url: str) -> str:
 # --- 4. ГЛАВНАЯ ФУНКЦИЯ-ОРКЕСТРАТОР ---
 
 
+@coalesce("ria_news")
 async def get_ria_news_async() -> dict:
     """
     Основная асинхронная функция, которая запускает и координирует весь процесс.
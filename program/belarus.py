@@ -42,7 +42,11 @@ async def check_belarus_program(company_dossier: dict) -> dict:
                 "calculated_conditions": None
             })
             return result
-        check_log.append("✅ РЕЗУЛЬТАТ: Компания найдена в ЕГРЮЛ.")
+        egrul_record = company_dossier.get("egrul_record") or {}
+        if egrul_record.get("ogrn"):
+            check_log.append(f"✅ РЕЗУЛЬТАТ: Компания найдена в ЕГРЮЛ (ОГРН {egrul_record['ogrn']}).")
+        else:
+            check_log.append("✅ РЕЗУЛЬТАТ: Компания найдена в ЕГРЮЛ.")
 
         # --- Этап 2: Проверка ОКВЭД ---
         check_log.append("Шаг 2: Анализ видов деятельности (ОКВЭД).")
@@ -2,8 +2,8 @@
 import re
 import logging
 import asyncio
-import json
-from pathlib import Path
+
+from src.data_index import load_json
 
 # ==============================================================================
 # <<< ШАГ 1: ЗАГРУЗКА И ПОДГОТОВКА ДАННЫХ ИЗ ДВУХ JSON-ФАЙЛОВ >>>
@@ -11,15 +11,8 @@ from pathlib import Path
 
 
 def load_data_from_json(filename: str):
-    """Универсальная функция для загрузки данных из JSON."""
-    try:
-        current_dir = Path(__file__).parent.parent
-        json_path = current_dir / "data" / filename
-        with open(json_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logging.error(f"Критическая ошибка при загрузке файла {filename}: {e}")
-        return None
+    """Универсальная функция для загрузки данных из JSON (через общий кэш data/)."""
+    return load_json(filename)
 
 
 # Загружаем правила ОКВЭД
@@ -1,24 +1,7 @@
 # programs/novye_territorii.py (ИСПРАВЛЕННАЯ ВЕРСИЯ С BASE_CONDITIONS)
 import logging
-import asyncio
 from parser import cb
-from parser.nt import get_sez_inns
-
-# Кэш для хранения списка ИНН
-_cached_sez_inns = None
-
-async def _get_sez_inns_cached() -> set:
-    """Вспомогательная функция для получения и кэширования списка ИНН."""
-    global _cached_sez_inns
-    if _cached_sez_inns is None:
-        logging.info("[Кэш СЭЗ] Кэш пуст, запускаю парсер nt.get_sez_inns...")
-        _cached_sez_inns = await asyncio.to_thread(get_sez_inns)
-        if _cached_sez_inns is None:
-            _cached_sez_inns = set()
-            logging.error("[Кэш СЭЗ] Парсер nt.get_sez_inns вернул ошибку. Кэш остался пустым.")
-        else:
-            logging.info(f"[Кэш СЭЗ] Кэш успешно заполнен. Найдено {len(_cached_sez_inns)} ИНН.")
-    return _cached_sez_inns
+from src.tools.sez_registry import get_sez_registry
 
 # --- ИЗМЕНЕНИЕ 1: Добавляем блок с базовыми условиями ---
 BASE_CONDITIONS_TEXT = """
@@ -44,9 +27,18 @@ async def check_novye_territorii_program(company_dossier: dict) -> dict:
         # Шаг 1: Проверка в реестре СЭЗ
         check_log.append("Шаг 1: Проверка нахождения компании в Едином реестре участников СЭЗ.")
         
-        sez_inns_set = await _get_sez_inns_cached()
-        is_in_registry = inn in sez_inns_set
+        # Индекс реестра читается из памяти; обновляется он в фоне (src/tools/sez_registry.py)
+        is_in_registry = get_sez_registry().contains(inn)
 
+        if is_in_registry is None:
+            check_log.append("⚠️ РЕЗУЛЬТАТ: Реестр СЭЗ еще не загружен, проверка невозможна.")
+            result.update({
+                "passed": False,
+                "reason": "Реестр участников СЭЗ еще загружается. Повторите проверку через несколько минут.",
+                "check_log": check_log,
+                "calculated_conditions": None
+            })
+            return result
         if not is_in_registry:
             check_log.append("❌ РЕЗУЛЬТАТ: Компания не найдена в реестре СЭЗ.")
             result.update({
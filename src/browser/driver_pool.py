@@ -0,0 +1,289 @@
+# src/browser/driver_pool.py
+"""
+Пул "теплых" экземпляров Chrome для всех Selenium-парсеров.
+
+Вместо запуска нового браузера на каждый вызов парсер берет готовый драйвер
+через checkout() и возвращает его обратно. Драйвер пересоздается, если
+он перестал отвечать или отработал свой лимит страниц.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from selenium import webdriver
+
+from src.browser import resource_filter, supervisor
+from src.browser.driver_resolver import get_chrome_service
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledDriver:
+    """Драйвер из пула вместе со счетчиком отработанных страниц."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """
+    Потокобезопасный пул драйверов Chrome с одним набором настроек (профилем).
+    Парсеры работают в отдельных потоках (asyncio.to_thread), поэтому
+    синхронизация построена на threading.Condition.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        options_factory: Callable[[], webdriver.ChromeOptions],
+        max_size: int,
+        max_pages_per_driver: int,
+        service_factory: Optional[Callable] = None,
+        on_create: Optional[Callable] = None,
+        site: Optional[str] = None,
+    ):
+        self.name = name
+        self.site = site  # Для списка разрешенных ресурсов фильтра
+        self._options_factory = options_factory
+        # По умолчанию путь к chromedriver берется из общего кэша
+        self._service_factory = service_factory or get_chrome_service
+        self._on_create = on_create
+        self._max_size = max(1, max_size)
+        self._max_pages = max(1, max_pages_per_driver)
+
+        self._cond = threading.Condition()
+        self._idle: list[_PooledDriver] = []
+        self._total = 0  # Живые драйверы: свободные + выданные + создаваемые
+        self._closed = False
+        self._stats = {"created": 0, "recycled": 0, "unhealthy": 0, "checkouts": 0}
+
+    # --- Жизненный цикл драйвера ---
+
+    def _create(self) -> _PooledDriver:
+        start_time = time.time()
+        options = self._options_factory()
+        resource_filter.prepare_chrome_options(options)
+        driver = webdriver.Chrome(service=self._service_factory(), options=options)
+        resource_filter.install_selenium_filter(driver, self.site)
+        if self._on_create:
+            self._on_create(driver)
+        with self._cond:
+            self._stats["created"] += 1
+        logger.info(
+            f"[Пул '{self.name}'] Запущен новый Chrome за {time.time() - start_time:.2f} сек."
+        )
+        return _PooledDriver(driver)
+
+    @staticmethod
+    def _is_healthy(item: _PooledDriver) -> bool:
+        try:
+            item.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _destroy(self, item: _PooledDriver) -> None:
+        # Счетчики фильтра за последние страницы, иначе они пропадут вместе с драйвером
+        resource_filter.collect_selenium_stats(item.driver)
+        try:
+            item.driver.quit()
+        except Exception as e:
+            logger.warning(f"[Пул '{self.name}'] Ошибка при закрытии драйвера: {e}")
+
+    def _reset(self, item: _PooledDriver) -> None:
+        """Очищает состояние драйвера перед возвратом в пул."""
+        driver = item.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        resource_filter.collect_selenium_stats(driver)
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    # --- Выдача и возврат ---
+
+    def acquire(self, timeout: Optional[float] = None) -> _PooledDriver:
+        if timeout is None:
+            timeout = settings.SELENIUM_CHECKOUT_TIMEOUT
+        deadline = time.monotonic() + timeout
+        item = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"Пул драйверов '{self.name}' уже закрыт.")
+                if self._idle:
+                    item = self._idle.pop()
+                    break
+                if self._total < self._max_size:
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Нет свободного драйвера в пуле '{self.name}' за {timeout} сек."
+                    )
+                self._cond.wait(remaining)
+            self._stats["checkouts"] += 1
+
+        if item is not None:
+            if self._is_healthy(item):
+                return item
+            logger.warning(f"[Пул '{self.name}'] Драйвер не отвечает, пересоздаю.")
+            with self._cond:
+                self._stats["unhealthy"] += 1
+            self._destroy(item)
+
+        try:
+            return self._create()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, item: _PooledDriver) -> None:
+        item.pages_served += 1
+        retire = (
+            self._closed
+            or item.pages_served >= self._max_pages
+            or supervisor.driver_over_memory(item.driver)
+        )
+        if not retire:
+            try:
+                self._reset(item)
+            except Exception as e:
+                logger.warning(f"[Пул '{self.name}'] Не удалось очистить драйвер: {e}")
+                retire = True
+
+        if retire:
+            self._destroy(item)
+            with self._cond:
+                self._total -= 1
+                self._stats["recycled"] += 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(item)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """
+        Выдает драйвер во временное пользование:
+            with pool.checkout() as driver:
+                driver.get(url)
+        """
+        item = self.acquire(timeout)
+        try:
+            yield item.driver
+        finally:
+            self.release(item)
+
+    def warm_up(self, count: int = 1) -> None:
+        """Заранее запускает до `count` драйверов, чтобы первый запрос не ждал."""
+        items = []
+        try:
+            for _ in range(min(count, self._max_size)):
+                items.append(self.acquire())
+        finally:
+            with self._cond:
+                for item in items:
+                    self._idle.append(item)
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        """Закрывает свободные драйверы; выданные закроются при возврате."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for item in idle:
+            self._destroy(item)
+        logger.info(f"[Пул '{self.name}'] Закрыт, остановлено драйверов: {len(idle)}.")
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return {
+                **self._stats,
+                "alive": self._total,
+                "idle": len(self._idle),
+                "max_size": self._max_size,
+            }
+
+
+# --- Реестр пулов (по одному на профиль настроек) ---
+
+_pools: Dict[str, DriverPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(
+    name: str,
+    options_factory: Callable[[], webdriver.ChromeOptions],
+    service_factory: Optional[Callable] = None,
+    on_create: Optional[Callable] = None,
+    site: Optional[str] = None,
+) -> DriverPool:
+    """Возвращает пул с указанным именем, создавая его при первом обращении."""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None or pool._closed:
+            pool = DriverPool(
+                name,
+                options_factory,
+                max_size=settings.SELENIUM_POOL_MAX_DRIVERS,
+                max_pages_per_driver=settings.SELENIUM_MAX_PAGES_PER_DRIVER,
+                service_factory=service_factory,
+                on_create=on_create,
+                site=site,
+            )
+            _pools[name] = pool
+        return pool
+
+
+def headless_chrome_options() -> webdriver.ChromeOptions:
+    """Общий профиль 'безголового' Chrome для парсеров реестров и checko."""
+    options = webdriver.ChromeOptions()
+    # Парсеры сами ждут нужные элементы, поэтому не ждем полной загрузки страницы
+    options.page_load_strategy = "eager"
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--log-level=3")
+    options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    return options
+
+
+def get_headless_pool() -> DriverPool:
+    return get_pool("headless", headless_chrome_options)
+
+
+def get_all_stats() -> dict:
+    with _pools_lock:
+        return {name: pool.get_stats() for name, pool in _pools.items()}
+
+
+def shutdown_all_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+atexit.register(shutdown_all_pools)
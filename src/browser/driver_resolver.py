@@ -0,0 +1,109 @@
+# src/browser/driver_resolver.py
+"""
+Однократный поиск ChromeDriver на весь процесс.
+
+ChromeDriverManager().install() проверяет версии, файловую систему и иногда
+ходит в сеть. Раньше это происходило при каждом запуске браузера; теперь
+путь к драйверу определяется один раз (при старте бота или при первом
+обращении) и переиспользуется всеми Selenium-модулями.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+from src.browser.supervisor import launch_env
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_resolved = False
+_driver_path: Optional[str] = None
+_stats = {"resolve_seconds": 0.0, "cached_lookups": 0}
+_benchmark: dict = {}
+
+
+def resolve_chromedriver_path() -> Optional[str]:
+    """
+    Возвращает путь к chromedriver (None - пусть Selenium Manager найдет сам).
+    Порядок: переменная окружения CHROMEDRIVER_PATH, затем webdriver_manager.
+    """
+    global _resolved, _driver_path
+    with _lock:
+        if _resolved:
+            _stats["cached_lookups"] += 1
+            return _driver_path
+
+        start_time = time.time()
+        path = os.getenv("CHROMEDRIVER_PATH")
+        if not path:
+            try:
+                from webdriver_manager.chrome import ChromeDriverManager
+
+                path = ChromeDriverManager().install()
+            except Exception as e:
+                logger.warning(
+                    f"[ChromeDriver] webdriver_manager не смог найти драйвер ({e}), "
+                    "используем поиск Selenium по умолчанию."
+                )
+                path = None
+
+        _driver_path = path
+        _resolved = True
+        _stats["resolve_seconds"] = time.time() - start_time
+        logger.info(
+            f"[ChromeDriver] Драйвер определен за {_stats['resolve_seconds']:.2f} сек: "
+            f"{path or 'Selenium Manager'}. Дальше путь берется из кэша."
+        )
+        return _driver_path
+
+
+def get_chrome_service() -> ChromeService:
+    """
+    Service для нового драйвера. Объект Service управляет своим процессом
+    chromedriver, поэтому создается на каждый драйвер, а путь берется из кэша.
+    """
+    path = resolve_chromedriver_path()
+    # Метка в окружении: надзор (supervisor.py) завершает только наши осиротевшие драйверы
+    return ChromeService(executable_path=path, env=launch_env())
+
+
+def benchmark_resolution() -> Optional[dict]:
+    """
+    Замер при старте бота: сколько стоит ChromeDriverManager().install()
+    (так драйвер искался раньше, при каждом запуске браузера) и сколько -
+    get_chrome_service() с путем из кэша. None, если webdriver_manager недоступен.
+    """
+    resolve_chromedriver_path()
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        start_time = time.perf_counter()
+        ChromeDriverManager().install()
+        install_seconds = time.perf_counter() - start_time
+    except Exception as e:
+        logger.warning(f"[ChromeDriver] Замер install() не выполнен: {e}")
+        return None
+
+    start_time = time.perf_counter()
+    get_chrome_service()
+    cached_seconds = time.perf_counter() - start_time
+
+    result = {"install_seconds": round(install_seconds, 4), "cached_seconds": round(cached_seconds, 6)}
+    with _lock:
+        _benchmark.update(result)
+    logger.info(
+        f"[ChromeDriver] Замер: ChromeDriverManager().install() - {install_seconds:.3f} сек., "
+        f"get_chrome_service() из кэша - {cached_seconds * 1000:.3f} мс на запуск браузера."
+    )
+    return result
+
+
+def get_resolver_stats() -> dict:
+    """Сколько раз путь взят из кэша и результаты стартового замера (если он был)."""
+    with _lock:
+        return {**_stats, "driver_path": _driver_path, "benchmark": dict(_benchmark) or None}
@@ -0,0 +1,356 @@
+# src/browser/playwright_pool.py
+"""
+Один долгоживущий браузер Playwright на весь процесс.
+
+Вместо запуска Chromium на каждый URL парсеры берут страницу через
+`async with get_playwright_pool().page(...) as page:`. Контексты браузера
+переиспользуются (пул по набору настроек), а число одновременно открытых
+страниц ограничено семафором.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from playwright.async_api import async_playwright
+
+from src.browser.resource_filter import install_playwright_filter
+from src.browser.supervisor import launch_env, playwright_browser_pids
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledContext:
+    """Контекст браузера вместе со счетчиком отработанных страниц."""
+
+    def __init__(self, context, key: str, browser):
+        self.context = context
+        self.key = key
+        self.browser = browser
+        self.pages_served = 0
+
+
+class PlaywrightPool:
+    def __init__(
+        self,
+        max_concurrent_pages: int,
+        max_idle_contexts: int,
+        max_pages_per_context: int,
+    ):
+        self._max_concurrent_pages = max(1, max_concurrent_pages)
+        self._max_idle_contexts = max(0, max_idle_contexts)
+        self._max_pages_per_context = max(1, max_pages_per_context)
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._loop = None
+        self._playwright = None
+        self._browser = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._pages_semaphore: Optional[asyncio.Semaphore] = None
+        self._idle_contexts: List[_PooledContext] = []
+        self._persistent_contexts: Dict[str, Any] = {}
+        # PID главного процесса и число страниц каждого постоянного контекста (для надзора)
+        self._persistent_pids: Dict[str, Optional[int]] = {}
+        self._persistent_pages_served: Dict[str, int] = {}
+        self._persistent_active: Dict[str, int] = {}
+        self._persistent_recycle_due: Set[str] = set()
+        # Контексты в работе по каждому браузеру и браузеры, ожидающие закрытия
+        self._active_contexts: Dict[int, int] = {}
+        self._retiring_browsers: List[Any] = []
+        self.browser_pages_served = 0
+        self.browser_pid: Optional[int] = None
+        self._stats = {
+            "browser_launches": 0,
+            "browser_recycles": 0,
+            "persistent_recycles": 0,
+            "contexts_created": 0,
+            "pages_served": 0,
+        }
+
+    def _bind_to_running_loop(self) -> None:
+        """
+        Объекты Playwright привязаны к event loop. Если код запускается в новом
+        цикле (например, повторный asyncio.run в скриптах), начинаем с нуля.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                logger.warning("Playwright-пул используется в новом event loop, сбрасываю состояние.")
+            self._reset_state()
+            self._loop = loop
+            self._start_lock = asyncio.Lock()
+            self._pages_semaphore = asyncio.Semaphore(self._max_concurrent_pages)
+
+    async def _ensure_browser(self):
+        self._bind_to_running_loop()
+        async with self._start_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            if self._browser is None or not self._browser.is_connected():
+                start_time = time.time()
+                self._idle_contexts = []
+                pids_before = playwright_browser_pids()
+                self._browser = await self._playwright.chromium.launch(
+                    headless=True, args=settings.PLAYWRIGHT_LAUNCH_ARGS, env=launch_env()
+                )
+                self.browser_pid = self._new_browser_pid(pids_before)
+                self.browser_pages_served = 0
+                self._stats["browser_launches"] += 1
+                logger.info(
+                    f"[Playwright-пул] Браузер запущен за {time.time() - start_time:.2f} сек."
+                )
+        return self._browser
+
+    @staticmethod
+    def _new_browser_pid(pids_before: Set[int]) -> Optional[int]:
+        """
+        PID только что запущенного Chrome: запуски идут под _start_lock, поэтому
+        новый главный процесс ровно один. None - без psutil или если не удалось определить.
+        """
+        new_pids = playwright_browser_pids() - pids_before
+        return new_pids.pop() if len(new_pids) == 1 else None
+
+    async def start(self) -> None:
+        """Заранее запускает браузер (используется при старте бота)."""
+        await self._ensure_browser()
+
+    # --- Контексты ---
+
+    async def _acquire_context(self, context_options: Dict[str, Any]) -> _PooledContext:
+        key = json.dumps(context_options, sort_keys=True, default=str)
+        for i in range(len(self._idle_contexts) - 1, -1, -1):
+            if self._idle_contexts[i].key == key:
+                return self._idle_contexts.pop(i)
+
+        browser = await self._ensure_browser()
+        context = await browser.new_context(**context_options)
+        await install_playwright_filter(context)
+        self._stats["contexts_created"] += 1
+        return _PooledContext(context, key, browser)
+
+    async def _release_context(self, item: _PooledContext) -> None:
+        item.pages_served += 1
+        keep = (
+            item.pages_served < self._max_pages_per_context
+            and item.browser is self._browser
+            and self._browser.is_connected()
+        )
+        if keep:
+            try:
+                await item.context.clear_cookies()
+            except Exception:
+                keep = False
+
+        if keep:
+            self._idle_contexts.append(item)
+            # Лишние простаивающие контексты закрываем, начиная с самых старых
+            while len(self._idle_contexts) > self._max_idle_contexts:
+                await self._close_quietly(self._idle_contexts.pop(0).context)
+        else:
+            await self._close_quietly(item.context)
+
+    async def _close_retired_browsers(self) -> None:
+        """Закрывает замененные браузеры, на которых не осталось открытых страниц."""
+        for browser in list(self._retiring_browsers):
+            if self._active_contexts.get(id(browser), 0) == 0:
+                self._retiring_browsers.remove(browser)
+                self._active_contexts.pop(id(browser), None)
+                await self._close_quietly(browser)
+                logger.info("[Playwright-пул] Старый браузер закрыт после замены.")
+
+    async def request_recycle(self) -> bool:
+        """
+        Переключает пул на новый браузер (запустится при следующем запросе).
+        Текущие страницы дорабатывают на старом, он закроется после них.
+        """
+        if self._browser is None:
+            return False
+        self._retiring_browsers.append(self._browser)
+        self._browser = None
+        self.browser_pid = None
+        self._stats["browser_recycles"] += 1
+        idle, self._idle_contexts = self._idle_contexts, []
+        for item in idle:
+            await self._close_quietly(item.context)
+        await self._close_retired_browsers()
+        return True
+
+    @staticmethod
+    async def _close_quietly(obj) -> None:
+        try:
+            await obj.close()
+        except Exception as e:
+            logger.debug(f"[Playwright-пул] Ошибка при закрытии: {e}")
+
+    # --- Выдача страниц ---
+
+    @asynccontextmanager
+    async def page(self, **context_options):
+        """
+        Выдает новую страницу в переиспользуемом контексте:
+            async with pool.page(user_agent=UA) as page:
+                await page.goto(url)
+        """
+        await self._ensure_browser()
+        async with self._pages_semaphore:
+            item = await self._acquire_context(context_options)
+            browser_id = id(item.browser)
+            self._active_contexts[browser_id] = self._active_contexts.get(browser_id, 0) + 1
+            try:
+                page = await item.context.new_page()
+                self._stats["pages_served"] += 1
+                self.browser_pages_served += 1
+                try:
+                    yield page
+                finally:
+                    await self._close_quietly(page)
+            finally:
+                self._active_contexts[browser_id] -= 1
+                await self._release_context(item)
+                if self._retiring_browsers:
+                    await self._close_retired_browsers()
+
+    @asynccontextmanager
+    async def persistent_page(self, user_data_dir: str, **launch_options):
+        """
+        Страница в постоянном контексте с профилем на диске (куки Яндекса и т.п.).
+        Контекст запускается один раз на каталог профиля и живет до close().
+        """
+        self._bind_to_running_loop()
+        async with self._pages_semaphore:
+            async with self._start_lock:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                context = self._persistent_contexts.get(user_data_dir)
+                if context is None:
+                    start_time = time.time()
+                    pids_before = playwright_browser_pids()
+                    context = await self._playwright.chromium.launch_persistent_context(
+                        user_data_dir, env=launch_env(), **launch_options
+                    )
+                    await install_playwright_filter(context)
+                    # Если браузер упадет или закроется, следующий вызов запустит новый
+                    context.on(
+                        "close",
+                        lambda _, closed=context: self._forget_persistent(user_data_dir, closed),
+                    )
+                    self._persistent_contexts[user_data_dir] = context
+                    self._persistent_pids[user_data_dir] = self._new_browser_pid(pids_before)
+                    self._persistent_pages_served[user_data_dir] = 0
+                    self._stats["browser_launches"] += 1
+                    logger.info(
+                        f"[Playwright-пул] Постоянный контекст запущен за {time.time() - start_time:.2f} сек."
+                    )
+            self._persistent_active[user_data_dir] = self._persistent_active.get(user_data_dir, 0) + 1
+            try:
+                page = await context.new_page()
+                self._stats["pages_served"] += 1
+                self._persistent_pages_served[user_data_dir] = (
+                    self._persistent_pages_served.get(user_data_dir, 0) + 1
+                )
+                try:
+                    yield page
+                finally:
+                    await self._close_quietly(page)
+            finally:
+                self._persistent_active[user_data_dir] -= 1
+                if user_data_dir in self._persistent_recycle_due:
+                    await self._close_persistent_if_idle(user_data_dir)
+
+    def _forget_persistent(self, user_data_dir: str, context) -> None:
+        # Закрылся именно этот контекст (а не уже запущенный ему на смену)
+        if self._persistent_contexts.get(user_data_dir) is context:
+            self._persistent_contexts.pop(user_data_dir, None)
+            self._persistent_pids.pop(user_data_dir, None)
+            self._persistent_pages_served.pop(user_data_dir, None)
+
+    async def _close_persistent_if_idle(self, user_data_dir: str) -> bool:
+        # Профиль на диске занят, пока контекст открыт: закрываем под _start_lock,
+        # чтобы новый контекст на том же профиле запустился только после закрытия
+        async with self._start_lock:
+            if self._persistent_active.get(user_data_dir, 0) > 0:
+                return False
+            self._persistent_recycle_due.discard(user_data_dir)
+            context = self._persistent_contexts.get(user_data_dir)
+            if context is None:
+                return False
+            self._forget_persistent(user_data_dir, context)
+            await self._close_quietly(context)
+        logger.info(f"[Playwright-пул] Постоянный контекст {user_data_dir} закрыт для перезапуска.")
+        return True
+
+    async def recycle_persistent(self, user_data_dir: str) -> bool:
+        """
+        Закрывает постоянный контекст, чтобы следующий запрос запустил его заново.
+        Если на нем сейчас открыта страница, он закроется сразу после нее.
+        """
+        if user_data_dir not in self._persistent_contexts or user_data_dir in self._persistent_recycle_due:
+            return False
+        self._stats["persistent_recycles"] += 1
+        self._persistent_recycle_due.add(user_data_dir)
+        await self._close_persistent_if_idle(user_data_dir)
+        return True
+
+    def persistent_usage(self) -> Dict[str, Tuple[Optional[int], int]]:
+        """Каталог профиля -> (PID главного процесса, отработано страниц)."""
+        return {
+            user_data_dir: (
+                self._persistent_pids.get(user_data_dir),
+                self._persistent_pages_served.get(user_data_dir, 0),
+            )
+            for user_data_dir in self._persistent_contexts
+        }
+
+    async def close(self) -> None:
+        """Закрывает все контексты, браузер и сам Playwright."""
+        if self._loop is None:
+            return
+        for item in self._idle_contexts:
+            await self._close_quietly(item.context)
+        for browser in self._retiring_browsers:
+            await self._close_quietly(browser)
+        for context in list(self._persistent_contexts.values()):
+            await self._close_quietly(context)
+        if self._browser is not None:
+            await self._close_quietly(self._browser)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"[Playwright-пул] Ошибка при остановке Playwright: {e}")
+        logger.info("[Playwright-пул] Браузер и контексты закрыты.")
+        self._reset_state()
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            "idle_contexts": len(self._idle_contexts),
+            "persistent_contexts": len(self._persistent_contexts),
+            "retiring_browsers": len(self._retiring_browsers),
+            "browser_pages_served": self.browser_pages_served,
+            "max_concurrent_pages": self._max_concurrent_pages,
+        }
+
+
+_pool: Optional[PlaywrightPool] = None
+
+
+def get_playwright_pool() -> PlaywrightPool:
+    global _pool
+    if _pool is None:
+        _pool = PlaywrightPool(
+            max_concurrent_pages=settings.PLAYWRIGHT_MAX_CONCURRENT_PAGES,
+            max_idle_contexts=settings.PLAYWRIGHT_MAX_IDLE_CONTEXTS,
+            max_pages_per_context=settings.PLAYWRIGHT_MAX_PAGES_PER_CONTEXT,
+        )
+    return _pool
+
+
+async def shutdown_playwright_pool() -> None:
+    if _pool is not None:
+        await _pool.close()
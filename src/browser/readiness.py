@@ -0,0 +1,198 @@
+# src/browser/readiness.py
+"""
+Стратегии ожидания "готовности" страницы вместо фиксированных пауз.
+
+Каждый парсер объявляет свое условие готовности, а ожидание длится ровно
+столько, сколько нужно странице, но не дольше cap_ms. По истечении cap_ms
+ожидание просто завершается: страница отдается как есть, как и раньше
+после time.sleep().
+
+Пример:
+    READINESS = ContentLengthConverged("div.news-list", cap_ms=2000)
+    READINESS.wait_selenium(driver)            # Selenium
+    await READINESS.wait_playwright(page)      # Playwright
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Ставит MutationObserver (один раз на документ) и возвращает,
+# сколько миллисекунд прошло с последнего изменения DOM.
+_MS_SINCE_LAST_MUTATION_JS = """
+if (!window.__lastDomMutation) {
+    window.__lastDomMutation = Date.now();
+    new MutationObserver(() => { window.__lastDomMutation = Date.now(); })
+        .observe(document, {childList: true, subtree: true, characterData: true});
+}
+return Date.now() - window.__lastDomMutation;
+"""
+
+_RESOURCE_COUNT_JS = """
+return [document.readyState, performance.getEntriesByType('resource').length];
+"""
+
+_CONTENT_LENGTH_JS = """
+const el = document.querySelector(arguments[0]);
+return el ? (el.innerText || '').length : -1;
+"""
+
+
+def _as_playwright_js(script: str) -> str:
+    """Selenium-скрипт (тело функции с return) -> выражение для page.evaluate."""
+    return f"(args) => (function() {{ {script} }}).apply(null, args)"
+
+
+def _unchanged_for(state: dict, value, quiet_ms: int) -> bool:
+    """True, если значение не менялось последние quiet_ms миллисекунд."""
+    now = time.monotonic()
+    if "value" not in state or state["value"] != value:
+        state["value"] = value
+        state["since"] = now
+        return False
+    return (now - state["since"]) * 1000 >= quiet_ms
+
+
+class Readiness:
+    """
+    Базовая стратегия: опрашивает страницу, пока _probe не вернет True.
+    Экземпляры не хранят состояние ожидания, поэтому одну стратегию
+    можно объявить на уровне модуля и использовать из разных потоков.
+    """
+
+    def __init__(self, cap_ms: int = 3000, poll_ms: int = 100):
+        self.cap_ms = cap_ms
+        self.poll_ms = poll_ms
+
+    def _probe(self, value, state: dict) -> bool:
+        raise NotImplementedError
+
+    def _script(self) -> str:
+        raise NotImplementedError
+
+    def _args(self) -> list:
+        return []
+
+    def _log_result(self, started: float, ready: bool) -> float:
+        elapsed = time.monotonic() - started
+        if ready:
+            logger.debug(f"[Готовность] {self!r}: страница готова за {elapsed:.2f} сек.")
+        else:
+            logger.debug(f"[Готовность] {self!r}: достигнут лимит {self.cap_ms} мс.")
+        return elapsed
+
+    def wait_selenium(self, driver) -> float:
+        """Ждет готовности в Selenium. Возвращает фактическое время ожидания (сек)."""
+        state = {}
+        started = time.monotonic()
+        deadline = started + self.cap_ms / 1000
+        script = self._script()
+        while True:
+            try:
+                if self._probe(driver.execute_script(script, *self._args()), state):
+                    return self._log_result(started, True)
+            except Exception as e:
+                logger.debug(f"[Готовность] Ошибка опроса страницы: {e}")
+            if time.monotonic() >= deadline:
+                return self._log_result(started, False)
+            time.sleep(self.poll_ms / 1000)
+
+    async def wait_playwright(self, page) -> float:
+        """Ждет готовности в Playwright. Возвращает фактическое время ожидания (сек)."""
+        state = {}
+        started = time.monotonic()
+        deadline = started + self.cap_ms / 1000
+        script = _as_playwright_js(self._script())
+        while True:
+            try:
+                if self._probe(await page.evaluate(script, self._args()), state):
+                    return self._log_result(started, True)
+            except Exception as e:
+                logger.debug(f"[Готовность] Ошибка опроса страницы: {e}")
+            if time.monotonic() >= deadline:
+                return self._log_result(started, False)
+            await asyncio.sleep(self.poll_ms / 1000)
+
+
+class DomStable(Readiness):
+    """DOM не меняется в течение quiet_ms (нет мутаций)."""
+
+    def __init__(self, quiet_ms: int = 400, cap_ms: int = 3000, poll_ms: int = 100):
+        super().__init__(cap_ms, poll_ms)
+        self.quiet_ms = quiet_ms
+
+    def _script(self) -> str:
+        return _MS_SINCE_LAST_MUTATION_JS
+
+    def _probe(self, value, state: dict) -> bool:
+        return value is not None and value >= self.quiet_ms
+
+    def __repr__(self) -> str:
+        return f"DomStable(quiet_ms={self.quiet_ms})"
+
+
+class NetworkIdle(Readiness):
+    """
+    Документ загружен и новые ресурсы не появлялись idle_ms.
+    В Playwright используется встроенное состояние 'networkidle' с лимитом cap_ms.
+    """
+
+    def __init__(self, idle_ms: int = 500, cap_ms: int = 3000, poll_ms: int = 100):
+        super().__init__(cap_ms, poll_ms)
+        self.idle_ms = idle_ms
+
+    def _script(self) -> str:
+        return _RESOURCE_COUNT_JS
+
+    def _probe(self, value, state: dict) -> bool:
+        ready_state, count = value
+        if not _unchanged_for(state, count, self.idle_ms):
+            return False
+        return ready_state == "complete"
+
+    async def wait_playwright(self, page) -> float:
+        started = time.monotonic()
+        try:
+            await page.wait_for_load_state("networkidle", timeout=self.cap_ms)
+            return self._log_result(started, True)
+        except Exception:
+            return self._log_result(started, False)
+
+    def __repr__(self) -> str:
+        return f"NetworkIdle(idle_ms={self.idle_ms})"
+
+
+class ContentLengthConverged(Readiness):
+    """
+    Длина текста элемента (selector) перестала расти в течение quiet_ms.
+    Подходит для списков новостей и документов, которые дорисовываются скриптами.
+    """
+
+    def __init__(
+        self,
+        selector: str = "body",
+        quiet_ms: int = 300,
+        min_length: int = 1,
+        cap_ms: int = 3000,
+        poll_ms: int = 100,
+    ):
+        super().__init__(cap_ms, poll_ms)
+        self.selector = selector
+        self.quiet_ms = quiet_ms
+        self.min_length = min_length
+
+    def _script(self) -> str:
+        return _CONTENT_LENGTH_JS
+
+    def _args(self) -> list:
+        return [self.selector]
+
+    def _probe(self, value, state: dict) -> bool:
+        if not _unchanged_for(state, value, self.quiet_ms):
+            return False
+        return value >= self.min_length
+
+    def __repr__(self) -> str:
+        return f"ContentLengthConverged({self.selector!r}, quiet_ms={self.quiet_ms})"
@@ -0,0 +1,224 @@
+# src/browser/resource_filter.py
+"""
+Общая политика блокировки "тяжелых" ресурсов при загрузке страниц.
+
+Парсерам нужен только текст DOM, поэтому картинки, шрифты, видео и
+счетчики аналитики не загружаются. Для отдельных сайтов можно разрешить
+нужные категории (settings.RESOURCE_FILTER_SITE_ALLOW).
+
+- Playwright: обработчик context.route() на весь контекст.
+- Selenium: CDP-команда Network.setBlockedURLs при создании драйвера,
+  статистика собирается из performance-лога Chrome.
+"""
+
+import json
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Set
+from urllib.parse import urlparse
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Расширения файлов для CDP Network.setBlockedURLs
+_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "avif", "bmp"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "media": ["mp4", "webm", "mp3", "ogg", "m3u8"],
+}
+
+
+def _extension_patterns(extension: str) -> list:
+    # "*" в шаблоне CDP - любая подстрока, поэтому расширение привязано к концу
+    # пути: "*.png*" заблокировал бы и страницу "/view?file=a.png"
+    return [f"*.{extension}", f"*.{extension}?*"]
+
+# Средний размер заблокированного ресурса (байт) - для оценки экономии трафика
+_AVG_SIZE_BYTES = {
+    "image": 40_000,
+    "font": 35_000,
+    "media": 500_000,
+    "tracker": 30_000,
+}
+
+# Типы ресурсов CDP -> наши категории
+_CDP_TYPES = {
+    "Image": "image",
+    "Font": "font",
+    "Media": "media",
+}
+
+
+class _FilterStats:
+    """Потокобезопасные счетчики (Selenium работает в отдельных потоках)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._blocked: Dict[str, int] = {}
+        self._bytes_loaded = 0
+        self._pages = 0
+
+    def record_blocked(self, category: str) -> None:
+        with self._lock:
+            self._blocked[category] = self._blocked.get(category, 0) + 1
+
+    def record_page(self, bytes_loaded: int = 0) -> None:
+        with self._lock:
+            self._pages += 1
+            self._bytes_loaded += bytes_loaded
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            saved = sum(
+                count * _AVG_SIZE_BYTES.get(category, 0)
+                for category, count in self._blocked.items()
+            )
+            return {
+                "blocked_requests": dict(self._blocked),
+                "blocked_total": sum(self._blocked.values()),
+                "estimated_bytes_saved": saved,
+                "selenium_pages": self._pages,
+                "selenium_bytes_loaded": self._bytes_loaded,
+            }
+
+
+_stats = _FilterStats()
+
+
+# --- Общая политика ---
+
+
+def _host_of(url: Optional[str]) -> str:
+    if not url:
+        return ""
+    try:
+        return (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def _matches_domain(host: str, domain: str) -> bool:
+    return host == domain or host.endswith("." + domain)
+
+
+def allowed_categories(site: Optional[str]) -> Set[str]:
+    """Категории ресурсов, разрешенные для сайта (по хосту страницы)."""
+    if not site:
+        return set()
+    host = _host_of(site) if "://" in site else site.lower()
+    for domain, categories in settings.RESOURCE_FILTER_SITE_ALLOW.items():
+        if _matches_domain(host, domain):
+            return set(categories)
+    return set()
+
+
+def _is_tracker(url: str) -> bool:
+    host = _host_of(url)
+    return any(_matches_domain(host, d) for d in settings.RESOURCE_FILTER_TRACKER_DOMAINS)
+
+
+def classify(url: str, resource_type: Optional[str] = None) -> Optional[str]:
+    """Возвращает категорию ресурса, если он подлежит блокировке, иначе None."""
+    if _is_tracker(url):
+        return "tracker"
+    if resource_type in settings.RESOURCE_FILTER_BLOCKED_TYPES:
+        return resource_type
+    return None
+
+
+# --- Playwright ---
+
+
+def _page_site(request) -> str:
+    try:
+        return request.frame.url
+    except Exception:
+        # У запросов service worker'ов нет фрейма
+        return ""
+
+
+async def _route_handler(route, request) -> None:
+    category = classify(request.url, request.resource_type)
+    if category and category not in allowed_categories(_page_site(request)):
+        _stats.record_blocked(category)
+        await route.abort("blockedbyclient")
+    else:
+        await route.continue_()
+
+
+async def install_playwright_filter(context) -> None:
+    """Подключает фильтр ко всем страницам контекста Playwright."""
+    if not settings.RESOURCE_FILTER_ENABLED:
+        return
+    await context.route("**/*", _route_handler)
+
+
+# --- Selenium ---
+
+
+def _blocked_url_patterns(allowed: Iterable[str]) -> list:
+    allowed = set(allowed)
+    patterns = []
+    for category in settings.RESOURCE_FILTER_BLOCKED_TYPES:
+        if category not in allowed:
+            for extension in _EXTENSIONS.get(category, []):
+                patterns.extend(_extension_patterns(extension))
+    if "tracker" not in allowed:
+        patterns.extend(f"*{d}*" for d in settings.RESOURCE_FILTER_TRACKER_DOMAINS)
+    return patterns
+
+
+def prepare_chrome_options(options) -> None:
+    """Включает performance-лог, из которого считается статистика фильтра."""
+    if settings.RESOURCE_FILTER_ENABLED:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def install_selenium_filter(driver, site: Optional[str] = None) -> None:
+    """Блокирует тяжелые ресурсы в драйвере через CDP."""
+    if not settings.RESOURCE_FILTER_ENABLED:
+        return
+    patterns = _blocked_url_patterns(allowed_categories(site))
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        logger.warning(f"[Фильтр ресурсов] Не удалось включить блокировку в Selenium: {e}")
+
+
+def collect_selenium_stats(driver) -> None:
+    """
+    Разбирает накопленный performance-лог драйвера: считает заблокированные
+    запросы и реально загруженные байты. Лог при чтении очищается.
+    """
+    if not settings.RESOURCE_FILTER_ENABLED:
+        return
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return
+
+    bytes_loaded = 0
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError, TypeError):
+            continue
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.loadingFailed" and params.get("blockedReason"):
+            _stats.record_blocked(_CDP_TYPES.get(params.get("type"), "tracker"))
+        elif method == "Network.loadingFinished":
+            bytes_loaded += int(params.get("encodedDataLength", 0))
+    if entries:
+        _stats.record_page(bytes_loaded)
+
+
+def get_filter_stats() -> dict:
+    """
+    Счетчики фильтра. Заблокированные ресурсы не скачиваются, поэтому
+    estimated_bytes_saved - оценка по среднему размеру ресурса (_AVG_SIZE_BYTES),
+    а не измерение; selenium_bytes_loaded - реально загруженные байты.
+    """
+    return _stats.snapshot()
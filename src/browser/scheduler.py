@@ -0,0 +1,145 @@
+# src/browser/scheduler.py
+"""
+Планировщик "браузерных слотов" для тяжелых задач (Selenium/Playwright).
+
+Заменяет глобальный asyncio.Semaphore(1): задачи получают слот с учетом
+общего лимита и лимита на конкретный сайт (checko, nalog.ru и т.д.).
+Очередь обслуживается в порядке поступления (FIFO) - задача, пришедшая
+раньше, получает слот раньше, если для ее сайта есть свободное место.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Waiter:
+    def __init__(self, host: str, owner: Optional[str], future: asyncio.Future):
+        self.host = host
+        self.owner = owner
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class BrowserSlotScheduler:
+    def __init__(
+        self,
+        max_total: int,
+        host_limits: Dict[str, int],
+        default_host_limit: int = 1,
+    ):
+        self._max_total = max(1, max_total)
+        self._host_limits = dict(host_limits)
+        self._default_host_limit = max(1, default_host_limit)
+        self._waiters: Deque[_Waiter] = deque()
+        self._active: Dict[str, int] = {}
+        self._active_total = 0
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def _limit_for(self, host: str) -> int:
+        return max(1, self._host_limits.get(host, self._default_host_limit))
+
+    def _host_metrics(self, host: str) -> Dict[str, float]:
+        return self._metrics.setdefault(
+            host,
+            {"granted": 0, "total_wait_s": 0.0, "max_wait_s": 0.0, "cancelled": 0},
+        )
+
+    def _dispatch(self) -> None:
+        """Раздает освободившиеся слоты ожидающим в порядке очереди."""
+        for waiter in list(self._waiters):
+            if self._active_total >= self._max_total:
+                break
+            if waiter.future.done():
+                self._waiters.remove(waiter)
+                continue
+            if self._active.get(waiter.host, 0) < self._limit_for(waiter.host):
+                self._waiters.remove(waiter)
+                self._active[waiter.host] = self._active.get(waiter.host, 0) + 1
+                self._active_total += 1
+                waiter.future.set_result(None)
+
+    def _release(self, host: str) -> None:
+        self._active[host] -= 1
+        self._active_total -= 1
+        self._dispatch()
+
+    async def acquire(self, host: str, owner: Optional[str] = None) -> None:
+        waiter = _Waiter(host, owner, asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._host_metrics(host)["cancelled"] += 1
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Слот уже был выдан, но ожидающий отменен - возвращаем слот
+                self._release(host)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+        waited = time.monotonic() - waiter.enqueued_at
+        metrics = self._host_metrics(host)
+        metrics["granted"] += 1
+        metrics["total_wait_s"] += waited
+        metrics["max_wait_s"] = max(metrics["max_wait_s"], waited)
+        if waited >= 1.0:
+            logger.info(
+                f"[Браузерные слоты] '{host}' (запрос {owner or '-'}) ждал слот {waited:.2f} сек."
+            )
+
+    def release(self, host: str) -> None:
+        self._release(host)
+
+    @asynccontextmanager
+    async def slot(self, host: str, owner: Optional[str] = None):
+        """
+        Использование:
+            async with scheduler.slot("checko.ru", owner=inn):
+                ...
+        """
+        await self.acquire(host, owner)
+        try:
+            yield
+        finally:
+            self.release(host)
+
+    def get_stats(self) -> dict:
+        hosts = {}
+        for host, metrics in self._metrics.items():
+            granted = metrics["granted"]
+            hosts[host] = {
+                **metrics,
+                "avg_wait_s": metrics["total_wait_s"] / granted if granted else 0.0,
+                "active": self._active.get(host, 0),
+                "waiting": sum(1 for w in self._waiters if w.host == host),
+                "limit": self._limit_for(host),
+            }
+        return {
+            "active_total": self._active_total,
+            "max_total": self._max_total,
+            "queue_length": len(self._waiters),
+            "hosts": hosts,
+        }
+
+
+_scheduler: Optional[BrowserSlotScheduler] = None
+
+
+def get_browser_scheduler() -> BrowserSlotScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = BrowserSlotScheduler(
+            max_total=settings.BROWSER_SLOTS_TOTAL,
+            host_limits=settings.BROWSER_HOST_CONCURRENCY,
+            default_host_limit=settings.BROWSER_DEFAULT_HOST_CONCURRENCY,
+        )
+    return _scheduler
@@ -0,0 +1,296 @@
+# src/browser/supervisor.py
+"""
+Надзор за памятью браузеров.
+
+- Selenium: при возврате драйвера в пул проверяется RSS процесса
+  chromedriver вместе с дочерними Chrome; "распухший" драйвер закрывается,
+  а не возвращается в пул.
+- Playwright: фоновая задача периодически меряет RSS каждого браузера
+  отдельно (главный процесс Chrome с его потомками). Если общий браузер
+  превысил порог или отработал лимит страниц, пул переключается на новый,
+  старый закрывается, когда на нем завершатся текущие запросы. Постоянные
+  контексты (профиль Яндекса) проверяются по своим лимитам и перезапускаются.
+- "Осиротевшие" chrome/chromedriver (остались после падения бота или
+  скриптов parser/*.py) завершаются при старте и при каждом обходе. Надзор
+  трогает только процессы, запущенные ботом: они помечены переменной
+  окружения (launch_env()), поэтому отладочный Chrome разработчика и браузеры
+  других инструментов автоматизации не затрагиваются. Сиротой считается
+  помеченный процесс, чей родитель завершился или не является
+  бот/скрипт/драйвером (так это работает и на Windows, и при subreaper'ах
+  на Linux).
+
+Для замеров памяти нужен psutil; без него работает только лимит по страницам.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from src.config import settings
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil необязателен
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+_BROWSER_NAMES = ("chrome", "chromium", "headless_shell", "chrome-headless-shell")
+_DRIVER_NAMES = ("chromedriver",)
+# Кто законно запускает браузеры и драйверы: бот и скрипты parser/*.py, chromedriver, драйвер Playwright
+_LAUNCHER_NAMES = ("python", "py.exe", "pythonw", "chromedriver", "node", "playwright")
+# Метка в окружении chromedriver и Chrome, запущенных ботом (наследуется дочерними процессами)
+_OWNER_ENV = "FINBOT_BROWSER"
+
+_stats_lock = threading.Lock()
+_stats = {
+    "orphans_killed": 0,
+    "selenium_rss_recycles": 0,
+    "playwright_recycles": 0,
+    "persistent_recycles": 0,
+}
+_warned_no_psutil = False
+
+
+def _count(metric: str, value: int = 1) -> None:
+    with _stats_lock:
+        _stats[metric] += value
+
+
+def _psutil_available() -> bool:
+    global _warned_no_psutil
+    if psutil is None and not _warned_no_psutil:
+        logger.warning("[Надзор] psutil не установлен: контроль памяти браузеров отключен.")
+        _warned_no_psutil = True
+    return psutil is not None
+
+
+def tree_rss_mb(pids: Iterable[int]) -> float:
+    """Суммарный RSS процессов и всех их потомков (МБ)."""
+    if not _psutil_available():
+        return 0.0
+    seen = set()
+    total = 0
+    for pid in pids:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            continue
+        for proc in procs:
+            if proc.pid in seen:
+                continue
+            seen.add(proc.pid)
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass
+    return total / (1024 * 1024)
+
+
+# --- Selenium ---
+
+
+def driver_rss_mb(driver) -> float:
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return 0.0
+    return tree_rss_mb([pid])
+
+
+def driver_over_memory(driver) -> bool:
+    """True, если chromedriver с его Chrome занимает больше порога."""
+    limit = settings.SELENIUM_MAX_DRIVER_RSS_MB
+    if not limit or psutil is None:
+        return False
+    rss = driver_rss_mb(driver)
+    if rss > limit:
+        _count("selenium_rss_recycles")
+        logger.info(f"[Надзор] Драйвер занимает {rss:.0f} МБ (лимит {limit} МБ), пересоздаю.")
+        return True
+    return False
+
+
+# --- Playwright ---
+
+
+def _playwright_driver_pids() -> List[int]:
+    """Процессы драйвера Playwright (node), дочерние для нашего процесса."""
+    if not _psutil_available():
+        return []
+    pids = []
+    try:
+        children = psutil.Process(os.getpid()).children()
+    except psutil.Error:
+        return []
+    for child in children:
+        try:
+            name = child.name().lower()
+            cmdline = " ".join(child.cmdline()).lower()
+        except psutil.Error:
+            continue
+        if name.startswith("node") or "playwright" in cmdline:
+            pids.append(child.pid)
+    return pids
+
+
+def playwright_browser_pids() -> Set[int]:
+    """Главные процессы Chrome, запущенные драйвером Playwright (без renderer, gpu и т.п.)."""
+    pids = set()
+    for driver_pid in _playwright_driver_pids():
+        try:
+            descendants = psutil.Process(driver_pid).children(recursive=True)
+        except psutil.Error:
+            continue
+        for proc in descendants:
+            try:
+                if proc.name().lower().startswith(_BROWSER_NAMES) and not any(
+                    arg.startswith("--type=") for arg in proc.cmdline()
+                ):
+                    pids.add(proc.pid)
+            except psutil.Error:
+                continue
+    return pids
+
+
+def _over_budget(pages: int, max_pages: int, pid: Optional[int], max_rss_mb: int) -> Optional[str]:
+    """Причина замены браузера или None. RSS меряется только для этого браузера."""
+    if pages >= max_pages:
+        return f"отработано страниц: {pages}"
+    if max_rss_mb and pid and psutil is not None:
+        rss = tree_rss_mb([pid])
+        if rss > max_rss_mb:
+            return f"RSS {rss:.0f} МБ (лимит {max_rss_mb} МБ)"
+    return None
+
+
+async def check_playwright_pool(pool) -> bool:
+    """
+    Просит пул сменить общий браузер и перезапустить постоянные контексты,
+    превысившие свои лимиты памяти или страниц. True, если что-то заменено.
+    """
+    recycled = False
+    reason = _over_budget(
+        pool.browser_pages_served,
+        settings.PLAYWRIGHT_MAX_PAGES_PER_BROWSER,
+        pool.browser_pid,
+        settings.PLAYWRIGHT_MAX_RSS_MB,
+    )
+    if reason and await pool.request_recycle():
+        _count("playwright_recycles")
+        logger.info(f"[Надзор] Браузер Playwright будет заменен: {reason}.")
+        recycled = True
+
+    for user_data_dir, (pid, pages) in pool.persistent_usage().items():
+        reason = _over_budget(
+            pages,
+            settings.PLAYWRIGHT_PERSISTENT_MAX_PAGES,
+            pid,
+            settings.PLAYWRIGHT_PERSISTENT_MAX_RSS_MB,
+        )
+        if reason and await pool.recycle_persistent(user_data_dir):
+            _count("persistent_recycles")
+            logger.info(f"[Надзор] Постоянный контекст {user_data_dir} будет перезапущен: {reason}.")
+            recycled = True
+    return recycled
+
+
+# --- Осиротевшие процессы ---
+
+
+def launch_env() -> Dict[str, str]:
+    """Окружение для запуска chromedriver и Chrome: текущее плюс метка бота."""
+    return {**os.environ, _OWNER_ENV: "1"}
+
+
+def _launched_by_bot(proc) -> bool:
+    try:
+        return proc.environ().get(_OWNER_ENV) == "1"
+    except psutil.Error:
+        # Окружение чужого процесса недоступно - значит, он точно не наш
+        return False
+
+
+def _has_live_launcher(proc) -> bool:
+    """
+    Жив ли процесс, запустивший proc. Родителя нет, если его PID не существует
+    или уже занят более новым процессом (Windows не переназначает родителя,
+    а PID переиспользует), либо если процесс "усыновлен" init (PID 1) или
+    subreaper'ом (systemd --user и т.п.) - тогда родитель не из _LAUNCHER_NAMES.
+    """
+    ppid = proc.ppid()
+    if ppid in (0, 1):
+        return False
+    try:
+        parent = psutil.Process(ppid)
+        if parent.create_time() > proc.create_time():
+            return False
+        return parent.name().lower().startswith(_LAUNCHER_NAMES)
+    except psutil.NoSuchProcess:
+        return False
+    except psutil.Error:
+        # Нет доступа к родителю - не рискуем, считаем процесс чужим и живым
+        return True
+
+
+def _is_orphan(proc) -> bool:
+    try:
+        name = proc.name().lower()
+        if name.startswith(_BROWSER_NAMES):
+            # Дочерние процессы Chrome (renderer и т.п.) завершатся вместе с главным
+            if any(arg.startswith("--type=") for arg in proc.cmdline()):
+                return False
+        elif not name.startswith(_DRIVER_NAMES):
+            return False
+        return _launched_by_bot(proc) and not _has_live_launcher(proc)
+    except psutil.Error:
+        return False
+
+
+def kill_orphaned_browsers() -> int:
+    """Завершает запущенные ботом chrome/chromedriver, чей родитель (бот или скрипт) уже завершился."""
+    if not _psutil_available():
+        return 0
+    if os.getpid() == 1:
+        # Бот сам работает как PID 1 (контейнер): свои и чужие процессы не различить
+        return 0
+    killed = 0
+    for proc in psutil.process_iter():
+        if not _is_orphan(proc):
+            continue
+        try:
+            victims = proc.children(recursive=True) + [proc]
+            for victim in victims:
+                victim.kill()
+            killed += 1
+            logger.warning(f"[Надзор] Завершен осиротевший процесс {proc.pid} ({proc.name()}).")
+        except psutil.Error:
+            continue
+    _count("orphans_killed", killed)
+    return killed
+
+
+# --- Фоновый обход ---
+
+
+async def run_supervisor(interval: Optional[float] = None) -> None:
+    """Периодически проверяет браузеры. Запускается как фоновая задача бота."""
+    from src.browser.playwright_pool import get_playwright_pool
+
+    if interval is None:
+        interval = settings.BROWSER_SUPERVISOR_INTERVAL
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(kill_orphaned_browsers)
+            await check_playwright_pool(get_playwright_pool())
+        except Exception as e:
+            logger.error(f"[Надзор] Ошибка при проверке браузеров: {e}")
+
+
+def get_supervisor_stats() -> dict:
+    with _stats_lock:
+        return {**_stats, "psutil": psutil is not None}
@@ -24,6 +24,49 @@ class Settings:
         BASE_DIR, "data", "recommendation_rules.json"
     )
     STATE_PROGRAMS_FILE_PATH = os.path.join(BASE_DIR, "data", "state_programs.json")
+    CACHE_DIR = os.getenv("FINBOT_CACHE_DIR", os.path.join(BASE_DIR, "cache"))
+
+    # --- Сроки жизни кэша досье ---
+    MSP_REGISTRY_UPDATE_DAY = 10  # Реестр МСП обновляется 10-го числа каждого месяца
+    # Календарь заседаний Совета директоров ЦБ по ключевой ставке (дополнять ежегодно)
+    CBR_KEY_RATE_DECISION_DATES = [
+        "2025-02-14", "2025-03-21", "2025-04-25", "2025-06-06",
+        "2025-07-25", "2025-09-12", "2025-10-24", "2025-12-19",
+        "2026-02-13", "2026-03-20", "2026-04-24", "2026-06-19",
+        "2026-07-24", "2026-09-11", "2026-10-23", "2026-12-18",
+    ]
+
+    # --- Сервис ключевой ставки ЦБ ---
+    KEY_RATE_REFRESH_INTERVAL = 6 * 3600  # сек.; плановое дообновление истории
+    KEY_RATE_DECISION_REFRESH_DELAY = 15 * 60  # сек. после публикации решения ЦБ
+    KEY_RATE_RETRY_INTERVAL = 5 * 60  # сек.; повтор после неудачной загрузки
+
+    # --- Лимиты субсидий МСХ ---
+    MSH_LIMITS_TTL = 3 * 3600  # сек.; как часто проверять, не сменилась ли ссылка на PDF
+    MSH_LIMITS_PDF_RECHECK = 24 * 3600  # сек.; условный запрос PDF по прежней ссылке (файл могли заменить)
+
+    # --- Реестр участников СЭЗ ---
+    SEZ_REGISTRY_REFRESH_INTERVAL = 12 * 3600  # сек.; проверка новой публикации реестра
+    SEZ_REGISTRY_RETRY_INTERVAL = 15 * 60  # сек.; повтор после неудачной проверки
+
+    # --- Фоновый дайджест новостей (агроинвестор, РИА) ---
+    NEWS_DIGEST_REFRESH_INTERVAL = 3600  # сек.
+    NEWS_DIGEST_RETRY_INTERVAL = 10 * 60  # сек.; повтор, если источник не ответил
+
+    # --- Кэш отраслевой аналитики (по ОКВЭД) ---
+    INDUSTRY_ANALYSIS_TTL = int(os.getenv("INDUSTRY_ANALYSIS_TTL", str(7 * 24 * 3600)))  # сек.
+    INDUSTRY_PRECOMPUTE_HOUR = 3  # Ночной пересчет для самых частых ОКВЭД (час по местному времени)
+    INDUSTRY_PRECOMPUTE_TOP = 20
+
+    # --- Кэш результатов поиска в Яндексе ---
+    SEARCH_CACHE_TTL = 3 * 24 * 3600  # сек.
+    SEARCH_CACHE_MAX_ENTRIES = 2000
+
+    # --- Критерии МСП из 209-ФЗ (consultant.ru) ---
+    FZ209_CHECK_INTERVAL = 7 * 24 * 3600  # сек.; как часто проверять, не изменились ли документы
+
+    # --- Очередь анализов ИНН ---
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Сколько анализов выполняется одновременно
 
     GIGACHAT_MODEL = (
         "GigaChat-Max"  # Попробуем Pro, он может быть стабильнее для сложных промптов
@@ -40,6 +83,86 @@ class Settings:
     GIGACHAT_TEMPERATURE_FORMATTING = 0.6
     GIGACHAT_MAX_TOKENS_FORMATTING = 550
 
+    # --- Прогрев при старте бота ---
+    STARTUP_WARMUP_BUDGET = int(os.getenv("STARTUP_WARMUP_BUDGET", "60"))  # сек.
+    STARTUP_SELENIUM_WARM_DRIVERS = 1
+    # Замер при старте: холодный ChromeDriverManager().install() против пути из кэша
+    STARTUP_CHROMEDRIVER_BENCHMARK = os.getenv("STARTUP_CHROMEDRIVER_BENCHMARK", "1") == "1"
+
+    # --- Пул браузеров Selenium ---
+    SELENIUM_POOL_MAX_DRIVERS = int(os.getenv("SELENIUM_POOL_MAX_DRIVERS", "3"))
+    SELENIUM_MAX_PAGES_PER_DRIVER = int(
+        os.getenv("SELENIUM_MAX_PAGES_PER_DRIVER", "50")
+    )
+    SELENIUM_CHECKOUT_TIMEOUT = 120  # Сколько ждать свободный драйвер (сек)
+    SELENIUM_MAX_DRIVER_RSS_MB = int(os.getenv("SELENIUM_MAX_DRIVER_RSS_MB", "1024"))
+
+    # --- Слоты для браузерных задач (вместо глобального семафора) ---
+    BROWSER_SLOTS_TOTAL = int(os.getenv("BROWSER_SLOTS_TOTAL", "3"))
+    BROWSER_DEFAULT_HOST_CONCURRENCY = 1
+    BROWSER_HOST_CONCURRENCY = {
+        "checko.ru": 2,
+        "egrul.nalog.ru": 1,
+        "rmsp.nalog.ru": 1,
+        "mcx.gov.ru": 1,
+    }
+
+    # --- Общая HTTP-сессия (aiohttp) для запросов без браузера ---
+    HTTP_POOL_LIMIT = 20
+    HTTP_POOL_LIMIT_PER_HOST = 4
+    HTTP_DEFAULT_TIMEOUT = 15
+    EGRUL_POLL_TIMEOUT = 10  # Сколько ждать результат поиска в ЕГРЮЛ (сек)
+
+    # --- Дисковый кэш загруженных страниц (статьи новостей) ---
+    PAGE_CACHE_MAX_MB = int(os.getenv("PAGE_CACHE_MAX_MB", "200"))  # сжатый объем на диске
+    PAGE_CACHE_DEFAULT_TTL = 24 * 3600  # сек.
+    # Опубликованные статьи почти не меняются - держим дольше
+    PAGE_CACHE_DOMAIN_TTL = {
+        "agroinvestor.ru": 7 * 24 * 3600,
+        "ria.ru": 7 * 24 * 3600,
+    }
+
+    # --- Блокировка тяжелых ресурсов при загрузке страниц ---
+    RESOURCE_FILTER_ENABLED = os.getenv("RESOURCE_FILTER_ENABLED", "1") == "1"
+    RESOURCE_FILTER_BLOCKED_TYPES = ["image", "font", "media"]
+    RESOURCE_FILTER_TRACKER_DOMAINS = [
+        "mc.yandex.ru",
+        "an.yandex.ru",
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "top-fwz1.mail.ru",
+        "counter.yadro.ru",
+        "tns-counter.ru",
+        "connect.facebook.net",
+    ]
+    # Что разрешено загружать на конкретных сайтах (категории: image, font, media, tracker)
+    RESOURCE_FILTER_SITE_ALLOW = {
+        # Поиск в Яндексе идет в headless-браузере с постоянным профилем: без картинок,
+        # шрифтов и счетчиков Метрики сессия выглядит как бот и чаще получает капчу
+        "yandex.ru": ["image", "font", "tracker"],
+        "ya.ru": ["image", "font", "tracker"],
+    }
+
+    # --- Общий браузер Playwright ---
+    PLAYWRIGHT_MAX_CONCURRENT_PAGES = int(
+        os.getenv("PLAYWRIGHT_MAX_CONCURRENT_PAGES", "4")
+    )
+    PLAYWRIGHT_MAX_IDLE_CONTEXTS = 4
+    PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 30
+    PLAYWRIGHT_MAX_PAGES_PER_BROWSER = 500
+    PLAYWRIGHT_MAX_RSS_MB = int(os.getenv("PLAYWRIGHT_MAX_RSS_MB", "1536"))
+    # Постоянные контексты (профиль Яндекса) - свой лимит, отдельно от общего браузера
+    PLAYWRIGHT_PERSISTENT_MAX_PAGES = 200
+    PLAYWRIGHT_PERSISTENT_MAX_RSS_MB = int(os.getenv("PLAYWRIGHT_PERSISTENT_MAX_RSS_MB", "1024"))
+    BROWSER_SUPERVISOR_INTERVAL = 60  # Как часто проверять память браузеров (сек)
+    PLAYWRIGHT_LAUNCH_ARGS = [
+        "--no-sandbox",
+        "--disable-setuid-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-blink-features=AutomationControlled",
+    ]
+
     REDUCE_STRATEGY_SUGGESTIONS = [
         "переход на льготные программы кредитования в соответствии с рекомендациями",
         "внедрение продуктов цифровой трансформации, позволяющих увеличить рентабельность",
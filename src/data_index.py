@@ -0,0 +1,60 @@
+# src/data_index.py
+"""
+Общий кэш справочников из папки data/*.json.
+
+Каждый файл читается и разбирается один раз на процесс; программы
+(program/mskh.py) и генератор прогнозов (parser/forecast_generator.py)
+получают один и тот же объект. Поверх справочников строятся индексы
+для поиска без перебора (get_index). При старте бота справочники
+загружаются, а индексы строятся заранее (см. src/startup.py).
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.join(settings.BASE_DIR, "data")
+
+_cache: Dict[str, Any] = {}
+_lock = threading.Lock()
+_indexes: Dict[str, Any] = {}
+_index_lock = threading.Lock()
+
+
+def load_json(filename: str) -> Any:
+    """Возвращает содержимое data/<filename> (None, если файл не прочитан)."""
+    with _lock:
+        if filename in _cache:
+            return _cache[filename]
+        try:
+            with open(os.path.join(DATA_DIR, filename), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.error(f"Критическая ошибка при загрузке файла {filename}: {e}")
+            data = None
+        _cache[filename] = data
+        return data
+
+
+def load_data_index() -> Dict[str, int]:
+    """Загружает все справочники из data/. Возвращает {файл: число записей}."""
+    summary = {}
+    for filename in sorted(os.listdir(DATA_DIR)):
+        if filename.endswith(".json"):
+            data = load_json(filename)
+            summary[filename] = len(data) if data is not None else 0
+    return summary
+
+
+def get_index(name: str, build: Callable[[], Any]) -> Any:
+    """Индекс над справочниками: build() вызывается один раз на процесс."""
+    with _index_lock:
+        if name not in _indexes:
+            _indexes[name] = build()
+        return _indexes[name]
@@ -1,31 +1,53 @@
 # src/dialogue/dialogue_manager.py (ФИНАЛЬНАЯ ВЕРСИЯ С ПОЛНОЙ ПАМЯТЬЮ)
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Awaitable, Callable, Optional
 import asyncio
 import re
 import json
 from src.nlu.gigachat_client import GigaChatNLU
 from src.tools.msh_limits_tool import get_msh_limits_data
-from parser.agro_news_parser import get_latest_agro_news
-from parser.ria_news_parser import get_ria_news_async
+from src.tools.news_digest import get_news_digest_service
 from parser.forecast_generator import generate_price_forecast
 from program.mskh import _get_company_region, CREDIT_LIMITS_DATA
 
 # ===============================================
 
 from src.nlu.gigachat_client import GigaChatNLU
-from src.web_news_analyzer import get_news_analysis_for_company
-from src.tools.state_program_analyzer import run_state_programs_check
-
-# Импортируем парсер из full_cheko.py (как вы и просили, без переименования)
-from parser.full_cheko import get_company_data_by_inn_async
+from src.web_news_analyzer import get_cached_industry_analysis
+from src.tools.state_program_analyzer import (
+    get_company_data_cached,
+    run_state_programs_check,
+)
 
 from src.config import settings
 from langchain_core.messages import SystemMessage, HumanMessage
 
 logger = logging.getLogger(__name__)
 
+# Сообщает о ходе долгого анализа (например, правит статусное сообщение в Telegram)
+ProgressCallback = Callable[[str], Awaitable[None]]
+# Отправляет пользователю готовый раздел отчета, не дожидаясь остальных
+SectionCallback = Callable[[str], Awaitable[None]]
+
+
+async def _report_progress(progress: Optional[ProgressCallback], stage: str) -> None:
+    if progress is None:
+        return
+    try:
+        await progress(stage)
+    except Exception as e:
+        logger.warning(f"Не удалось сообщить о ходе анализа ('{stage}'): {e}")
+
+
+async def _deliver_section(on_section: Optional[SectionCallback], text: str) -> None:
+    if on_section is None:
+        return
+    try:
+        await on_section(text)
+    except Exception as e:
+        logger.warning(f"Не удалось отправить раздел отчета: {e}")
+
 
 class DialogueManager:
     def __init__(self):
@@ -99,8 +121,7 @@ class DialogueManager:
 
         try:
             client = self.giga_nlu._get_client("formatting")
-            response = await asyncio.to_thread(
-                client.invoke,
+            response = await client.ainvoke(
                 [
                     SystemMessage(content=system_prompt),
                     HumanMessage(content=user_prompt),
@@ -129,11 +150,25 @@ class DialogueManager:
 
         # <<< ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ПОЛНОСТЬЮ >>>
 
-    async def _run_full_company_analysis(self, inn: str, state: Dict[str, Any]) -> str:
+    async def _run_full_company_analysis(
+        self,
+        inn: str,
+        state: Dict[str, Any],
+        force_refresh: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        on_section: Optional[SectionCallback] = None,
+    ) -> str:
+        """
+        Комплексный анализ ИНН. Если передан on_section, разделы отчета отправляются
+        по мере готовности (сведения о компании - сразу, госпрограммы - когда закончится
+        проверка), а возвращается только итоговое сообщение. Без on_section
+        возвращается весь отчет целиком, как раньше.
+        """
         logger.info(f"Запускаю НОВЫЙ КОМПЛЕКСНЫЙ анализ для ИНН {inn}.")
 
-        # --- ШАГ 0: Получение базовой информации о компании ---
-        company_data = await get_company_data_by_inn_async(inn)
+        # --- ШАГ 0: Получение базовой информации о компании (из кэша досье, если свежая) ---
+        await _report_progress(progress, "получаю данные о компании")
+        company_data = await get_company_data_cached(inn, force_refresh)
         if company_data.get("error"):
             return f"Не удалось получить данные для компании с ИНН {inn}. Причина: {company_data['error']}"
 
@@ -144,47 +179,128 @@ class DialogueManager:
         state["company_region"] = company_region
         logger.info(f"Для ИНН {inn} определен и сохранен регион: {company_region}")
 
-        main_okved_info = company_data.get("okved_data", {}).get("main_okved", {})
+        # Парсер кладет None, если ОКВЭД не найден
+        main_okved_info = (company_data.get("okved_data") or {}).get("main_okved") or {}
         okved_code = main_okved_info.get("code", "Не определен")
 
-        # --- ШАГ 1-3: Параллельный запуск всех асинхронных инструментов ---
-        logger.info("Запускаю параллельный сбор данных из всех источников...")
+        sections = []
 
-        # Создаем задачи для асинхронного выполнения
-        task_agroinvestor = asyncio.create_task(get_latest_agro_news())
-        task_ria_news = asyncio.create_task(get_ria_news_async())
+        async def add_section(text: str) -> None:
+            sections.append(text)
+            await _deliver_section(on_section, text)
 
-        # <<< ИСПРАВЛЕНИЕ ЗДЕСЬ: Возвращаем вызов к оригинальному виду (1 аргумент вместо 2) >>>
-        task_programs = asyncio.create_task(run_state_programs_check(inn))
+        # Сведения о компании уже есть - показываем их, не дожидаясь остальных проверок
+        await add_section(
+            self._format_company_section(company_name, inn, company_region, main_okved_info)
+        )
 
-        # Ожидаем завершения всех асинхронных задач
-        agroinvestor_report, ria_news_report, programs_report = await asyncio.gather(
-            task_agroinvestor, task_ria_news, task_programs
+        # --- ШАГ 1: Госпрограммы - самая долгая часть, проверяем параллельно с остальным ---
+        # Данные checko уже получены выше - передаем их, чтобы не грузить страницу второй раз
+        await _report_progress(progress, "проверяю соответствие госпрограммам")
+        programs_task = asyncio.create_task(
+            run_state_programs_check(
+                inn,
+                force_refresh=force_refresh,
+                partial_dossier={"full_cheko_data": company_data},
+            )
         )
 
-        # Синхронный вызов генератора прогнозов
-        price_forecast_summary = generate_price_forecast(okved_code)
-        from parser.forecast_generator import find_category_by_okved
+        try:
+            # --- ШАГ 2: Новости берем из фонового дайджеста (снимок читается мгновенно) ---
+            news_digest = get_news_digest_service()
+            agroinvestor_report = news_digest.snapshot("agroinvestor")
+            ria_news_report = news_digest.snapshot("ria")
+
+            # Синхронный вызов генератора прогнозов
+            price_forecast_summary = generate_price_forecast(okved_code)
+            from parser.forecast_generator import find_category_by_okved
+
+            okved_category = find_category_by_okved(okved_code)
 
-        okved_category = find_category_by_okved(okved_code)
+            await add_section(
+                self._format_news_section(agroinvestor_report, ria_news_report, okved_category)
+            )
+
+            # --- ШАГ 3: Прогноз цен (выводится, если был сгенерирован) ---
+            if price_forecast_summary and "не найдена" not in price_forecast_summary:
+                await add_section(
+                    "--- **3. ОТРАСЛЕВОЙ ПРОГНОЗ ЦЕН** ---\n" + price_forecast_summary
+                )
+
+            await _report_progress(progress, "завершаю проверку госпрограмм")
+            programs_report = await programs_task
+        finally:
+            programs_task.cancel()
+
+        await add_section(self._format_programs_section(programs_report))
+
+        # Отраслевая аналитика общая для ОКВЭД и берется только из кэша (ночной пересчет):
+        # поиск и парсинг статей слишком долгие, чтобы ждать их в анализе ИНН
+        industry_analysis = {}
+        if main_okved_info.get("name"):
+            try:
+                industry_analysis = await get_cached_industry_analysis(
+                    main_okved_info["name"], okved_code=main_okved_info.get("code")
+                ) or {}
+            except Exception as e:
+                logger.error(f"Ошибка отраслевой аналитики для ИНН {inn}: {e}", exc_info=True)
+
+        if industry_analysis.get("top_news"):
+            await add_section(self._format_industry_section(industry_analysis))
 
         # --- ШАГ 4: Сохранение полного отчета в "память" ассистента ---
+        await _report_progress(progress, "формирую отчет")
         full_report = {
             "company_info": company_data,
             "agroinvestor_news": agroinvestor_report.get("data", []),
             "ria_news_forecast": ria_news_report.get("data", []),
             "price_forecast_summary": price_forecast_summary,
             "programs_analysis": programs_report,
+            "industry_analysis": industry_analysis,
         }
         state["current_inn"] = inn
         state["company_name"] = company_name
         state["analysis_report"] = full_report
         state["history"] = []
 
-        # --- ШАГ 5: Формирование отчета для пользователя (остается без изменений) ---
-        response_parts = [
-            f"✅ **Комплексный анализ для «{company_name}» (ИНН: {inn})**\n"
-        ]
+        # --- Финальная фраза ---
+        closing = (
+            "---\nЯ проанализировал всю доступную информацию. **Вы можете задать любой уточняющий вопрос** по деталям отчета."
+        )
+        final_response = "\n\n".join(sections + [closing])
+        state["history"].append({"role": "assistant", "content": final_response})
+        if on_section is None:
+            return final_response
+
+        # Разделы уже отправлены - итоговое сообщение только подводит итог
+        verdicts = {key: len(programs_report.get(key) or []) for key in ("passed", "fixable", "failed")}
+        return (
+            f"✅ **Анализ «{company_name}» (ИНН: {inn}) завершен.**\n"
+            f"Госпрограммы: проходит - {verdicts['passed']}, требуют корректировки - {verdicts['fixable']}, "
+            f"не проходит - {verdicts['failed']}.\n\n{closing}"
+        )
+
+    @staticmethod
+    def _format_company_section(
+        company_name: str, inn: str, company_region: Optional[str], main_okved_info: Dict[str, Any]
+    ) -> str:
+        lines = [f"✅ **Комплексный анализ для «{company_name}» (ИНН: {inn})**"]
+        if company_region:
+            lines.append(f"   **Регион:** {company_region}")
+        if main_okved_info.get("code"):
+            okved_text = main_okved_info["code"]
+            if main_okved_info.get("name"):
+                okved_text += f" {main_okved_info['name']}"
+            lines.append(f"   **Основной ОКВЭД:** {okved_text}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_news_section(
+        agroinvestor_report: Dict[str, Any],
+        ria_news_report: Dict[str, Any],
+        okved_category: Optional[str],
+    ) -> str:
+        response_parts = []
 
         # --- Блок 1: Агроинвестор (выводится всегда) ---
         response_parts.append(
@@ -224,13 +340,23 @@ class DialogueManager:
             else:
                 response_parts.append("Не удалось получить новости по прогнозу урожая.")
 
-        # --- Блок 3: Прогноз цен (выводится, если был сгенерирован) ---
-        if price_forecast_summary and "не найдена" not in price_forecast_summary:
-            response_parts.append("\n\n--- **3. ОТРАСЛЕВОЙ ПРОГНОЗ ЦЕН** ---")
-            response_parts.append(price_forecast_summary)
+        return "\n".join(response_parts)
+
+    @staticmethod
+    def _format_industry_section(industry_analysis: Dict[str, Any]) -> str:
+        response_parts = ["--- **5. ОТРАСЛЕВАЯ АНАЛИТИКА** ---"]
+        for news_item in industry_analysis["top_news"]:
+            response_parts.append(f"\n📈 **{news_item.get('title', 'Без заголовка')}**")
+            if news_item.get("summary"):
+                response_parts.append(f"   {news_item['summary']}")
+            if news_item.get("source_url"):
+                response_parts.append(f"   **Источник:** {news_item['source_url']}")
+        return "\n".join(response_parts)
 
-        # --- Блок 4: Госпрограммы (логика остается прежней) ---
-        response_parts.append("\n\n--- **4. АНАЛИЗ ПО ГОСПРОГРАММАМ** ---\n")
+    @staticmethod
+    def _format_programs_section(programs_report: Dict[str, Any]) -> str:
+        # --- Блок 4: Госпрограммы ---
+        response_parts = ["--- **4. АНАЛИЗ ПО ГОСПРОГРАММАМ** ---\n"]
         if programs_report.get("passed"):
             response_parts.append("**✅ ПРЕДВАРИТЕЛЬНО ПРОХОДИТ:**")
             # ... (здесь и далее код блока госпрограмм остается без изменений, как в вашем файле) ...
@@ -270,14 +396,7 @@ class DialogueManager:
                 "Не найдено подходящих госпрограмм или произошла ошибка при проверке."
             )
 
-        # --- Финальная фраза ---
-        response_parts.append(
-            "\n\n---\nЯ проанализировал всю доступную информацию. **Вы можете задать любой уточняющий вопрос** по деталям отчета."
-        )
-
-        final_response = "\n".join(response_parts)
-        state["history"].append({"role": "assistant", "content": final_response})
-        return final_response
+        return "\n".join(response_parts)
 
     async def _handle_msh_borrower_limit_query(
         self, entities: Dict[str, Any], state: Dict[str, Any]
@@ -659,8 +778,7 @@ class DialogueManager:
 
         try:
             client = self.giga_nlu._get_client("formatting")
-            response = await asyncio.to_thread(
-                client.invoke,
+            response = await client.ainvoke(
                 [
                     SystemMessage(content=system_prompt),
                     HumanMessage(content=user_prompt),
@@ -684,14 +802,28 @@ class DialogueManager:
             return "Произошла ошибка при обработке вашего вопроса. Попробуйте переформулировать."
 
     # <<< ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ПОЛНОСТЬЮ >>>
-    async def handle_message(self, user_id: str, text: str) -> str:
+    async def handle_message(
+        self,
+        user_id: str,
+        text: str,
+        progress: Optional[ProgressCallback] = None,
+        on_section: Optional[SectionCallback] = None,
+    ) -> str:
         logger.info(f"Получено сообщение от {user_id}: '{text}'")
         state = self.get_or_create_state(user_id)
 
-        # Проверяем на ИНН в первую очередь
-        inn_match = re.fullmatch(r"(\d{10}|\d{12})", text.strip())
+        # Проверяем на ИНН в первую очередь ("<ИНН> обновить" - без кэша досье)
+        inn_match = re.fullmatch(
+            r"(\d{10}|\d{12})(\s+обнови(?:ть)?)?", text.strip(), re.IGNORECASE
+        )
         if inn_match:
-            return await self._run_full_company_analysis(inn_match.group(1), state)
+            return await self._run_full_company_analysis(
+                inn_match.group(1),
+                state,
+                force_refresh=bool(inn_match.group(2)),
+                progress=progress,
+                on_section=on_section,
+            )
 
         # Если это не ИНН, но есть контекст компании, используем NLU
         if state.get("current_inn"):
@@ -699,8 +831,8 @@ class DialogueManager:
 
             # Здесь должен быть ваш улучшенный промпт для NLU,
             # который поможет ему различать новые намерения.
-            # Например, вы можете передать примеры в вашу функцию extract_intent_and_entities
-            nlu_result = self.giga_nlu.extract_intent_and_entities(text, state)
+            # Например, вы можете передать примеры в вашу функцию aextract_intent_and_entities
+            nlu_result = await self.giga_nlu.aextract_intent_and_entities(text, state)
             intent = nlu_result.get("intent")
             entities = nlu_result.get("entities")
 
@@ -0,0 +1,151 @@
+# src/job_queue.py
+"""
+Очередь анализов ИНН.
+
+Комплексный анализ идет несколько минут, поэтому обработчик Telegram не ждет
+его: запрос ставится в очередь (submit), пользователь сразу получает номер
+задачи и позицию в очереди. Задачи выполняют settings.JOB_WORKERS
+обработчиков (run), остальные ждут своей очереди.
+
+Задачи одного пользователя выполняются строго по очереди: все они работают
+с одним состоянием диалога, и параллельный анализ перезаписал бы отчет,
+по которому пользователь задает уточняющие вопросы.
+
+Незавершенные задачи (в очереди и в работе) хранятся на диске
+(settings.CACHE_DIR/jobs/) и после перезапуска бота выполняются заново.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set
+
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "pending"
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: str
+    chat_id: int
+    text: str
+    created_at: float
+    status: str = "queued"  # queued / running
+    status_message_id: Optional[int] = None
+
+
+class JobQueue:
+    def __init__(self):
+        self._store = JsonFileCache("jobs")
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        # Пользователи, чья задача сейчас выполняется, и их отложенные задачи
+        self._busy_users: Set[str] = set()
+        self._deferred: Dict[str, Deque[Job]] = {}
+        for data in self._store.load(_PENDING_KEY) or []:
+            job = Job(**data)
+            # Задача, прерванная перезапуском, выполняется с начала
+            job.status = "queued"
+            self._jobs[job.id] = job
+        if self._jobs:
+            logger.info(f"[Очередь анализов] Восстановлено незавершенных задач: {len(self._jobs)}.")
+
+    def _persist(self) -> None:
+        self._store.save(_PENDING_KEY, [asdict(job) for job in self._jobs.values()])
+
+    @staticmethod
+    def create(user_id: str, chat_id: int, text: str) -> Job:
+        """Новая задача; в очередь ее ставит submit()."""
+        return Job(id=uuid.uuid4().hex[:8], user_id=user_id, chat_id=chat_id, text=text, created_at=time.time())
+
+    def submit(self, job: Job) -> Job:
+        self._jobs[job.id] = job
+        self._persist()
+        if self._queue is not None:
+            self._queue.put_nowait(job)
+        logger.info(f"[Очередь анализов] Задача {job.id} от {job.user_id} поставлена в очередь.")
+        return job
+
+    def set_status_message(self, job_id: str, message_id: int) -> None:
+        """Запоминает сообщение, в котором показывается ход выполнения задачи."""
+        job = self._jobs.get(job_id)
+        if job:
+            job.status_message_id = message_id
+            self._persist()
+
+    def _waits_for_user(self, job: Job) -> bool:
+        """Задача ждет не свободного обработчика, а завершения задачи того же пользователя."""
+        return job.user_id in self._busy_users or job in self._deferred.get(job.user_id, ())
+
+    def position(self, job: Job) -> int:
+        """
+        Позиция задачи среди ожидающих (1 - следующая); для еще не поставленной
+        в очередь - какой она будет. Задачи, отложенные до завершения другой
+        задачи того же пользователя, не считаются: обработчик их не ждет.
+        """
+        ahead = 0
+        for other in self._jobs.values():
+            if other.id == job.id:
+                break
+            if other.status == "queued" and not self._waits_for_user(other):
+                ahead += 1
+        return ahead + 1
+
+    async def _worker(self, execute: Callable[[Job], Awaitable[None]]) -> None:
+        while True:
+            job = await self._queue.get()
+            user_id = job.user_id
+            if user_id in self._busy_users:
+                # Выполнится тем же обработчиком сразу после текущей задачи пользователя
+                self._deferred.setdefault(user_id, deque()).append(job)
+                continue
+            self._busy_users.add(user_id)
+            try:
+                while job is not None:
+                    await self._execute(job, execute)
+                    deferred = self._deferred.get(user_id)
+                    job = deferred.popleft() if deferred else None
+            finally:
+                self._busy_users.discard(user_id)
+                if not self._deferred.get(user_id):
+                    self._deferred.pop(user_id, None)
+
+    async def _execute(self, job: Job, execute: Callable[[Job], Awaitable[None]]) -> None:
+        job.status = "running"
+        self._persist()
+        try:
+            await execute(job)
+        except asyncio.CancelledError:
+            # Бот останавливается: задача останется на диске и выполнится после перезапуска
+            job.status = "queued"
+            self._persist()
+            raise
+        except Exception as e:
+            logger.error(f"[Очередь анализов] Задача {job.id} завершилась с ошибкой: {e}", exc_info=True)
+        self._jobs.pop(job.id, None)
+        self._persist()
+
+    async def run(self, execute: Callable[[Job], Awaitable[None]]) -> None:
+        """Фоновая задача бота: выполняет задачи очереди через execute(job)."""
+        self._queue = asyncio.Queue()
+        for job in self._jobs.values():
+            self._queue.put_nowait(job)
+        await asyncio.gather(*(self._worker(execute) for _ in range(settings.JOB_WORKERS)))
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+    return _job_queue
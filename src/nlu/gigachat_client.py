@@ -1,6 +1,6 @@
 from langchain_gigachat import GigaChat
 from langchain_core.messages import SystemMessage, HumanMessage
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import json
 import re
 import logging
@@ -83,7 +83,42 @@ class GigaChatNLU:
         logger.debug(
             f"Extracting intent/entities from: '{user_input}' with context: {dialogue_context}"
         )
+        messages = self._build_extraction_messages(user_input, dialogue_context)
+        start_time = time.time()
+        try:
+            response_object = client.invoke(messages)
+        except Exception as e:
+            return self._extraction_error(e, start_time)
+        return self._parse_extraction_response(user_input, response_object, start_time)
 
+    async def aextract_intent_and_entities(
+        self, user_input: str, dialogue_context: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Асинхронный вариант extract_intent_and_entities: не блокирует event loop бота."""
+        client = self._get_client(purpose="extraction")
+        logger.debug(
+            f"Extracting intent/entities (async) from: '{user_input}' with context: {dialogue_context}"
+        )
+        messages = self._build_extraction_messages(user_input, dialogue_context)
+        start_time = time.time()
+        try:
+            response_object = await client.ainvoke(messages)
+        except Exception as e:
+            return self._extraction_error(e, start_time)
+        return self._parse_extraction_response(user_input, response_object, start_time)
+
+    @staticmethod
+    def _extraction_error(error: Exception, start_time: float) -> Dict[str, Any]:
+        logger.error(
+            f"GigaChat NLU call failed after {time.time() - start_time:.2f}s. Error: {error}",
+            exc_info=True,
+        )
+        return {"intent": "unknown_intent", "entities": None, "_nlu_error": "api_call_error"}
+
+    @staticmethod
+    def _build_extraction_messages(
+        user_input: str, dialogue_context: Optional[Dict[str, Any]]
+    ) -> List[Any]:
         program_name_ids = [
             "mer_2025_combined",
             "belarus_tech_purchase",
@@ -171,23 +206,24 @@ class GigaChatNLU:
             "\n- 'news_source': источник новостей, например 'агроинвестор'."
             "\n- 'news_identifier': ключевые слова из заголовка новости."
         )
-        messages = [
+        logger.debug(
+            f"Sending to GigaChat NLU. Prompt hash: {hash(system_prompt_text)}, Input: '{user_input}'"
+        )
+        return [
             SystemMessage(content=system_prompt_text),
             HumanMessage(content=user_input),
         ]
+
+    @staticmethod
+    def _parse_extraction_response(
+        user_input: str, response_object: Any, start_time: float
+    ) -> Dict[str, Any]:
         default_response = {
             "intent": "unknown_intent",
             "entities": None,
             "_nlu_error": None,
         }
-        start_time = time.time()
-
         try:
-            logger.debug(
-                f"Sending to GigaChat NLU. Prompt hash: {hash(system_prompt_text)}, Input: '{user_input}'"
-            )
-
-            response_object = client.invoke(messages)
             response_content = response_object.content.strip()
             end_time = time.time()
 
@@ -287,11 +323,7 @@ class GigaChatNLU:
 
             return default_response
         except Exception as e:
-            end_time = time.time()
-            logger.error(
-                f"GigaChat NLU call failed after {end_time - start_time:.2f}s. Error: {e}",
-                exc_info=True,
-            )
+            logger.error(f"Failed to process GigaChat NLU response: {e}", exc_info=True)
             default_response["_nlu_error"] = "api_call_error"
             return default_response
 
@@ -306,6 +338,61 @@ class GigaChatNLU:
         prompt_for_next_action: Optional[str] = None,
     ) -> str:
         client = self._get_client(purpose="formatting")
+        messages, fallback_response = self._build_formatting_messages(
+            base_text, recommendation, explanation, suggestions,
+            program_info_blocks, is_error, prompt_for_next_action,
+        )
+        start_time = time.time()
+        try:
+            response_object = client.invoke(messages)
+        except Exception as e:
+            return self._formatting_error(e, start_time, fallback_response)
+        return self._parse_formatting_response(response_object, start_time, fallback_response)
+
+    async def aformat_message_for_user(
+        self,
+        base_text: str,
+        recommendation: Optional[str] = None,
+        explanation: Optional[str] = None,
+        suggestions: Optional[List[str]] = None,
+        program_info_blocks: Optional[List[Dict[str, Any]]] = None,
+        is_error: bool = False,
+        prompt_for_next_action: Optional[str] = None,
+    ) -> str:
+        """Асинхронный вариант format_message_for_user: не блокирует event loop бота."""
+        client = self._get_client(purpose="formatting")
+        messages, fallback_response = self._build_formatting_messages(
+            base_text, recommendation, explanation, suggestions,
+            program_info_blocks, is_error, prompt_for_next_action,
+        )
+        start_time = time.time()
+        try:
+            response_object = await client.ainvoke(messages)
+        except Exception as e:
+            return self._formatting_error(e, start_time, fallback_response)
+        return self._parse_formatting_response(response_object, start_time, fallback_response)
+
+    @staticmethod
+    def _formatting_error(error: Exception, start_time: float, fallback_response: str) -> str:
+        logger.error(
+            f"GigaChat Formatter call failed after {time.time() - start_time:.2f}s. Error: {error}",
+            exc_info=True,
+        )
+        logger.warning(
+            f"Returning fallback for formatter error: '{fallback_response}'"
+        )
+        return fallback_response
+
+    @staticmethod
+    def _build_formatting_messages(
+        base_text: str,
+        recommendation: Optional[str],
+        explanation: Optional[str],
+        suggestions: Optional[List[str]],
+        program_info_blocks: Optional[List[Dict[str, Any]]],
+        is_error: bool,
+        prompt_for_next_action: Optional[str],
+    ) -> Tuple[List[Any], str]:
         role_prompt = (
             "Ты — дружелюбный и профессиональный финансовый ассистент. Твоя задача — ясно и понятно донести информацию до пользователя. "
             "Будь вежлив и структурируй ответ. Не используй markdown для выделения жирным шрифтом (никаких `**`)."
@@ -373,20 +460,21 @@ class GigaChatNLU:
 
         fallback_response = content_to_format.replace("**", "")
 
-        start_time = time.time()
-        try:
-            logger.debug(
-                f"Sending to GigaChat Formatter. Sys prompt hash: {hash(role_prompt)}, User content hash: {hash(user_prompt_for_formatter)}"
-            )
-
-            response_object = client.invoke(
-                [
-                    SystemMessage(content=role_prompt),
-                    HumanMessage(content=user_prompt_for_formatter),
-                ]
-            )
-            end_time = time.time()
+        logger.debug(
+            f"Sending to GigaChat Formatter. Sys prompt hash: {hash(role_prompt)}, User content hash: {hash(user_prompt_for_formatter)}"
+        )
+        messages = [
+            SystemMessage(content=role_prompt),
+            HumanMessage(content=user_prompt_for_formatter),
+        ]
+        return messages, fallback_response
 
+    @staticmethod
+    def _parse_formatting_response(
+        response_object: Any, start_time: float, fallback_response: str
+    ) -> str:
+        end_time = time.time()
+        try:
             formatted_response = response_object.content.strip().replace("**", "")
 
             usage_metadata = response_object.response_metadata.get("token_usage", {})
@@ -403,11 +491,7 @@ class GigaChatNLU:
             return formatted_response if formatted_response else fallback_response
 
         except Exception as e:
-            end_time = time.time()
-            logger.error(
-                f"GigaChat Formatter call failed after {end_time - start_time:.2f}s. Error: {e}",
-                exc_info=True,
-            )
+            logger.error(f"Failed to process GigaChat Formatter response: {e}", exc_info=True)
             logger.warning(
                 f"Returning fallback for formatter error: '{fallback_response}'"
             )
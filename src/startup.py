@@ -0,0 +1,116 @@
+# src/startup.py
+"""
+Прогрев при старте бота: браузеры, клиенты GigaChat, справочники и
+ключевая ставка готовятся до того, как придет первый ИНН.
+
+Прогрев ограничен бюджетом времени (settings.STARTUP_WARMUP_BUDGET).
+Если бюджет исчерпан, бот начинает работу, а незавершенные шаги
+доделываются в фоне. Флаг is_ready() выставляется, когда все шаги завершены.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.browser.driver_pool import get_headless_pool
+from src.browser.driver_resolver import benchmark_resolution, resolve_chromedriver_path
+from src.browser.playwright_pool import get_playwright_pool
+from src.browser.supervisor import kill_orphaned_browsers
+from src.config import settings
+from src.data_index import load_data_index
+from parser.forecast_generator import build_indexes as build_forecast_indexes
+from src.nlu.gigachat_client import GigaChatNLU
+from src.tools.key_rate_service import get_key_rate_service
+from src.tools.sez_registry import get_sez_registry
+
+logger = logging.getLogger(__name__)
+
+_ready = False
+_timings: Dict[str, Optional[float]] = {}
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def get_warmup_timings() -> Dict[str, Optional[float]]:
+    """Время каждого шага прогрева (сек.); None - шаг завершился ошибкой."""
+    return dict(_timings)
+
+
+def _warm_selenium() -> None:
+    # Сначала убираем браузеры, оставшиеся от прошлых падений
+    kill_orphaned_browsers()
+    # Драйвер ищется один раз, затем запускаются "теплые" браузеры пула
+    resolve_chromedriver_path()
+    if settings.STARTUP_CHROMEDRIVER_BENCHMARK:
+        benchmark_resolution()
+    get_headless_pool().warm_up(settings.STARTUP_SELENIUM_WARM_DRIVERS)
+
+
+def _warm_gigachat(giga_nlu: GigaChatNLU) -> None:
+    giga_nlu._get_client("extraction")
+    giga_nlu._get_client("formatting")
+
+
+def _warm_data() -> None:
+    load_data_index()
+    logger.info(f"[Прогрев] Индексы прогнозов цен: {build_forecast_indexes()}")
+
+
+def _warm_key_rate() -> None:
+    rate, date = get_key_rate_service().current()
+    if not rate:
+        raise RuntimeError("ключевая ставка не получена")
+
+
+async def _timed(name: str, step: Callable[[], Any]) -> None:
+    start_time = time.monotonic()
+    try:
+        result = step()
+        if asyncio.iscoroutine(result):
+            await result
+        _timings[name] = time.monotonic() - start_time
+        logger.info(f"[Прогрев] '{name}' готов за {_timings[name]:.2f} сек.")
+    except Exception as e:
+        _timings[name] = None
+        logger.warning(f"[Прогрев] '{name}' не выполнен: {e}")
+
+
+def _on_all_done(started: float) -> None:
+    global _ready
+    _ready = True
+    logger.info(
+        f"[Прогрев] Завершен за {time.monotonic() - started:.2f} сек. Бот полностью готов."
+    )
+
+
+async def warm_up(giga_nlu: GigaChatNLU, budget: Optional[float] = None) -> bool:
+    """
+    Запускает все шаги прогрева параллельно и ждет не дольше budget секунд.
+    Возвращает True, если прогрев уложился в бюджет.
+    """
+    if budget is None:
+        budget = settings.STARTUP_WARMUP_BUDGET
+    started = time.monotonic()
+    steps = {
+        "selenium": lambda: asyncio.to_thread(_warm_selenium),
+        "playwright": lambda: get_playwright_pool().start(),
+        "gigachat": lambda: asyncio.to_thread(_warm_gigachat, giga_nlu),
+        "data": lambda: asyncio.to_thread(_warm_data),
+        "key_rate": lambda: asyncio.to_thread(_warm_key_rate),
+        "sez_registry": lambda: asyncio.to_thread(get_sez_registry().load),
+    }
+    tasks = [asyncio.create_task(_timed(name, step)) for name, step in steps.items()]
+    all_done = asyncio.gather(*tasks)
+    all_done.add_done_callback(lambda _: _on_all_done(started))
+
+    _, pending = await asyncio.wait(tasks, timeout=budget)
+    if pending:
+        logger.warning(
+            f"[Прогрев] Бюджет {budget} сек. исчерпан, незавершенных шагов: {len(pending)}. "
+            "Продолжаю их в фоне."
+        )
+        return False
+    return True
@@ -0,0 +1,81 @@
+# src/tools/dossier_cache.py
+"""
+Кэш досье компании по ИНН. У каждого поля свой срок жизни:
+
+- full_cheko_data (checko.ru)     - сутки;
+- egrul_record (ЕГРЮЛ)            - неделя;
+- msp_category (реестр МСП)       - до ближайшего ежемесячного обновления реестра (10-е число).
+
+Ключевая ставка общая для всех компаний и берется из src/tools/key_rate_service.py.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+
+logger = logging.getLogger(__name__)
+
+
+def next_msp_registry_update(now: datetime) -> datetime:
+    """Реестр МСП обновляется 10-го числа каждого месяца."""
+    day = settings.MSP_REGISTRY_UPDATE_DAY
+    candidate = now.replace(day=day, hour=0, minute=0, second=0, microsecond=0)
+    if candidate <= now:
+        month_start = (now.replace(day=1) + timedelta(days=32)).replace(day=1)
+        candidate = month_start.replace(day=day, hour=0, minute=0, second=0, microsecond=0)
+    return candidate
+
+
+FIELD_EXPIRY: Dict[str, Callable[[datetime], datetime]] = {
+    "full_cheko_data": lambda now: now + timedelta(days=1),
+    "egrul_record": lambda now: now + timedelta(days=7),
+    "msp_category": next_msp_registry_update,
+}
+
+
+class DossierCache:
+    def __init__(self):
+        self._store = JsonFileCache("dossiers")
+
+    def get_fields(
+        self, inn: str, fields: Iterable[str]
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """Возвращает свежие значения полей и их возраст в секундах."""
+        now = time.time()
+        values, ages = {}, {}
+        for field in fields:
+            entry = (self._store.load(inn) or {}).get(field)
+            if entry and entry["expires_at"] > now:
+                values[field] = entry["value"]
+                ages[field] = now - entry["fetched_at"]
+        return values, ages
+
+    def put(self, inn: str, field: str, value: Any) -> None:
+        expiry = FIELD_EXPIRY.get(field)
+        if expiry is None:
+            return
+        now = datetime.now()
+        record = dict(self._store.load(inn) or {})
+        record[field] = {
+            "value": value,
+            "fetched_at": now.timestamp(),
+            "expires_at": expiry(now).timestamp(),
+        }
+        self._store.save(inn, record)
+
+    def invalidate(self, inn: str) -> None:
+        self._store.delete(inn)
+
+
+_cache: Optional[DossierCache] = None
+
+
+def get_dossier_cache() -> DossierCache:
+    global _cache
+    if _cache is None:
+        _cache = DossierCache()
+    return _cache
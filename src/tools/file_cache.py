@@ -0,0 +1,75 @@
+# src/tools/file_cache.py
+"""
+Простое файловое хранилище кэшей: одна запись = один JSON-файл в
+settings.CACHE_DIR/<имя кэша>/. Записи дублируются в памяти, запись на
+диск атомарная (через временный файл), поэтому кэш переживает перезапуск
+бота и не портится при падении посреди записи.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SAFE_KEY = re.compile(r"^[\w.-]{1,100}$")
+
+
+class JsonFileCache:
+    def __init__(self, name: str):
+        self.name = name
+        self.directory = os.path.join(settings.CACHE_DIR, name)
+        self._memory: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        filename = key if _SAFE_KEY.match(key) else hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{filename}.json")
+
+    def load(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            path = self._path(key)
+            if not os.path.exists(path):
+                return None
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"[Кэш '{self.name}'] Не удалось прочитать {path}: {e}")
+                return None
+            self._memory[key] = data
+            return data
+
+    def save(self, key: str, data: Any) -> None:
+        with self._lock:
+            self._memory[key] = data
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path(key))
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"[Кэш '{self.name}'] Не удалось сохранить '{key}': {e}")
+
+    def evict(self, key: str) -> None:
+        """Убирает запись только из памяти (файл остается; load прочитает его снова)."""
+        with self._lock:
+            self._memory.pop(key, None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,57 @@
+# src/tools/http_session.py
+"""
+Общая асинхронная HTTP-сессия (aiohttp) для запросов к реестрам без браузера.
+
+Сессия держит пул keep-alive соединений, поэтому повторные запросы
+к одному сайту не тратят время на новое TCP/TLS-соединение.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept-Language": "ru-RU,ru;q=0.9",
+}
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Возвращает сессию, привязанную к текущему event loop.
+    Если скрипт запускает новый цикл (asyncio.run), создается новая сессия.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            headers=DEFAULT_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=settings.HTTP_DEFAULT_TIMEOUT),
+        )
+        _session_loop = loop
+        logger.debug("[HTTP] Создана общая aiohttp-сессия.")
+    return _session
+
+
+async def close_http_session() -> None:
+    global _session, _session_loop
+    if _session is not None and not _session.closed and _session_loop is asyncio.get_running_loop():
+        await _session.close()
+        logger.info("[HTTP] Общая aiohttp-сессия закрыта.")
+    _session = None
+    _session_loop = None
@@ -0,0 +1,116 @@
+# src/tools/industry_cache.py
+"""
+Кэш отраслевой аналитики (src/web_news_analyzer.py) по ОКВЭД.
+
+Аналитика зависит только от отрасли, поэтому результат общий для всех
+компаний с тем же основным ОКВЭД и хранится settings.INDUSTRY_ANALYSIS_TTL
+секунд (в памяти и в settings.CACHE_DIR/industry_analysis/).
+
+Кэш ведет счетчик запросов по каждому ОКВЭД. Ночная задача
+run_nightly_precompute() заранее пересчитывает аналитику для
+settings.INDUSTRY_PRECOMPUTE_TOP самых частых отраслей, у которых она
+устарела или устареет в ближайшие сутки.
+
+put() и record_request() пишут JSON-файлы, поэтому из асинхронного кода
+вызываются через asyncio.to_thread.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+
+logger = logging.getLogger(__name__)
+
+_TRAFFIC_KEY = "_traffic"
+_OKVED_CODE = re.compile(r"^\d{2}(\.\d{1,2}){0,2}$")
+
+
+def normalize_okved(okved_code: Optional[str], okved_description: str) -> str:
+    """Ключ кэша: код ОКВЭД ("01.11"), а если его нет - нормализованное название отрасли."""
+    code = (okved_code or "").strip()
+    if _OKVED_CODE.match(code):
+        return code
+    description = re.sub(r"[^\w\s]", " ", okved_description.lower().replace("ё", "е"))
+    return " ".join(description.split())
+
+
+class IndustryAnalysisCache:
+    def __init__(self):
+        self._store = JsonFileCache("industry_analysis")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._store.load(key)
+        if entry and time.time() - entry["computed_at"] < settings.INDUSTRY_ANALYSIS_TTL:
+            return entry["result"]
+        return None
+
+    def put(self, key: str, okved_description: str, result: Dict[str, Any]) -> None:
+        self._store.save(
+            key,
+            {"result": result, "okved_description": okved_description, "computed_at": time.time()},
+        )
+
+    def record_request(self, key: str, okved_description: str) -> None:
+        with self._lock:
+            traffic = dict(self._store.load(_TRAFFIC_KEY) or {})
+            stats = traffic.get(key) or {"count": 0}
+            traffic[key] = {"count": stats["count"] + 1, "okved_description": okved_description}
+            self._store.save(_TRAFFIC_KEY, traffic)
+
+    def most_requested(self, limit: int) -> List[Dict[str, Any]]:
+        traffic = self._store.load(_TRAFFIC_KEY) or {}
+        ranked = sorted(traffic.items(), key=lambda item: item[1]["count"], reverse=True)
+        return [{"key": key, **stats} for key, stats in ranked[:limit]]
+
+    def expires_within(self, key: str, seconds: float) -> bool:
+        entry = self._store.load(key)
+        if not entry:
+            return True
+        return time.time() + seconds - entry["computed_at"] >= settings.INDUSTRY_ANALYSIS_TTL
+
+
+def _seconds_until(hour: int) -> float:
+    now = datetime.now()
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+async def run_nightly_precompute(
+    compute: Callable[[str, str], Awaitable[Optional[Dict[str, Any]]]]
+) -> None:
+    """
+    Фоновая задача бота. compute(key, okved_description) пересчитывает аналитику
+    и кладет ее в кэш (см. web_news_analyzer.refresh_industry_analysis).
+    """
+    cache = get_industry_cache()
+    while True:
+        await asyncio.sleep(_seconds_until(settings.INDUSTRY_PRECOMPUTE_HOUR))
+        top = cache.most_requested(settings.INDUSTRY_PRECOMPUTE_TOP)
+        # Обновляем то, что устареет до следующего ночного прогона
+        due = [item for item in top if cache.expires_within(item["key"], 24 * 3600)]
+        logger.info(f"[Отраслевая аналитика] Ночной пересчет: {len(due)} из {len(top)} частых ОКВЭД.")
+        for item in due:
+            try:
+                await compute(item["key"], item["okved_description"])
+            except Exception as e:
+                logger.error(f"[Отраслевая аналитика] Ошибка пересчета для '{item['key']}': {e}")
+
+
+_cache: Optional[IndustryAnalysisCache] = None
+
+
+def get_industry_cache() -> IndustryAnalysisCache:
+    global _cache
+    if _cache is None:
+        _cache = IndustryAnalysisCache()
+    return _cache
@@ -0,0 +1,158 @@
+# src/tools/inn_set.py
+"""
+Компактное множество ИНН в файле, отображаемом в память (mmap).
+
+ИНН хранятся отсортированным массивом int64 (8 байт на запись вместо
+~60-70 байт у строки в set), поиск - двоичный, O(log n). Перед массивом
+может лежать фильтр Блума: для ИНН, которых в реестре нет (а это почти все
+запросы), он отвечает "нет" без обращения к массиву.
+
+Файл открывается только на чтение, поэтому страницы mmap общие для всех
+процессов, открывших тот же файл, и память не растет с числом воркеров.
+Файл строится парсерами реестров через build_inn_set() и подменяется
+атомарно; уже открытые InnSet продолжают читать свою (старую) копию.
+
+Формат файла (little-endian):
+    заголовок: magic(8) | count(u64) | bloom_bits(u64) | bloom_hashes(u64)
+    фильтр Блума: ceil(bloom_bits / 64) слов u64
+    ИНН: count значений int64 по возрастанию
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Iterable, Iterator, Optional
+
+_MAGIC = b"INNSET01"
+_HEADER = struct.Struct("<8sQQQ")
+# 10- и 12-значные ИНН не должны совпасть после int(): "0123456789" и "000123456789"
+_LEN12_OFFSET = 10 ** 12
+_MASK64 = (1 << 64) - 1
+
+
+class InnSetError(Exception):
+    pass
+
+
+def encode_inn(inn: str) -> Optional[int]:
+    """ИНН -> int64 (None, если это не 10- или 12-значный ИНН)."""
+    inn = inn.strip()
+    if len(inn) not in (10, 12) or not inn.isdigit():
+        return None
+    return int(inn) + (_LEN12_OFFSET if len(inn) == 12 else 0)
+
+
+def decode_inn(value: int) -> str:
+    if value >= _LEN12_OFFSET:
+        return f"{value - _LEN12_OFFSET:012d}"
+    return f"{value:010d}"
+
+
+def _bloom_positions(value: int, bits: int, hashes: int) -> Iterator[int]:
+    # Двойное хэширование (Kirsch-Mitzenmacher) поверх двух перемешиваний ключа
+    h1 = (value * 0x9E3779B97F4A7C15) & _MASK64
+    h2 = ((value ^ (value >> 29)) * 0xBF58476D1CE4E5B9 & _MASK64) | 1
+    for i in range(hashes):
+        yield ((h1 + i * h2) & _MASK64) % bits
+
+
+def _as_little_endian(values: array) -> array:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def build_inn_set(path: str, inns: Iterable[str], bloom_bits_per_item: int = 10) -> int:
+    """
+    Строит файл множества ИНН. Некорректные ИНН пропускаются.
+    bloom_bits_per_item=0 - без фильтра Блума (10 бит дают ~1% ложных срабатываний).
+    Возвращает число записанных ИНН.
+    """
+    values = sorted({code for code in map(encode_inn, inns) if code is not None})
+    count = len(values)
+
+    bloom_bits = count * bloom_bits_per_item if count and bloom_bits_per_item > 0 else 0
+    bloom_hashes = max(1, round(bloom_bits_per_item * 0.693)) if bloom_bits else 0
+    bloom = array("Q", bytes(8 * ((bloom_bits + 63) // 64)))
+    for value in values if bloom_bits else ():
+        for position in _bloom_positions(value, bloom_bits, bloom_hashes):
+            bloom[position >> 6] |= 1 << (position & 63)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, count, bloom_bits, bloom_hashes))
+            _as_little_endian(bloom).tofile(f)
+            _as_little_endian(array("q", values)).tofile(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+class InnSet:
+    """
+    Множество ИНН только для чтения поверх файла из build_inn_set().
+    use_bloom=True включает проверку по фильтру Блума перед двоичным поиском:
+    это выгодно, когда массив не помещается в кэш страниц (миллионы ИНН);
+    для массива, целиком лежащего в памяти, двоичный поиск быстрее сам по себе.
+    """
+
+    def __init__(self, path: str, use_bloom: bool = False):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise InnSetError(f"Файл {path} поврежден: нет заголовка.")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, bloom_bits, bloom_hashes = _HEADER.unpack_from(self._mmap, 0)
+        bloom_size = 8 * ((bloom_bits + 63) // 64)
+        if magic != _MAGIC or size != _HEADER.size + bloom_size + 8 * count:
+            self._mmap.close()
+            raise InnSetError(f"Файл {path} не является множеством ИНН или поврежден.")
+        if sys.byteorder != "little":
+            self._mmap.close()
+            raise InnSetError("Чтение множества ИНН поддерживается только на little-endian.")
+
+        self._count = count
+        self._bloom_bits = bloom_bits if use_bloom else 0
+        self._bloom_hashes = bloom_hashes
+        self._view = memoryview(self._mmap)
+        self._bloom = self._view[_HEADER.size:_HEADER.size + bloom_size].cast("Q")
+        self._values = self._view[_HEADER.size + bloom_size:].cast("q")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, inn: object) -> bool:
+        if not isinstance(inn, str):
+            return False
+        value = encode_inn(inn)
+        if value is None or not self._count:
+            return False
+        if self._bloom_bits:
+            bloom = self._bloom
+            for position in _bloom_positions(value, self._bloom_bits, self._bloom_hashes):
+                if not bloom[position >> 6] >> (position & 63) & 1:
+                    return False
+        index = bisect.bisect_left(self._values, value)
+        return index < self._count and self._values[index] == value
+
+    def __iter__(self) -> Iterator[str]:
+        return (decode_inn(value) for value in self._values)
+
+    def close(self) -> None:
+        self._bloom.release()
+        self._values.release()
+        self._view.release()
+        self._mmap.close()
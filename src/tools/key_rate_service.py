@@ -0,0 +1,165 @@
+# src/tools/key_rate_service.py
+"""
+Сервис ключевой ставки ЦБ.
+
+Вся история ставки (с 17.09.2013) хранится в памяти как отсортированный по
+дате ряд, поэтому текущая ставка и ставка на любую дату отдаются без
+обращения к сайту. Ряд сохраняется на диск (settings.CACHE_DIR/key_rate/)
+и после перезапуска бота сразу доступен.
+
+Фоновая задача run_refresher() дозагружает свежие дни по расписанию: каждые
+settings.KEY_RATE_REFRESH_INTERVAL секунд и вскоре после каждого заседания
+Совета директоров ЦБ (settings.CBR_KEY_RATE_DECISION_DATES).
+"""
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from parser import cb
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+
+logger = logging.getLogger(__name__)
+
+_DATE_FORMAT = "%d.%m.%Y"
+_STORE_KEY = "series"
+_warned_calendar_ended = False
+
+
+def next_key_rate_decision(now: datetime) -> datetime:
+    """Ближайшее заседание ЦБ по ставке (решение публикуется в 13:30)."""
+    global _warned_calendar_ended
+    for date_str in settings.CBR_KEY_RATE_DECISION_DATES:
+        decision = datetime.strptime(date_str, "%Y-%m-%d").replace(hour=13, minute=30)
+        if decision > now:
+            return decision
+    # Календарь не заполнен на будущее - перепроверяем раз в неделю
+    if not _warned_calendar_ended:
+        _warned_calendar_ended = True
+        logger.warning(
+            "[Ключевая ставка] Последнее заседание ЦБ из settings.CBR_KEY_RATE_DECISION_DATES уже прошло: "
+            "ставка больше не перепроверяется сразу после решения. Добавьте даты из календаря ЦБ."
+        )
+    return now + timedelta(days=7)
+
+
+class KeyRateService:
+    def __init__(self):
+        self._store = JsonFileCache("key_rate")
+        self._lock = threading.Lock()
+        # Параллельные списки, отсортированные по возрастанию даты
+        self._dates: List[date] = []
+        self._rates: List[str] = []
+        self._fetched_at = 0.0
+        self._loaded = False
+
+    # --- Чтение (только память) ---
+
+    def _load_from_disk(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            stored = self._store.load(_STORE_KEY)
+            if not stored:
+                return
+            self._set_series(stored["series"], stored["fetched_at"])
+        logger.info(f"[Ключевая ставка] История загружена с диска: {len(self._dates)} значений.")
+
+    def _set_series(self, series: List[Tuple[str, str]], fetched_at: float) -> None:
+        rows = sorted(
+            (datetime.strptime(date_str, _DATE_FORMAT).date(), rate) for date_str, rate in series
+        )
+        self._dates = [row[0] for row in rows]
+        self._rates = [row[1] for row in rows]
+        self._fetched_at = fetched_at
+
+    def current(self) -> Tuple[Optional[str], Optional[str]]:
+        """Актуальная ставка: (ставка, дата) или (None, None), как parser.cb.get_cbr_key_rate."""
+        self._load_from_disk()
+        if not self._dates:
+            # Истории нет ни в памяти, ни на диске - единственный случай похода на сайт
+            self.refresh()
+        with self._lock:
+            if not self._dates:
+                return None, None
+            return self._rates[-1], self._dates[-1].strftime(_DATE_FORMAT)
+
+    async def current_async(self) -> Tuple[Optional[str], Optional[str]]:
+        if self._dates:
+            return self.current()
+        return await asyncio.to_thread(self.current)
+
+    def rate_on(self, day: date) -> Tuple[Optional[str], Optional[str]]:
+        """Ставка, действовавшая на дату day: (ставка, дата значения) или (None, None)."""
+        self._load_from_disk()
+        with self._lock:
+            index = bisect.bisect_right(self._dates, day) - 1
+            if index < 0:
+                return None, None
+            return self._rates[index], self._dates[index].strftime(_DATE_FORMAT)
+
+    def age(self) -> Optional[float]:
+        """Сколько секунд прошло с последней успешной загрузки."""
+        return time.time() - self._fetched_at if self._fetched_at else None
+
+    # --- Обновление ---
+
+    def refresh(self) -> bool:
+        """
+        Дозагружает ряд с сайта ЦБ: при пустой истории - целиком,
+        иначе начиная с последней известной даты.
+        """
+        self._load_from_disk()
+        with self._lock:
+            last_date = self._dates[-1] if self._dates else None
+        date_from = last_date.strftime(_DATE_FORMAT) if last_date else cb.KEY_RATE_HISTORY_START
+        fresh = cb.fetch_key_rate_series(date_from, date.today().strftime(_DATE_FORMAT))
+        if not fresh:
+            logger.warning("[Ключевая ставка] Не удалось обновить историю, использую имеющуюся.")
+            return False
+
+        with self._lock:
+            merged = {d.strftime(_DATE_FORMAT): rate for d, rate in zip(self._dates, self._rates)}
+            merged.update(dict(fresh))
+            previous_rate = self._rates[-1] if self._rates else None
+            self._set_series(list(merged.items()), time.time())
+            latest_rate, latest_date = self._rates[-1], self._dates[-1].strftime(_DATE_FORMAT)
+            snapshot = {"series": list(merged.items()), "fetched_at": self._fetched_at}
+        self._store.save(_STORE_KEY, snapshot)
+
+        if previous_rate and previous_rate != latest_rate:
+            logger.info(f"[Ключевая ставка] Ставка изменилась: {previous_rate}% -> {latest_rate}%.")
+        logger.info(f"[Ключевая ставка] История обновлена, актуальная ставка {latest_rate}% на {latest_date}.")
+        return True
+
+    def _seconds_until_next_refresh(self) -> float:
+        now = datetime.now()
+        decision = next_key_rate_decision(now) + timedelta(seconds=settings.KEY_RATE_DECISION_REFRESH_DELAY)
+        return min(settings.KEY_RATE_REFRESH_INTERVAL, (decision - now).total_seconds())
+
+    async def run_refresher(self) -> None:
+        """Фоновая задача бота: обновляет ряд по расписанию."""
+        while True:
+            try:
+                ok = await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"[Ключевая ставка] Ошибка при обновлении: {e}")
+                ok = False
+            delay = self._seconds_until_next_refresh() if ok else settings.KEY_RATE_RETRY_INTERVAL
+            await asyncio.sleep(max(delay, 1))
+
+
+_service: Optional[KeyRateService] = None
+
+
+def get_key_rate_service() -> KeyRateService:
+    global _service
+    if _service is None:
+        _service = KeyRateService()
+    return _service
@@ -1,19 +1,155 @@
 # src/tools/msh_limits_tool.py
+"""
+Единый источник лимитов субсидий МСХ (PDF с сайта Минсельхоза).
+
+Лимиты отдаются из памяти. Раз в settings.MSH_LIMITS_TTL секунд проверяется,
+не изменился ли файл:
+- ссылка на PDF ищется сначала по HTTP, браузер нужен только при неудаче;
+- если ссылка прежняя, PDF не запрашивается вовсе; только раз в
+  settings.MSH_LIMITS_PDF_RECHECK секунд он запрашивается условно
+  (ETag/Last-Modified) на случай замены файла по той же ссылке, и при
+  ответе 304 ничего не скачивается;
+- если содержимое совпало по хэшу, PDF не разбирается заново.
+
+Пока идет проверка, читатели получают прежние данные. Состояние сохраняется
+на диск, поэтому после перезапуска бота лимиты доступны сразу.
+"""
+
 import asyncio
-from parser.msx_limit import get_subsidy_limits
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+
+from parser import msx_limit
+from src.browser.scheduler import get_browser_scheduler
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+from src.tools.single_flight import coalesce
+
+logger = logging.getLogger(__name__)
+
+_STORE_KEY = "limits"
+
+
+class MshLimitsProvider:
+    def __init__(self):
+        self._store = JsonFileCache("msh_limits")
+        self._lock = threading.Lock()
+        self._state: Optional[dict] = None
+        self._loaded = False
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._stats = {"checks": 0, "same_url": 0, "not_modified": 0, "same_hash": 0, "parsed": 0}
+
+    def _load_from_disk(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self._state = self._store.load(_STORE_KEY)
+
+    def _is_fresh(self) -> bool:
+        return bool(self._state) and time.time() - self._state["checked_at"] < settings.MSH_LIMITS_TTL
+
+    async def get(self) -> dict | None:
+        self._load_from_disk()
+        if self._is_fresh():
+            return self._state["data"]
+        if self._state and self._state.get("data"):
+            # Отдаем прежние данные сразу, проверку обновления запускаем в фоне
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self.refresh())
+            return self._state["data"]
+        return await self.refresh()
+
+    @coalesce("msh_limits_refresh")
+    async def refresh(self) -> dict | None:
+        """Проверяет PDF на сайте и при изменении разбирает его заново."""
+        self._load_from_disk()
+        with self._lock:
+            self._stats["checks"] += 1
+        pdf_url = await asyncio.to_thread(msx_limit.find_pdf_url_http)
+        if not pdf_url:
+            # Ссылка появляется только после JS - нужен браузер
+            async with get_browser_scheduler().slot("mcx.gov.ru", owner="msh_limits"):
+                pdf_url = await asyncio.to_thread(msx_limit.find_pdf_url_selenium)
+        if not pdf_url:
+            logger.warning("[Лимиты МСХ] Ссылка на PDF не найдена, использую прежние данные.")
+            return self._state["data"] if self._state else None
+
+        return await asyncio.to_thread(self._refresh_from_url, pdf_url)
+
+    def _refresh_from_url(self, pdf_url: str) -> dict | None:
+        state = self._state or {}
+        same_url = state.get("pdf_url") == pdf_url and state.get("data")
+        if same_url and time.time() - state.get("pdf_checked_at", 0) < settings.MSH_LIMITS_PDF_RECHECK:
+            self._count("same_url")
+            logger.info("[Лимиты МСХ] Ссылка на PDF прежняя, скачивание не нужно.")
+            self._save_state({**state, "checked_at": time.time()})
+            return state["data"]
+
+        downloaded = msx_limit.download_pdf(
+            pdf_url,
+            etag=state.get("etag") if same_url else None,
+            last_modified=state.get("last_modified") if same_url else None,
+        )
+        if downloaded is None:
+            return state.get("data")
+
+        new_state = {
+            **state,
+            "pdf_url": pdf_url,
+            "etag": downloaded["etag"],
+            "last_modified": downloaded["last_modified"],
+            "checked_at": time.time(),
+            "pdf_checked_at": time.time(),
+        }
+        content = downloaded["content"]
+        if content is None:
+            self._count("not_modified")
+            logger.info("[Лимиты МСХ] PDF не изменился (304), разбор не нужен.")
+        else:
+            content_hash = hashlib.sha256(content).hexdigest()
+            if content_hash == state.get("content_hash") and state.get("data"):
+                self._count("same_hash")
+                logger.info("[Лимиты МСХ] Содержимое PDF прежнее (хэш совпал), разбор не нужен.")
+            else:
+                data = msx_limit.parse_limits_pdf(content)
+                if not data:
+                    return state.get("data")
+                self._count("parsed")
+                new_state.update({"data": data, "content_hash": content_hash})
+                logger.info(f"[Лимиты МСХ] Загружены новые лимиты: {len(data)} регионов.")
+
+        self._save_state(new_state)
+        return new_state.get("data")
+
+    def _save_state(self, new_state: dict) -> None:
+        with self._lock:
+            self._state = new_state
+        self._store.save(_STORE_KEY, new_state)
+
+    def _count(self, metric: str) -> None:
+        with self._lock:
+            self._stats[metric] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_provider: Optional[MshLimitsProvider] = None
+
+
+def get_msh_limits_provider() -> MshLimitsProvider:
+    global _provider
+    if _provider is None:
+        _provider = MshLimitsProvider()
+    return _provider
 
-# Здесь можно реализовать кэширование, чтобы не парсить PDF каждый раз
-_cached_limits = None
 
 async def get_msh_limits_data() -> dict | None:
     """
-    Получает (возможно, из кэша) полные данные о лимитах МСХ.
+    Полные данные о лимитах МСХ из памяти (см. MshLimitsProvider).
     """
-    global _cached_limits
-    if _cached_limits:
-        return _cached_limits
-    
-    limits = await asyncio.to_thread(get_subsidy_limits)
-    if limits:
-        _cached_limits = limits
-    return limits
\ No newline at end of file
+    return await get_msh_limits_provider().get()
@@ -0,0 +1,99 @@
+# src/tools/news_digest.py
+"""
+Фоновый дайджест отраслевых новостей: подборка агроинвестора и прогнозы РИА.
+
+Новости не зависят от компании, поэтому они собираются не при каждом
+анализе ИНН, а фоновой задачей run_refresher() раз в
+settings.NEWS_DIGEST_REFRESH_INTERVAL секунд. Последний успешный снимок
+каждого источника хранится в памяти и на диске (settings.CACHE_DIR/news_digest/),
+анализ читает его мгновенно.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from parser.agro_news_parser import get_latest_agro_news
+from parser.ria_news_parser import get_ria_news_async
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+
+logger = logging.getLogger(__name__)
+
+SOURCES: Dict[str, Callable[[], Awaitable[dict]]] = {
+    "agroinvestor": get_latest_agro_news,
+    "ria": get_ria_news_async,
+}
+
+
+class NewsDigestService:
+    def __init__(self):
+        self._store = JsonFileCache("news_digest")
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _kick(self, source: str) -> None:
+        """Запускает разовое обновление источника в фоне (если фоновая задача не запущена)."""
+        task = self._pending.get(source)
+        if task and not task.done():
+            return
+        try:
+            self._pending[source] = asyncio.get_running_loop().create_task(self.refresh_source(source))
+        except RuntimeError:
+            pass
+
+    def snapshot(self, source: str) -> dict:
+        """
+        Последний успешный отчет источника в формате парсера
+        ({"status": "success", "data": [...]}) или отчет об ошибке, если снимка еще нет.
+        """
+        entry = self._store.load(source)
+        if not entry:
+            self._kick(source)
+            return {"status": "failure", "error": "Новости еще загружаются, попробуйте позже."}
+        return entry["report"]
+
+    def age(self, source: str) -> Optional[float]:
+        entry = self._store.load(source)
+        return time.time() - entry["fetched_at"] if entry else None
+
+    async def refresh_source(self, source: str) -> bool:
+        start_time = time.monotonic()
+        try:
+            report = await SOURCES[source]()
+        except Exception as e:
+            logger.error(f"[Дайджест новостей] Ошибка источника '{source}': {e}")
+            return False
+        if report.get("status") != "success":
+            # Прежний снимок остается в силе
+            logger.warning(f"[Дайджест новостей] Источник '{source}' не ответил: {report.get('error')}")
+            return False
+        self._store.save(source, {"report": report, "fetched_at": time.time()})
+        logger.info(
+            f"[Дайджест новостей] '{source}' обновлен за {time.monotonic() - start_time:.1f} сек.: "
+            f"{len(report.get('data', []))} новостей."
+        )
+        return True
+
+    async def _run_source(self, source: str) -> None:
+        interval = settings.NEWS_DIGEST_REFRESH_INTERVAL
+        while True:
+            age = self.age(source)
+            if age is not None and age < interval:
+                await asyncio.sleep(interval - age)
+            if not await self.refresh_source(source):
+                await asyncio.sleep(settings.NEWS_DIGEST_RETRY_INTERVAL)
+
+    async def run_refresher(self) -> None:
+        """Фоновая задача бота: обновляет все источники по расписанию (независимо друг от друга)."""
+        await asyncio.gather(*(self._run_source(source) for source in SOURCES))
+
+
+_service: Optional[NewsDigestService] = None
+
+
+def get_news_digest_service() -> NewsDigestService:
+    global _service
+    if _service is None:
+        _service = NewsDigestService()
+    return _service
@@ -0,0 +1,268 @@
+# src/tools/page_cache.py
+"""
+Дисковый кэш загруженных страниц (статьи агроинвестора, РИА и сайтов из поиска).
+
+Хранилище - SQLite в settings.CACHE_DIR/pages.sqlite:
+- pages: URL -> хэш тела, время загрузки, последнего обращения, ETag/Last-Modified;
+- bodies: хэш -> тело, сжатое zlib. Одинаковые страницы под разными URL
+  хранятся один раз.
+
+Срок свежести задается по домену (settings.PAGE_CACHE_DOMAIN_TTL). Устаревшая
+страница с ETag/Last-Modified перепроверяется условным запросом (304 - тело
+не скачивается). Когда объем превышает settings.PAGE_CACHE_MAX_MB, удаляются
+давно не запрошенные страницы (LRU).
+
+Статистика (доля попаданий, сэкономленные байты) - get_page_cache_stats().
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+from urllib.parse import urlparse
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access);
+CREATE INDEX IF NOT EXISTS pages_body_hash ON pages (body_hash);
+"""
+
+
+@dataclass
+class CachedPage:
+    body: str
+    fetched_at: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+
+def ttl_for(url: str) -> float:
+    host = (urlparse(url).hostname or "").lower()
+    for domain, ttl in settings.PAGE_CACHE_DOMAIN_TTL.items():
+        if host == domain or host.endswith("." + domain):
+            return ttl
+    return settings.PAGE_CACHE_DEFAULT_TTL
+
+
+class PageCache:
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.path.join(settings.CACHE_DIR, "pages.sqlite")
+        self.max_bytes = max_bytes if max_bytes is not None else settings.PAGE_CACHE_MAX_MB * 1024 * 1024
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._stored_bytes = self._db.execute("SELECT COALESCE(SUM(stored_size), 0) FROM bodies").fetchone()[0]
+        self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "bytes_saved": 0, "evicted": 0}
+
+    def _count(self, metric: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[metric] += value
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Страница из кэша (в том числе устаревшая - см. поле fresh) или None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT b.data, p.fetched_at, p.etag, p.last_modified FROM pages p "
+                "JOIN bodies b ON b.hash = p.body_hash WHERE p.url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        data, fetched_at, etag, last_modified = row
+        return CachedPage(
+            body=zlib.decompress(data).decode("utf-8"),
+            fetched_at=fetched_at,
+            etag=etag,
+            last_modified=last_modified,
+            fresh=time.time() - fetched_at < ttl_for(url),
+        )
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        raw = body.encode("utf-8")
+        body_hash = hashlib.sha256(raw).hexdigest()
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT body_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            exists = self._db.execute("SELECT 1 FROM bodies WHERE hash = ?", (body_hash,)).fetchone()
+            if not exists:
+                data = zlib.compress(raw, 6)
+                self._db.execute(
+                    "INSERT INTO bodies (hash, data, size, stored_size) VALUES (?, ?, ?, ?)",
+                    (body_hash, data, len(raw), len(data)),
+                )
+                self._stored_bytes += len(data)
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, body_hash, fetched_at, last_access, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, body_hash, now, now, etag, last_modified),
+            )
+            if previous and previous[0] != body_hash:
+                self._release_body(previous[0])
+            self._evict_if_needed()
+            self._db.commit()
+
+    def mark_revalidated(self, url: str) -> None:
+        """Сервер ответил 304: страница снова свежая."""
+        with self._lock:
+            now = time.time()
+            self._db.execute("UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+            self._db.commit()
+        self._count("revalidated")
+
+    def _release_body(self, body_hash: str) -> None:
+        """Удаляет тело, если на него больше не ссылается ни один URL."""
+        if self._db.execute("SELECT 1 FROM pages WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+            return
+        row = self._db.execute("SELECT stored_size FROM bodies WHERE hash = ?", (body_hash,)).fetchone()
+        if row:
+            self._db.execute("DELETE FROM bodies WHERE hash = ?", (body_hash,))
+            self._stored_bytes -= row[0]
+
+    def _evict_if_needed(self) -> None:
+        if self._stored_bytes <= self.max_bytes:
+            return
+        # Освобождаем с запасом, чтобы не вытеснять по одной странице на каждую запись
+        target = self.max_bytes * 0.9
+        evicted = 0
+        while self._stored_bytes > target:
+            oldest = self._db.execute(
+                "SELECT url, body_hash FROM pages ORDER BY last_access LIMIT 50"
+            ).fetchall()
+            if not oldest:
+                break
+            self._db.executemany("DELETE FROM pages WHERE url = ?", [(url,) for url, _ in oldest])
+            evicted += len(oldest)
+            for body_hash in {body_hash for _, body_hash in oldest}:
+                self._release_body(body_hash)
+        self._stats["evicted"] += evicted
+        logger.info(f"[Кэш страниц] Вытеснено {evicted} давно не запрошенных страниц.")
+
+    def record_hit(self, page: CachedPage) -> None:
+        self._count("hits")
+        self._count("bytes_saved", len(page.body.encode("utf-8")))
+
+    def record_miss(self) -> None:
+        self._count("misses")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            stored_bytes = self._stored_bytes
+        lookups = stats["hits"] + stats["misses"]
+        return {
+            **stats,
+            "hit_ratio": round(stats["hits"] / lookups, 3) if lookups else None,
+            "pages": pages,
+            "stored_mb": round(stored_bytes / (1024 * 1024), 2),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
+
+
+def cached_render(url: str, render: Callable[[], Optional[str]]) -> Optional[str]:
+    """
+    HTML страницы, которую загружает браузер: из кэша, пока он свежий,
+    иначе render() и сохранение результата. Пустой результат не кэшируется.
+    """
+    cache = get_page_cache()
+    page = cache.get(url)
+    if page and page.fresh:
+        cache.record_hit(page)
+        return page.body
+    cache.record_miss()
+    html = render()
+    if html:
+        cache.put(url, html)
+    return html
+
+
+async def cached_render_async(url: str, render: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+    """Асинхронный вариант cached_render (для Playwright)."""
+    cache = get_page_cache()
+    page = await asyncio.to_thread(cache.get, url)
+    if page and page.fresh:
+        cache.record_hit(page)
+        return page.body
+    cache.record_miss()
+    html = await render()
+    if html:
+        await asyncio.to_thread(cache.put, url, html)
+    return html
+
+
+async def fetch_text(session, url: str, headers: Optional[dict] = None, timeout: float = 30) -> str:
+    """
+    GET через aiohttp с кэшем: свежая страница читается с диска, устаревшая
+    перепроверяется условным запросом. Ошибки HTTP пробрасываются как обычно.
+    """
+    cache = get_page_cache()
+    page = await asyncio.to_thread(cache.get, url)
+    if page and page.fresh:
+        cache.record_hit(page)
+        return page.body
+
+    request_headers = dict(headers or {})
+    if page and page.etag:
+        request_headers["If-None-Match"] = page.etag
+    if page and page.last_modified:
+        request_headers["If-Modified-Since"] = page.last_modified
+
+    async with session.get(url, headers=request_headers, timeout=timeout) as response:
+        if page and response.status == 304:
+            await asyncio.to_thread(cache.mark_revalidated, url)
+            cache.record_hit(page)
+            return page.body
+        response.raise_for_status()
+        body = await response.text()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+    cache.record_miss()
+    await asyncio.to_thread(cache.put, url, body, etag, last_modified)
+    return body
+
+
+def get_page_cache_stats() -> dict:
+    return get_page_cache().get_stats()
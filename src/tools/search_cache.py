@@ -0,0 +1,103 @@
+# src/tools/search_cache.py
+"""
+Кэш результатов поиска в Яндексе: нормализованный запрос + max_results -> ссылки.
+
+Запросы отраслевой аналитики строятся по шаблонам из названия ОКВЭД и
+постоянно повторяются, а каждый поиск - это браузер и риск капчи. Результаты
+хранятся settings.SEARCH_CACHE_TTL секунд; когда записей больше
+settings.SEARCH_CACHE_MAX_ENTRIES, вытесняются давно не запрошенные.
+Кэш - один JSON-файл в settings.CACHE_DIR/search/, переживает перезапуск.
+put() переписывает файл целиком, поэтому из асинхронного кода он вызывается
+через asyncio.to_thread.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+
+logger = logging.getLogger(__name__)
+
+_STORE_KEY = "results"
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().replace("ё", "е").split())
+
+
+class SearchResultsCache:
+    def __init__(self):
+        self._store = JsonFileCache("search")
+        self._lock = threading.Lock()
+        # Запись файла идет вне self._lock, чтобы get() не ждал сохранения
+        self._save_lock = threading.Lock()
+        self._entries: Optional[Dict[str, dict]] = None
+        self._stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+    @staticmethod
+    def key(query: str, max_results: int) -> str:
+        return f"{max_results}|{normalize_query(query)}"
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            self._entries = dict(self._store.load(_STORE_KEY) or {})
+        return self._entries
+
+    def get(self, query: str, max_results: int) -> Optional[List[dict]]:
+        key = self.key(query, max_results)
+        with self._lock:
+            entry = self._load().get(key)
+            if entry and time.time() - entry["fetched_at"] < settings.SEARCH_CACHE_TTL:
+                entry["last_access"] = time.time()
+                self._stats["hits"] += 1
+                return entry["results"]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, query: str, max_results: int, results: List[dict]) -> None:
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            entries[self.key(query, max_results)] = {"results": results, "fetched_at": now, "last_access": now}
+            overflow = len(entries) - settings.SEARCH_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                # Сначала выбрасываем устаревшие, затем давно не запрошенные
+                by_priority = sorted(
+                    entries,
+                    key=lambda k: (now - entries[k]["fetched_at"] < settings.SEARCH_CACHE_TTL, entries[k]["last_access"]),
+                )
+                for stale_key in by_priority[:overflow]:
+                    del entries[stale_key]
+                self._stats["evicted"] += overflow
+        self._save()
+
+    def _save(self) -> None:
+        with self._save_lock:
+            # Снимок берется под блокировкой записи: более старый снимок не перезапишет новый
+            with self._lock:
+                snapshot = dict(self._load())
+            self._store.save(_STORE_KEY, snapshot)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._load())
+        lookups = stats["hits"] + stats["misses"]
+        return {**stats, "entries": size, "hit_ratio": round(stats["hits"] / lookups, 3) if lookups else None}
+
+
+_cache: Optional[SearchResultsCache] = None
+
+
+def get_search_cache() -> SearchResultsCache:
+    global _cache
+    if _cache is None:
+        _cache = SearchResultsCache()
+    return _cache
+
+
+def get_search_cache_stats() -> dict:
+    return get_search_cache().get_stats()
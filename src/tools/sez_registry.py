@@ -0,0 +1,195 @@
+# src/tools/sez_registry.py
+"""
+Индекс единого реестра участников СЭЗ: ИНН -> строка реестра.
+
+Индекс хранится на диске (settings.CACHE_DIR/sez_registry/) вместе с хэшем
+PDF, из которого он построен, и загружается при старте бота за миллисекунды:
+для проверки членства используется множество ИНН в mmap-файле (см.
+src/tools/inn_set.py), строки реестра читаются с диска только по запросу.
+Каждая сборка пишется в новый файл inns-<хэш PDF>-<время>.bin, имя
+которого хранится в индексе: на Windows нельзя заменить файл, пока он
+отображен в память, а прежнее множество могут еще читать другие потоки.
+Старые файлы удаляются, когда их больше никто не держит.
+Фоновая задача run_refresher() проверяет публикацию реестра и перестраивает
+индекс только если PDF изменился (другая ссылка, ответ не 304, другой хэш).
+
+Читатели никогда не ждут обновления: они получают текущий индекс, а новый
+подменяет его целиком, когда будет готов.
+"""
+
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from parser import nt
+from src.config import settings
+from src.tools.file_cache import JsonFileCache
+from src.tools.inn_set import InnSet, InnSetError, build_inn_set
+
+logger = logging.getLogger(__name__)
+
+_INDEX_KEY = "index"
+_ROWS_KEY = "rows"
+# Имя файла множества в индексах, построенных до версионирования
+_LEGACY_INNS_FILE = "inns.bin"
+
+
+class SezRegistry:
+    def __init__(self):
+        self._store = JsonFileCache("sez_registry")
+        self._lock = threading.Lock()
+        self._index: Optional[dict] = None
+        self._inns: Optional[InnSet] = None
+        self._loaded = False
+
+    def _inns_path(self, filename: str) -> str:
+        return os.path.join(self._store.directory, filename)
+
+    def _open_inns(self, filename: str) -> Optional[InnSet]:
+        try:
+            return InnSet(self._inns_path(filename))
+        except (OSError, InnSetError) as e:
+            logger.warning(f"[Реестр СЭЗ] Не удалось открыть множество ИНН: {e}")
+            return None
+
+    def _remove_stale_inn_files(self, current: str) -> None:
+        """Удаляет файлы прежних сборок; занятые (еще отображенные) остаются до следующего раза."""
+        pattern = os.path.join(self._store.directory, "inns*.bin")
+        for path in glob.glob(pattern):
+            if os.path.basename(path) == current:
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.debug(f"[Реестр СЭЗ] Файл {path} пока занят: {e}")
+
+    def load(self) -> int:
+        """Загружает индекс с диска (однократно). Возвращает число ИНН."""
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                start_time = time.monotonic()
+                index = self._store.load(_INDEX_KEY)
+                inns_file = index.get("inns_file", _LEGACY_INNS_FILE) if index else None
+                inns = self._open_inns(inns_file) if index else None
+                if inns is not None:
+                    self._index, self._inns = index, inns
+                    self._remove_stale_inn_files(inns_file)
+                    logger.info(
+                        f"[Реестр СЭЗ] Индекс загружен с диска за {(time.monotonic() - start_time) * 1000:.0f} мс: "
+                        f"{len(inns)} ИНН."
+                    )
+            return len(self._inns) if self._inns is not None else 0
+
+    def is_ready(self) -> bool:
+        self.load()
+        return self._inns is not None
+
+    def contains(self, inn: str) -> Optional[bool]:
+        """True/False - есть ли ИНН в реестре; None - индекс еще ни разу не построен."""
+        self.load()
+        inns = self._inns
+        if inns is None:
+            return None
+        return inn in inns
+
+    def get_row(self, inn: str) -> Optional[Dict[str, str]]:
+        """Строка реестра по ИНН (читается с диска при первом обращении)."""
+        if not self.contains(inn):
+            return None
+        return (self._store.load(_ROWS_KEY) or {}).get(inn)
+
+    def age(self) -> Optional[float]:
+        """Сколько секунд назад публикация реестра проверялась последний раз."""
+        self.load()
+        return time.time() - self._index["checked_at"] if self._index else None
+
+    def refresh(self) -> bool:
+        """Проверяет публикацию реестра; перестраивает индекс, только если PDF изменился."""
+        self.load()
+        current = self._index if self._inns is not None else {}
+        pdf_url = nt.find_sez_pdf_url()
+        if not pdf_url:
+            return False
+
+        same_url = current.get("pdf_url") == pdf_url
+        downloaded = nt.download_sez_pdf(
+            pdf_url,
+            etag=current.get("etag") if same_url else None,
+            last_modified=current.get("last_modified") if same_url else None,
+        )
+        if downloaded is None:
+            return False
+
+        new_index = {
+            **current,
+            "pdf_url": pdf_url,
+            "etag": downloaded["etag"],
+            "last_modified": downloaded["last_modified"],
+            "checked_at": time.time(),
+        }
+        content = downloaded["content"]
+        new_inns = None
+        if content is not None:
+            pdf_hash = hashlib.sha256(content).hexdigest()
+            if pdf_hash == current.get("pdf_hash"):
+                logger.info("[Реестр СЭЗ] Содержимое PDF прежнее (хэш совпал), индекс не перестраиваю.")
+            else:
+                rows = nt.parse_sez_registry(content)
+                if not rows:
+                    return False
+                self._store.save(_ROWS_KEY, rows)
+                # Строки нужны редко - в памяти держим только множество ИНН
+                self._store.evict(_ROWS_KEY)
+                # Новый файл на каждую сборку: текущий может быть отображен в память
+                inns_file = f"inns-{pdf_hash[:16]}-{int(time.time())}.bin"
+                count = build_inn_set(self._inns_path(inns_file), rows)
+                new_inns = self._open_inns(inns_file)
+                if new_inns is None:
+                    return False
+                new_index.update(
+                    {"pdf_hash": pdf_hash, "count": count, "built_at": time.time(), "inns_file": inns_file}
+                )
+                logger.info(f"[Реестр СЭЗ] Индекс перестроен: {count} ИНН.")
+
+        with self._lock:
+            # Старое множество не закрываем: его может читать другой поток,
+            # отображение освободится, когда на объект не останется ссылок
+            self._index = new_index
+            if new_inns is not None:
+                self._inns = new_inns
+        self._store.save(_INDEX_KEY, new_index)
+        if new_inns is not None:
+            self._remove_stale_inn_files(new_index["inns_file"])
+        return True
+
+    async def run_refresher(self) -> None:
+        """Фоновая задача бота: проверяет публикацию реестра по расписанию."""
+        interval = settings.SEZ_REGISTRY_REFRESH_INTERVAL
+        while True:
+            age = await asyncio.to_thread(self.age)
+            if age is not None and age < interval:
+                await asyncio.sleep(interval - age)
+            try:
+                ok = await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"[Реестр СЭЗ] Ошибка при обновлении индекса: {e}")
+                ok = False
+            if not ok:
+                logger.warning("[Реестр СЭЗ] Не удалось проверить реестр, использую прежний индекс.")
+                await asyncio.sleep(settings.SEZ_REGISTRY_RETRY_INTERVAL)
+
+
+_registry: Optional[SezRegistry] = None
+
+
+def get_sez_registry() -> SezRegistry:
+    global _registry
+    if _registry is None:
+        _registry = SezRegistry()
+    return _registry
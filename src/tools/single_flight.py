@@ -0,0 +1,111 @@
+# src/tools/single_flight.py
+"""
+Объединение одновременных одинаковых запросов (single-flight).
+
+Если два пользователя прислали один и тот же ИНН (или один пользователь
+прислал его повторно, пока идет первый анализ), второй вызов не запускает
+парсинг заново, а ждет уже выполняющуюся задачу и получает тот же результат.
+
+- Ошибка общей задачи пробрасывается всем ожидающим.
+- Отмена одного вызывающего не затрагивает остальных: общая задача
+  отменяется, только когда ее больше никто не ждет.
+- Результат не кэшируется: как только задача завершилась, следующий вызов
+  запустит новую (кэширование - забота вызывающего кода).
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        # Ключ включает цикл событий: задачу нельзя ждать из чужого цикла
+        self._flights: Dict[Any, _Flight] = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "started": 0, "joined": 0}
+
+    def _count(self, metric: str) -> None:
+        with self._stats_lock:
+            self._stats[metric] += 1
+
+    def _forget(self, flight_key: Any, flight: _Flight) -> None:
+        if self._flights.get(flight_key) is flight:
+            del self._flights[flight_key]
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполняет factory() или присоединяется к уже идущему вызову с тем же ключом."""
+        flight_key = (asyncio.get_running_loop(), key)
+        self._count("calls")
+        flight = self._flights.get(flight_key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            self._count("started")
+        else:
+            self._count("joined")
+            logger.info(f"[{self.name}] Запрос '{key}' уже выполняется, жду его результат.")
+
+        flight.waiters += 1
+        try:
+            # shield: отмена этого вызывающего не отменяет общую задачу
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                logger.info(f"[{self.name}] Запрос '{key}' больше никто не ждет, отменяю.")
+                # Новые вызовы не должны присоединяться к отменяемой задаче
+                self._forget(flight_key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {**self._stats, "in_flight": len(self._flights)}
+
+
+_registry: Dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    if name not in _registry:
+        _registry[name] = SingleFlight(name)
+    return _registry[name]
+
+
+def coalesce(name: str, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Декоратор для async-функций: одновременные вызовы с одинаковым ключом
+    выполняются один раз. По умолчанию ключ - сами аргументы вызова.
+    """
+
+    def decorator(func):
+        flight = get_single_flight(name)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return await flight.do(call_key, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def get_single_flight_stats() -> Dict[str, dict]:
+    return {name: flight.get_stats() for name, flight in _registry.items()}
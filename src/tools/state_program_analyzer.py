@@ -2,21 +2,23 @@
 
 import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # --- Импорты программ-проверщиков (без изменений) ---
 from program import belarus, novye_territorii, mskh, prigranichye, sovmeshchennaya
 
 # --- Импорты ВСЕХ необходимых парсеров (без изменений) ---
-from parser import cb, egrul, msp_check, msx_limit
+from parser import egrul, msp_check
 from parser.full_cheko import get_company_data_by_inn_async
+from src.browser.scheduler import get_browser_scheduler
+from src.tools.dossier_cache import FIELD_EXPIRY, get_dossier_cache
+from src.tools.key_rate_service import get_key_rate_service
+from src.tools.msh_limits_tool import get_msh_limits_data
+from src.tools.single_flight import coalesce
 
 
 logger = logging.getLogger(__name__)
 
-# <<< ВОЗВРАЩАЕМ СЕМАФОР, НО ИСПОЛЬЗУЕМ ЕГО НА ЭТАПЕ СБОРА ДАННЫХ >>>
-SELENIUM_SEMAPHORE = asyncio.Semaphore(1)
-
 PROGRAM_CHECKERS = {
     "Программа поддержки 'Беларусь'": belarus.check_belarus_program,
     "Программа 'Новые территории' (СЭЗ)": novye_territorii.check_novye_territorii_program,
@@ -26,61 +28,123 @@ PROGRAM_CHECKERS = {
 }
 
 
+def _is_cacheable(field: str, value: Any) -> bool:
+    """Ошибки и пустые ответы не кэшируем, чтобы не закрепить сбой на сутки."""
+    if value is None:
+        return False
+    if field == "full_cheko_data":
+        # Без ОКВЭД (сбой разбора таблицы) проверки программ неполные - не закрепляем
+        return not value.get("error") and bool(value.get("okved_data"))
+    if field == "egrul_record":
+        # "Не найдено" из Selenium - это всего лишь тайм-аут ожидания, его не запоминаем
+        return value.get("source") == "http" or value.get("found") is True
+    return True
+
+
+@coalesce("company_data", key=lambda inn, force_refresh=False: (inn, force_refresh))
+async def get_company_data_cached(inn: str, force_refresh: bool = False) -> Dict[str, Any]:
+    """Данные checko.ru по ИНН: из кэша досье (до суток) или свежие."""
+    cache = get_dossier_cache()
+    if not force_refresh:
+        values, ages = cache.get_fields(inn, ["full_cheko_data"])
+        if "full_cheko_data" in values:
+            logger.info(f"Данные checko для ИНН {inn} взяты из кэша (возраст {ages['full_cheko_data'] / 3600:.1f} ч).")
+            return values["full_cheko_data"]
+
+    async with get_browser_scheduler().slot("checko.ru", owner=inn):
+        company_data = await get_company_data_by_inn_async(inn)
+    if _is_cacheable("full_cheko_data", company_data):
+        cache.put(inn, "full_cheko_data", company_data)
+    return company_data
+
+
 # <<< ЗАМЕНИТЕ ЭТУ ФУНКЦИЮ ПОЛНОСТЬЮ >>>
-async def _gather_company_dossier_async(inn: str) -> Dict[str, Any]:
+# Одновременные запросы одного ИНН собирают досье один раз
+@coalesce("company_dossier", key=lambda inn, force_refresh=False, partial_dossier=None: (inn, force_refresh))
+async def _gather_company_dossier_async(
+    inn: str,
+    force_refresh: bool = False,
+    partial_dossier: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
     """
-    (ФИНАЛЬНАЯ ВЕРСИЯ) Собирает досье. Selenium-задачи выполняются последовательно,
-    остальные - параллельно.
+    (ФИНАЛЬНАЯ ВЕРСИЯ) Собирает досье. Браузерные задачи получают слоты
+    у планировщика (с лимитом на каждый сайт), остальные идут параллельно.
+    Поля из partial_dossier (уже полученные вызывающим кодом) не запрашиваются
+    повторно; остальные, если еще не устарели, берутся из кэша досье.
     """
     logger.info(f"Начинаю централизованный и безопасный сбор досье для ИНН: {inn}")
+    cache = get_dossier_cache()
 
-    async def _safe_selenium_task(func, *args):
-        async with SELENIUM_SEMAPHORE:
-            logger.info(f"Запускаю Selenium-задачу: {func.__name__}")
-            if asyncio.iscoroutinefunction(func):
-                result = await func(*args)
-            else:
-                result = await asyncio.to_thread(func, *args)
-            logger.info(f"Завершил Selenium-задачу: {func.__name__}")
-            return result
-    
-    tasks = {
+    provided = {key: value for key, value in (partial_dossier or {}).items() if value is not None}
+    missing_fields = [field for field in FIELD_EXPIRY if field not in provided]
+    cached, field_ages = ({}, {}) if force_refresh else cache.get_fields(inn, missing_fields)
+    if cached:
+        logger.info(f"Из кэша досье для ИНН {inn}: {', '.join(cached)}")
+    if provided:
+        logger.info(f"Переданы готовые данные для ИНН {inn}: {', '.join(provided)}")
+    cached.update(provided)
+
+    task_factories = {
         # Задачи, использующие Selenium:
-        "full_cheko_data": _safe_selenium_task(get_company_data_by_inn_async, inn),
-        "is_in_egrul": _safe_selenium_task(egrul.check_inn_on_nalog_ru_selenium, inn),
-        "msp_category": _safe_selenium_task(msp_check.get_msp_category, inn),
+        "full_cheko_data": lambda: get_company_data_cached(inn, force_refresh),
         
         # Легкие задачи, которые теперь не ждут Selenium:
-        "cbr_rate_data": asyncio.to_thread(cb.get_cbr_key_rate),
-        "msh_limits_data": asyncio.to_thread(msx_limit.get_subsidy_limits),
-        # Проверка СЭЗ теперь вызывается и кэшируется внутри check_novye_territorii_program
+        # (реестр МСП и ЕГРЮЛ сначала ищутся по HTTP, браузерный слот берется только при откате)
+        "msp_category": lambda: msp_check.get_msp_category_async(inn),
+        "egrul_record": lambda: egrul.get_egrul_record_async(inn),
+        # Ставка отдается из памяти сервиса, который обновляется по расписанию
+        "cbr_rate_data": lambda: get_key_rate_service().current_async(),
+        # Лимиты МСХ отдаются из памяти; браузер, если нужен, провайдер берет сам
+        "msh_limits_data": lambda: get_msh_limits_data(),
+        # Реестр СЭЗ проверяется внутри check_novye_territorii_program по индексу src/tools/sez_registry.py
     }
+    tasks = {key: factory() for key, factory in task_factories.items() if key not in cached}
 
     results = await asyncio.gather(*tasks.values(), return_exceptions=True)
-    
-    dossier = {"inn": inn}
-    task_keys = list(tasks.keys())
-    for i, result in enumerate(results):
-        key = task_keys[i]
+
+    collected = dict(cached)
+    for key, result in zip(tasks.keys(), results):
         if isinstance(result, Exception):
             logger.error(f"Ошибка при сборе данных для '{key}': {result}")
-            dossier[key] = None
+            collected[key] = None
+            continue
+        collected[key] = result
+        if key != "full_cheko_data" and _is_cacheable(key, result):
+            cache.put(inn, key, list(result) if isinstance(result, tuple) else result)
+            field_ages[key] = 0.0
+    if "cbr_rate_data" in tasks:
+        field_ages["cbr_rate_data"] = get_key_rate_service().age() or 0.0
+
+    dossier = {"inn": inn}
+    for key, result in collected.items():
+        if key == "cbr_rate_data" and isinstance(result, (tuple, list)):
+            dossier["cbr_key_rate"] = result[0]
+            dossier["cbr_key_rate_date"] = result[1]
+        elif key == "egrul_record":
+            dossier["egrul_record"] = result
+            dossier["is_in_egrul"] = result["found"] if result else None
         else:
-            if key == "cbr_rate_data" and isinstance(result, tuple):
-                dossier["cbr_key_rate"] = result[0]
-                dossier["cbr_key_rate_date"] = result[1]
-            else:
-                dossier[key] = result
-    
+            dossier[key] = result
+    # Возраст каждого поля в секундах (0 - получено только что)
+    dossier["field_ages"] = {key: field_ages.get(key, 0.0) for key in collected}
+
     logger.info(f"Полное досье для ИНН {inn} успешно собрано.")
     return dossier
 
 
 # <<< Эта функция остается БЕЗ ИЗМЕНЕНИЙ, так как вся логика инкапсулирована выше >>>
-async def run_state_programs_check(inn: str) -> Dict[str, Any]:
+async def run_state_programs_check(
+    inn: str,
+    force_refresh: bool = False,
+    partial_dossier: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    partial_dossier - уже собранные поля досье (например, {"full_cheko_data": ...}),
+    чтобы не загружать их повторно.
+    """
     logger.info(f"Запуск анализа по всем госпрограммам для ИНН: {inn}")
     
-    company_dossier = await _gather_company_dossier_async(inn)
+    company_dossier = await _gather_company_dossier_async(inn, force_refresh, partial_dossier)
     
     tasks = []
     for name, checker_func in PROGRAM_CHECKERS.items():
@@ -1,8 +1,7 @@
 # src/web_news_analyzer.py
 import logging
 import asyncio
-from typing import Dict, Any, List, Tuple
-from playwright.async_api import async_playwright
+from typing import Dict, Any, List, Optional, Tuple
 from bs4 import BeautifulSoup
 import re
 import json
@@ -10,7 +9,12 @@ from langchain_core.messages import SystemMessage, HumanMessage
 
 # Эти импорты остаются, так как они нужны для поиска и анализа новостей
 from src.web_searcher import search_links
+from src.browser.playwright_pool import get_playwright_pool
+from src.browser.readiness import ContentLengthConverged
 from src.nlu.gigachat_client import GigaChatNLU
+from src.tools.page_cache import cached_render_async
+from src.tools.industry_cache import get_industry_cache, normalize_okved
+from src.tools.single_flight import coalesce
 
 logger = logging.getLogger(__name__)
 
@@ -27,34 +31,33 @@ BAD_NEWS_DOMAINS = [
     "sbis.ru",
     "basis.myseldon.com" # Убираем агрегаторы, чтобы получать первоисточники
 ]
+# Статья считается загруженной, когда текст страницы перестал расти
+PAGE_READINESS = ContentLengthConverged("body", quiet_ms=300, cap_ms=1500)
 
 
 async def _get_interactive_text_from_url(url: str) -> str:
     """
-    (Без изменений)
     Вспомогательная функция для асинхронного извлечения текста со страницы.
     """
     logger.info(f"Интерактивное извлечение текста с: {url}")
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    "--no-sandbox",
-                    "--disable-setuid-sandbox",
-                    "--disable-blink-features=AutomationControlled",
-                ],
-            )
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
-                ignore_https_errors=True  # <-- ВОТ ЭТА СТРОКА
-            )
-            page = await context.new_page()
+
+    async def render() -> str | None:
+        # Страница открывается в общем долгоживущем браузере
+        async with get_playwright_pool().page(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
+            ignore_https_errors=True,
+        ) as page:
             await page.goto(url, wait_until="domcontentloaded", timeout=25000)
-            await page.wait_for_timeout(1500)
-            html_content = await page.content()
-            await context.close()
-        if "пожалуйста, подтвердите, что вы человек" in html_content.lower():
+            await PAGE_READINESS.wait_playwright(page)
+            html = await page.content()
+        # Страницу с проверкой "вы человек?" не кэшируем
+        if "пожалуйста, подтвердите, что вы человек" in html.lower():
+            return None
+        return html
+
+    try:
+        html_content = await cached_render_async(url, render)
+        if not html_content:
             return ""
         soup = BeautifulSoup(html_content, "lxml")
         for element in soup(
@@ -128,9 +131,59 @@ async def get_news_analysis_for_company(
     company_name: str, 
     inn: str, 
     okved_description: str,
-    gigachat_instance: GigaChatNLU
+    gigachat_instance: GigaChatNLU,
+    okved_code: Optional[str] = None,
 ) -> Dict[str, Any]:
-    logger.info(f"Запущен анализ отраслевой аналитики для: '{company_name}' (ОКВЭД: {okved_description})")
+    """
+    Отраслевая аналитика зависит только от ОКВЭД, поэтому берется из общего
+    кэша (src/tools/industry_cache.py) и считается заново, только если ее там нет.
+    """
+    logger.info(f"Запрошена отраслевая аналитика для: '{company_name}' (ОКВЭД: {okved_code or okved_description})")
+    if not okved_description:
+        return await _analyze_industry(okved_description, gigachat_instance)
+
+    cache = get_industry_cache()
+    key = normalize_okved(okved_code, okved_description)
+    await asyncio.to_thread(cache.record_request, key, okved_description)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached:
+        logger.info(f"Отраслевая аналитика для '{key}' взята из кэша.")
+        return cached
+    return await refresh_industry_analysis(key, okved_description, gigachat_instance)
+
+
+async def get_cached_industry_analysis(
+    okved_description: str, okved_code: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Аналитика для отрасли из кэша, без поиска и парсинга (для анализа ИНН).
+    Запрос учитывается в счетчике, поэтому отсутствующую аналитику посчитает
+    ночной пересчет (run_nightly_precompute).
+    """
+    cache = get_industry_cache()
+    key = normalize_okved(okved_code, okved_description)
+    await asyncio.to_thread(cache.record_request, key, okved_description)
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached:
+        logger.info(f"Отраслевая аналитика для '{key}' взята из кэша.")
+    else:
+        logger.info(f"Отраслевой аналитики для '{key}' в кэше нет, ее посчитает ночной пересчет.")
+    return cached
+
+
+@coalesce("industry_analysis", key=lambda key, okved_description, gigachat_instance: key)
+async def refresh_industry_analysis(
+    key: str, okved_description: str, gigachat_instance: GigaChatNLU
+) -> Dict[str, Any]:
+    """Считает аналитику для отрасли и кладет в кэш, если удалось найти новости."""
+    result = await _analyze_industry(okved_description, gigachat_instance)
+    if result.get("top_news"):
+        await asyncio.to_thread(get_industry_cache().put, key, okved_description, result)
+    return result
+
+
+async def _analyze_industry(okved_description: str, gigachat_instance: GigaChatNLU) -> Dict[str, Any]:
+    logger.info(f"Запущен анализ отраслевой аналитики (ОКВЭД: {okved_description})")
 
     system_prompt = (
         "Ты — старший отраслевой аналитик. Твоя задача — извлечь из большого текста ключевые рыночные сигналы, тенденции и факты. "
@@ -174,8 +227,7 @@ async def get_news_analysis_for_company(
 
         try:
             client = gigachat_instance._get_client("extraction")
-            response = await asyncio.to_thread(
-                client.invoke,
+            response = await client.ainvoke(
                 [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)],
             )
             response_content = response.content.strip()
@@ -1,11 +1,16 @@
 # src/web_searcher.py (версия 3, с правильной обработкой ошибок и новыми селекторами)
+import asyncio
 import logging
 import os
 import random
 import time
-from playwright.async_api import async_playwright, Error as PlaywrightError
+from playwright.async_api import Error as PlaywrightError
 from bs4 import BeautifulSoup
 
+from src.browser.playwright_pool import get_playwright_pool
+from src.tools.search_cache import get_search_cache
+from src.tools.single_flight import coalesce
+
 logger = logging.getLogger(__name__)
 
 MODULE_DIR = os.path.dirname(__file__)
@@ -14,28 +19,46 @@ HEADLESS_MODE = True
 DEBUG_SCREENSHOT_DIR = os.path.join(MODULE_DIR, "debug_screenshots")
 os.makedirs(DEBUG_SCREENSHOT_DIR, exist_ok=True)
 
+# Параметры постоянного контекста (профиль с куками Яндекса).
+# Контекст запускается один раз и дальше живет в общем Playwright-пуле.
+SEARCH_CONTEXT_OPTIONS = {
+    "headless": HEADLESS_MODE,
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
+    "viewport": {"width": 1920, "height": 1080},
+    "locale": "ru-RU",
+    "args": [
+        "--no-sandbox",
+        "--disable-setuid-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-gpu",
+        "--disable-blink-features=AutomationControlled"
+    ],
+    "slow_mo": random.randint(50, 150),
+}
+
 
 async def search_links(query: str, max_results: int = 5) -> list[dict]:
+    """Ссылки из выдачи Яндекса; повторные запросы отдаются из кэша (src/tools/search_cache.py)."""
+    cache = get_search_cache()
+    cached = cache.get(query, max_results)
+    if cached is not None:
+        logger.info(f"Результаты поиска по запросу '{query}' взяты из кэша.")
+        return cached
+    results = await _search_yandex(query, max_results)
+    # Пустая выдача (капча, ошибка браузера) не кэшируется
+    if results:
+        await asyncio.to_thread(cache.put, query, max_results, results)
+    return results
+
+
+@coalesce("web_search", key=lambda query, max_results: get_search_cache().key(query, max_results))
+async def _search_yandex(query: str, max_results: int) -> list[dict]:
     logger.info(f"Запущен АСИНХРОННЫЙ веб-поиск по запросу: '{query}'")
     
-    # --- ИЗМЕНЕНИЕ 1: Выносим инициализацию за пределы try-блока ---
-    async with async_playwright() as p:
-        context = await p.chromium.launch_persistent_context(
-            USER_DATA_DIR,
-            headless=HEADLESS_MODE,
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-            locale="ru-RU",
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-                "--disable-blink-features=AutomationControlled"
-            ],
-            slow_mo=random.randint(50, 150)
-        )
-        page = await context.new_page()
+    # Вместо запуска браузера на каждый запрос берем страницу в постоянном контексте пула
+    async with get_playwright_pool().persistent_page(
+        USER_DATA_DIR, **SEARCH_CONTEXT_OPTIONS
+    ) as page:
 
         try:
             search_url = f"https://yandex.ru/search/?text={query.replace(' ', '+')}"
@@ -78,10 +101,6 @@ async def search_links(query: str, max_results: int = 5) -> list[dict]:
             # Возвращаем пустой список, но не падаем
             html_content = None
 
-        finally:
-            # Закрываем контекст здесь, после всех действий
-            await context.close()
-
     if not html_content:
         logger.warning(f"Не удалось получить HTML-контент для запроса '{query}'.")
         return []
@@ -71,8 +71,8 @@ async def run_test():
         new=unittest.mock.AsyncMock(return_value=MOCK_LIMITS_DATA),
     ) as mock_get_limits, unittest.mock.patch.object(
         dialogue_manager.giga_nlu,
-        "extract_intent_and_entities",
-        return_value=MOCK_NLU_RESULT,
+        "aextract_intent_and_entities",
+        new=unittest.mock.AsyncMock(return_value=MOCK_NLU_RESULT),
     ) as mock_nlu:
 
         print(
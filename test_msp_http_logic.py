@@ -0,0 +1,123 @@
+# test_msp_http_logic.py
+
+import json
+import logging
+import os
+import threading
+import unittest.mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Настраиваем логирование, чтобы видеть, что происходит внутри
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+from parser import msp_check
+
+DEBUG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "debug_logs")
+
+# --- ШАГ 1: ОЖИДАЕМЫЕ РЕЗУЛЬТАТЫ ПО СОХРАНЕННЫМ СТРАНИЦАМ debug_msp_*.html ---
+
+EXPECTED_FROM_HTML = {
+    "3123141328": "микропредприятие",
+    "6809025708": "малое предприятие",
+    "3123347270": "среднее предприятие",
+    "6828004710": "не является субъектом мсп",
+    "3620007636": None,  # Страница "Ничего не найдено"
+    "7728278043": None,
+}
+
+# Имитация JSON-ответа search-proc.json для ИНН без сохраненной страницы
+MOCK_JSON_INN = "7700000000"
+MOCK_JSON_RESPONSE = {
+    "data": [{"inn": MOCK_JSON_INN, "name_ex": "ООО 'ТЕСТ'", "category": 2}],
+    "rowCount": 1,
+}
+
+
+# --- ШАГ 2: ЛОКАЛЬНЫЙ "ДВОЙНИК" rmsp.nalog.ru ---
+
+
+class _FakeRmspHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        inn = parse_qs(body).get("query", [""])[0]
+
+        if self.path != "/" + msp_check.RMSP_SEARCH_PATH:
+            self.send_error(404)
+            return
+        if inn == MOCK_JSON_INN:
+            payload = json.dumps(MOCK_JSON_RESPONSE).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            path = os.path.join(DEBUG_DIR, f"debug_msp_{inn}.html")
+            if not os.path.exists(path):
+                self.send_error(500)
+                return
+            with open(path, "rb") as f:
+                payload = f.read()
+            content_type = "text/html; charset=utf-8"
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_test():
+    print("\n--- ЗАПУСК ТЕСТА HTTP-ПРОВЕРКИ РЕЕСТРА МСП ---\n")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeRmspHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    try:
+        print("1. Разбор сохраненных HTML-страниц через HTTP-клиент:")
+        for inn, expected in EXPECTED_FROM_HTML.items():
+            category = msp_check.get_msp_category_http(inn, base_url=base_url)
+            assert category == expected, f"{inn}: ожидали {expected!r}, получили {category!r}"
+            print(f"   - {inn}: {category or 'не найден'} [OK]")
+
+        print("\n2. Разбор JSON-ответа:")
+        category = msp_check.get_msp_category_http(MOCK_JSON_INN, base_url=base_url)
+        assert category == "малое предприятие"
+        print(f"   - {MOCK_JSON_INN}: {category} [OK]")
+
+        print("\n3. Переход на Selenium, если HTTP-путь не сработал:")
+        # Для неизвестного ИНН "двойник" отвечает 500, браузер подменяем заглушкой
+        fallbacks_before = msp_check.get_msp_stats()["selenium_fallbacks"]
+        real_http = msp_check.get_msp_category_http
+        with unittest.mock.patch.object(
+            msp_check,
+            "get_msp_category_http",
+            side_effect=lambda inn: real_http(inn, base_url=base_url),
+        ), unittest.mock.patch.object(
+            msp_check, "_get_msp_category_selenium", return_value="микропредприятие"
+        ) as mock_selenium:
+            category = msp_check.get_msp_category("1111111111")
+            mock_selenium.assert_called_once_with("1111111111")
+        assert category == "микропредприятие"
+        assert msp_check.get_msp_stats()["selenium_fallbacks"] == fallbacks_before + 1
+        print("   - Selenium вызван один раз, счетчик переходов увеличен. [OK]")
+
+        print(f"\nСтатистика: {msp_check.get_msp_stats()}")
+        print("\n--- ТЕСТ УСПЕШНО ПРОЙДЕН! ---\n")
+    finally:
+        server.shutdown()
+
+
+# --- ШАГ 3: ЗАПУСК ТЕСТА ---
+
+if __name__ == "__main__":
+    try:
+        run_test()
+    except Exception as e:
+        print(f"\n--- ТЕСТ ПРОВАЛЕН! ОШИБКА: {e} ---")
+        import traceback
+
+        traceback.print_exc()